@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import os
+import random
+import resource
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from media import media_response
+
+# Serves one generated file through media_response, the same code path as
+# /media/{filename}. Pass --url to benchmark a running server instead.
+
+
+def make_app(path: str) -> Starlette:
+    async def serve(request):
+        return media_response(request, path)
+
+    return Starlette(routes=[Route("/media/bench.mp4", serve, methods=["GET", "HEAD"])])
+
+
+def start_server(path: str) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(make_app(path), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/media/bench.mp4"
+
+
+async def reader(client: httpx.AsyncClient, url: str, size: int, range_bytes: int, requests: int,
+                 latencies: list[float]) -> int:
+    received = 0
+    for _ in range(requests):
+        if range_bytes:
+            start = random.randrange(0, max(1, size - range_bytes))
+            headers = {"Range": f"bytes={start}-{start + range_bytes - 1}"}
+        else:
+            headers = {}
+        started = time.perf_counter()
+        async with client.stream("GET", url, headers=headers) as response:
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+        latencies.append(time.perf_counter() - started)
+    return received
+
+
+async def bench(url: str, size: int, readers: int, range_bytes: int, requests: int) -> dict:
+    latencies = []
+    limits = httpx.Limits(max_connections=readers)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        received = await asyncio.gather(*[
+            reader(client, url, size, range_bytes, requests, latencies) for _ in range(readers)
+        ])
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "mb_s": sum(received) / elapsed / 2**20,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/media throughput with concurrent range readers")
+    parser.add_argument("--url", help="benchmark a running server's /media URL instead")
+    parser.add_argument("--size-mb", type=int, default=50, help="size of the generated file")
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=20, help="requests per reader")
+    parser.add_argument("--range-kb", type=int, default=1024, help="bytes per range request (0 = whole file)")
+    args = parser.parse_args()
+
+    path = None
+    if args.url:
+        url = args.url
+        size = int(httpx.head(url).headers["content-length"])
+    else:
+        fd, path = tempfile.mkstemp(suffix=".mp4")
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(2**20))
+        size = args.size_mb * 2**20
+        url = start_server(path)
+
+    try:
+        print(f"{'readers':>8} {'MB/s':>10} {'p50':>10} {'p95':>10}")
+        for readers in args.readers:
+            result = asyncio.run(bench(url, size, readers, args.range_kb * 1024, args.requests))
+            print(f"{readers:>8} {result['mb_s']:>10.1f} {result['p50_ms']:>8.1f}ms {result['p95_ms']:>8.1f}ms")
+        # The server runs in this process: peak RSS stays near the baseline
+        # if files are streamed rather than buffered.
+        print(f"\npeak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    finally:
+        if path:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
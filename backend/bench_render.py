@@ -0,0 +1,85 @@
+import argparse
+import statistics
+import tempfile
+import time
+
+from manim_runner import render_video
+import manim_cache
+import manim_worker
+from workdir import get_scratch
+
+# Short 480p scene, same shape as test_manim.py.
+SCENE = """from manim import *
+
+class PhysicsScene(Scene):
+    def construct(self):
+        title = Text("Benchmark", font_size=40, color=WHITE)
+        self.play(Write(title), run_time=0.5)
+        circle = Circle(radius=1, color=WHITE).shift(DOWN)
+        self.play(Create(circle), run_time=0.5)
+"""
+
+
+def bench(name: str, fn, runs: int, use_cache: bool = False, fresh_cache: bool = False) -> list[float]:
+    times = []
+    for i in range(runs):
+        if fresh_cache:
+            manim_cache.manim_cache = manim_cache.ManimCache(tempfile.mkdtemp(prefix="bench_manim_cache_"), 2**30)
+        started = time.perf_counter()
+        output = fn(SCENE, f"bench_{name}_{i}", "standard", None, use_cache)
+        times.append(time.perf_counter() - started)
+        get_scratch().release(output.path)
+        print(f"  {name} run {i + 1}: {times[-1]:.2f}s")
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare manim CLI renders with warm forked renders")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cache", action="store_true", help="compare renders with a cold and a warm shared manim cache")
+    args = parser.parse_args()
+
+    if args.cache:
+        bench_cache(args.runs)
+        return
+
+    cli = bench("cli", render_video, args.runs)
+
+    started = time.perf_counter()
+    manim_worker.preload()
+    preload_time = time.perf_counter() - started
+    if not manim_worker.manim_loaded:
+        print("manim could not be preloaded; warm mode unavailable here")
+        return
+    warm = bench("warm", manim_worker.render_video_warm, args.runs)
+
+    print()
+    print(f"{'mode':<6} {'median':>8} {'mean':>8} {'min':>8}")
+    for name, times in (("cli", cli), ("warm", warm)):
+        print(f"{name:<6} {statistics.median(times):>7.2f}s {statistics.mean(times):>7.2f}s {min(times):>7.2f}s")
+    print(f"warm preload (paid once per worker): {preload_time:.2f}s")
+    saved = statistics.median(cli) - statistics.median(warm)
+    print(f"per-job saving: {saved:.2f}s ({saved / statistics.median(cli):.0%})")
+
+
+def bench_cache(runs: int):
+    manim_worker.preload()
+    render = manim_worker.render_video_warm if manim_worker.manim_loaded else render_video
+    # Cold: every run starts from an empty cache. Warm: one shared cache,
+    # primed by a first render that isn't counted.
+    cold = bench("cold", render, runs, use_cache=True, fresh_cache=True)
+    manim_cache.manim_cache = manim_cache.ManimCache(tempfile.mkdtemp(prefix="bench_manim_cache_"), 2**30)
+    get_scratch().release(render(SCENE, "bench_prime", "standard", None, True).path)
+    warm = bench("cached", render, runs, use_cache=True)
+
+    print()
+    print(f"{'cache':<6} {'median':>8} {'mean':>8} {'min':>8}")
+    for name, times in (("cold", cold), ("warm", warm)):
+        print(f"{name:<6} {statistics.median(times):>7.2f}s {statistics.mean(times):>7.2f}s {min(times):>7.2f}s")
+    saved = statistics.median(cold) - statistics.median(warm)
+    print(f"per-job saving: {saved:.2f}s ({saved / statistics.median(cold):.0%})")
+    print(f"cache contents: {manim_cache.get_manim_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
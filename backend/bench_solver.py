@@ -0,0 +1,59 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from solver import solve, solve_grid
+
+# One sweep per family: every listed parameter gets `--points` values.
+GRIDS = {
+    "projectile": {"v0": (1, 60), "angle": (1, 89)},
+    "river_boat": {"vb": (0.5, 10), "vr": (0, 8), "d": (10, 500)},
+    "incline": {"angle": (1, 80), "mu": (0, 1), "m": 5.0, "length": 10.0},
+    "atwood": {"m1": (0.5, 20), "m2": (0.5, 20)},
+    "pendulum": {"length": (0.1, 10), "amplitude": (1, 60)},
+    "spring_mass": {"k": (10, 1000), "m": (0.1, 10), "amplitude": 0.1},
+    "circular": {"r": (0.5, 100), "v": (1, 50), "m": 2.0},
+    "collision": {"m1": (0.5, 10), "m2": (0.5, 10), "v1": 5.0, "v2": (-5, 5), "elastic": 1},
+}
+
+
+def grid(family: str, points: int) -> dict:
+    return {
+        name: np.linspace(*value, points) if isinstance(value, tuple) else value
+        for name, value in GRIDS[family].items()
+    }
+
+
+def bench(family: str, points: int, runs: int) -> tuple[int, float]:
+    params = grid(family, points)
+    evaluations = int(np.prod([len(v) for v in params.values() if np.ndim(v)]))
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        solve_grid(family, params, max_points=0)
+        times.append(time.perf_counter() - started)
+    return evaluations, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Closed-form solver throughput over parameter grids")
+    parser.add_argument("--points", type=int, default=200, help="values per swept parameter")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'family':<12} {'evals':>10} {'median':>10} {'evals/ms':>12}")
+    for family in GRIDS:
+        evaluations, median = bench(family, args.points, args.runs)
+        print(f"{family:<12} {evaluations:>10} {median * 1000:>8.2f}ms {evaluations / (median * 1000):>12,.0f}")
+
+    # What verifying a single LLM answer costs, for comparison.
+    started = time.perf_counter()
+    for _ in range(1000):
+        solve("projectile", {"v0": 20.0, "angle": 45.0})
+    print(f"\nsingle scalar solve: {(time.perf_counter() - started) * 1000:.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    LRU cache for JSON-serialisable values, bounded by entry count and
+    (optionally) total payload size, with per-entry TTL.
+
+    If `path` is set, every entry is also written to its own JSON file in that
+    directory, so the cache survives restarts and is shared between uvicorn
+    workers: a memory miss falls back to the file before giving up.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, max_bytes: int | None = None,
+                 ttl: float | None = None, path: str | None = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.entries: OrderedDict[str, tuple] = OrderedDict()  # key -> (value, expires_at, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    # ─── Public API ───────────────────────────────────────────────────────────
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.path:
+                entry = self._read_file(key)
+                if entry is not None:
+                    self._insert(key, *entry)
+                    self._evict()
+            if entry is None or self._expired(entry[1]):
+                if key in self.entries:
+                    self._remove(key, unlink=True)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        size = len(json.dumps(value))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key, unlink=False)
+            self._insert(key, value, expires_at, size)
+            if self.path:
+                self._write_file(key, value, expires_at)
+            self._evict()
+
+    def delete(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key, unlink=True)
+            elif self.path:
+                self._unlink(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    # ─── Internals ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _expired(expires_at: float | None) -> bool:
+        return expires_at is not None and expires_at < time.time()
+
+    def _insert(self, key: str, value, expires_at: float | None, size: int):
+        self.entries[key] = (value, expires_at, size)
+        self.size += size
+
+    def _remove(self, key: str, unlink: bool):
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+        if unlink and self.path:
+            self._unlink(key)
+
+    def _evict(self):
+        while self.entries and (
+            len(self.entries) > self.max_entries
+            or (self.max_bytes and self.size > self.max_bytes)
+        ):
+            key = next(iter(self.entries))
+            self._remove(key, unlink=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def _read_file(self, key: str) -> tuple | None:
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("key") != key:
+            return None
+        return record["value"], record.get("expires_at"), len(json.dumps(record["value"]))
+
+    def _write_file(self, key: str, value, expires_at: float | None):
+        # Write-then-rename so concurrent readers never see a half-written entry.
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "value": value, "expires_at": expires_at}, f)
+            os.replace(tmp, self._file(key))
+        except OSError as e:
+            print(f"[Cache] {self.name}: failed to persist entry: {e}")
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _unlink(self, key: str):
+        try:
+            os.unlink(self._file(key))
+        except OSError:
+            pass
+
+    def _load(self):
+        """Warm the memory tier from disk, most recently written entries last."""
+        files = []
+        for name in os.listdir(self.path):
+            full = os.path.join(self.path, name)
+            if name.endswith(".tmp"):
+                # Leftover from a crash mid-write.
+                try:
+                    os.unlink(full)
+                except OSError:
+                    pass
+            elif name.endswith(".json"):
+                try:
+                    files.append((os.path.getmtime(full), full))
+                except OSError:
+                    pass
+        files.sort()
+        for _, full in files:
+            try:
+                with open(full, encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if self._expired(record.get("expires_at")):
+                try:
+                    os.unlink(full)
+                except OSError:
+                    pass
+                continue
+            self._insert(record["key"], record["value"], record.get("expires_at"), len(json.dumps(record["value"])))
+        self._evict()
+        print(f"[Cache] {self.name}: loaded {len(self.entries)} entries from {self.path}")
@@ -0,0 +1,101 @@
+import ast
+import hashlib
+import os
+import re
+from dotenv import load_dotenv
+
+from cache import LRUCache
+
+load_dotenv()
+
+
+def error_signature(error: str) -> str:
+    """
+    The stable part of an error message: the final exception line of a
+    traceback, with line/column numbers, memory addresses, temp paths and ids
+    stripped, so the same bug on a different run maps to the same key.
+    """
+    lines = [line.strip() for line in error.strip().splitlines() if line.strip()]
+    exception_lines = [line for line in lines if re.match(r"^[\w.]*(Error|Exception|Warning)\b", line)]
+    sig = exception_lines[-1] if exception_lines else " ".join(lines)[-300:]
+    sig = re.sub(r"0x[0-9a-fA-F]+", "0x?", sig)
+    sig = re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", "<id>", sig)
+    sig = re.sub(r"(?:[A-Za-z]:)?[\\/][^\s'\"]*[\\/]", "", sig)
+    sig = re.sub(r"\b(line|col|column)\s*\d+", r"\1 N", sig, flags=re.I)
+    sig = re.sub(r":\d+(:\d+)?\b", "", sig)
+    return " ".join(sig.split())
+
+
+def _code_hash(code: str, code_type: str) -> str:
+    """
+    Hash of what the code does. JavaScript ignores whitespace, so p5.js code
+    has it folded; in Python indentation is syntax, so Manim code hashes its
+    AST (comments and blank lines don't count) or, if it doesn't parse, its
+    exact text.
+    """
+    if code_type == "p5js":
+        return hashlib.sha256(" ".join(code.split()).encode()).hexdigest()
+    try:
+        code = ast.dump(ast.parse(code))
+    except (SyntaxError, ValueError):
+        pass
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class FixCache:
+    """
+    Remembers LLM fixes as (code, error signature, code type) -> fixed code.
+
+    Each fixed output is also indexed by its own hash, so when that output
+    later fails (the frontend posts it back with a new error, or the Manim
+    retry loop fails to render it) the fix that produced it is dropped
+    instead of being served again.
+    """
+
+    def __init__(self, cache: LRUCache):
+        self.cache = cache
+
+    @staticmethod
+    def key(code: str, error: str, code_type: str) -> str:
+        return f"fix:{code_type}:{_code_hash(code, code_type)}:{hashlib.sha256(error_signature(error).encode()).hexdigest()[:16]}"
+
+    def get(self, code: str, error: str, code_type: str) -> str | None:
+        entry = self.cache.get(self.key(code, error, code_type))
+        return entry["fixed"] if entry else None
+
+    def put(self, code: str, error: str, code_type: str, fixed: str):
+        key = self.key(code, error, code_type)
+        self.cache.set(key, {"fixed": fixed, "verified": False})
+        self.cache.set(f"out:{code_type}:{_code_hash(fixed, code_type)}", {"key": key})
+
+    def report(self, fixed: str, code_type: str, ok: bool) -> bool:
+        """Record whether code produced by a cached fix actually worked; True if `fixed` was one."""
+        out = self.cache.get(f"out:{code_type}:{_code_hash(fixed, code_type)}")
+        if not out:
+            return False
+        entry = self.cache.get(out["key"])
+        if not ok:
+            print(f"[Cache] Invalidating {code_type} fix that did not work")
+            self.cache.delete(out["key"])
+            self.cache.delete(f"out:{code_type}:{_code_hash(fixed, code_type)}")
+        elif entry and not entry["verified"]:
+            self.cache.set(out["key"], {"fixed": entry["fixed"], "verified": True})
+        return True
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+fix_cache: FixCache | None = None
+
+
+def get_fix_cache() -> FixCache:
+    global fix_cache
+    if fix_cache is None:
+        fix_cache = FixCache(LRUCache(
+            "fix",
+            max_entries=int(os.getenv("FIX_CACHE_ENTRIES", "2000")),
+            ttl=float(os.getenv("FIX_CACHE_TTL", str(7 * 24 * 3600))),
+            path=os.getenv("FIX_CACHE_DIR") or None,
+        ))
+    return fix_cache
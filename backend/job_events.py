@@ -0,0 +1,41 @@
+import asyncio
+from contextlib import contextmanager
+
+TERMINAL_STATUSES = ("done", "error")
+
+
+class JobEvents:
+    """
+    In-process pub/sub for render job state changes. Each subscriber gets its
+    own queue; publishers never block (a subscriber too slow to drain its
+    queue just misses intermediate states, the terminal one always fits).
+    """
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self.subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def publish(self, job_id: str, job: dict):
+        for queue in self.subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(dict(job))
+
+    @contextmanager
+    def subscribe(self, job_id: str):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self.subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self.subscribers[job_id]
+
+    def stats(self) -> dict:
+        return {"jobs": len(self.subscribers), "subscribers": sum(len(s) for s in self.subscribers.values())}
+
+
+job_events = JobEvents()
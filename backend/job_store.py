@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class JobStore(ABC):
+    """
+    Render job records: { "status": "pending"|"done"|"error", "url": ..., "error": ... }.
+    Records expire `ttl` seconds after their last write.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, job_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def put(self, job_id: str, job: dict):
+        ...
+
+    @abstractmethod
+    def compact(self) -> int:
+        """Drop expired records. Returns how many were removed."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store. Fine for a single uvicorn worker and for tests."""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.jobs: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            if entry is None or entry[1] < time.time():
+                return None
+            return dict(entry[0])
+
+    def put(self, job_id: str, job: dict):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.jobs[job_id] = (dict(job), time.time() + self.ttl)
+            while len(self.jobs) > self.max_entries:
+                self.jobs.popitem(last=False)
+
+    def compact(self) -> int:
+        now = time.time()
+        with self.lock:
+            expired = [k for k, (_, expires_at) in self.jobs.items() if expires_at < now]
+            for k in expired:
+                del self.jobs[k]
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "jobs": len(self.jobs)}
+
+
+class SQLiteJobStore(JobStore):
+    """
+    SQLite in WAL mode: readers never block the writer, and every uvicorn
+    worker on the host sees the same jobs. Expired rows are deleted and the
+    WAL truncated every `compact_interval` seconds.
+    """
+
+    def __init__(self, path: str, ttl: float, compact_interval: float = 300):
+        super().__init__(ttl)
+        self.path = path
+        self.compact_interval = compact_interval
+        self.last_compact = 0.0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+        self.compact()
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM jobs WHERE job_id = ? AND expires_at >= ?",
+                (job_id, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, job_id: str, job: dict):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, data, updated_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, job.get("status", "pending"), json.dumps(job), now, now + self.ttl),
+        )
+
+    def put(self, job_id: str, job: dict):
+        with self.lock:
+            self._write(job_id, job)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if time.time() - self.last_compact >= self.compact_interval:
+            self.compact()
+
+    def compact(self) -> int:
+        with self.lock:
+            self.last_compact = time.time()
+            removed = self.conn.execute("DELETE FROM jobs WHERE expires_at < ?", (self.last_compact,)).rowcount
+            self.conn.execute("PRAGMA incremental_vacuum")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if removed:
+            print(f"[Jobs] Compacted {removed} expired jobs")
+        return removed
+
+    def stats(self) -> dict:
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"backend": "sqlite", "jobs": count}
+
+
+job_store: JobStore | None = None
+
+
+def get_job_store() -> JobStore:
+    global job_store
+    if job_store is None:
+        ttl = float(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+        backend = os.getenv("JOB_STORE", "sqlite")
+        if backend == "memory":
+            job_store = MemoryJobStore(ttl)
+        elif backend == "sqlite":
+            path = os.getenv("JOB_STORE_PATH", os.path.join(os.path.dirname(__file__), ".cache", "jobs.db"))
+            job_store = SQLiteJobStore(path, ttl)
+        else:
+            raise ValueError(f"Unknown JOB_STORE backend: {backend}")
+    return job_store
@@ -0,0 +1,97 @@
+import json
+
+
+class JsonFieldParser:
+    """
+    Incremental parser for a JSON object that arrives in chunks (an LLM
+    stream). feed() returns (key, value) for every top-level field whose value
+    has fully arrived, so callers can act on early fields long before the
+    closing brace. Text before the opening brace (e.g. a ```json fence) is
+    skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.state = "seek"     # seek, key_or_end, key, colon, value_start, value, done
+        self.key = None
+        self.start = 0          # start of the current key or value in self.text
+        self.depth = 0          # nesting depth inside the current value
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        self.text += chunk
+        fields = []
+        text = self.text
+        while self.pos < len(text) and self.state != "done":
+            c = text[self.pos]
+            state = self.state
+
+            if state == "seek":
+                if c == "{":
+                    self.state = "key_or_end"
+            elif state == "key_or_end":
+                if c == '"':
+                    self.start = self.pos
+                    self.state = "key"
+                elif c == "}":
+                    self.state = "done"
+            elif state == "key":
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.key = json.loads(text[self.start:self.pos + 1])
+                    self.state = "colon"
+            elif state == "colon":
+                if c == ":":
+                    self.state = "value_start"
+            elif state == "value_start":
+                if not c.isspace():
+                    self.start = self.pos
+                    self.depth = 0
+                    self.state = "value"
+                    continue  # re-examine this char as part of the value
+            elif state == "value":
+                if self.in_string:
+                    if self.escape:
+                        self.escape = False
+                    elif c == "\\":
+                        self.escape = True
+                    elif c == '"':
+                        self.in_string = False
+                        if self.depth == 0:
+                            fields.append(self._emit(self.pos + 1, "key_or_end"))
+                elif c == '"':
+                    self.in_string = True
+                elif c in "[{":
+                    self.depth += 1
+                elif c in "]}":
+                    if self.depth == 0:
+                        # Closing brace of the object ends a bare scalar.
+                        fields.append(self._emit(self.pos, "done"))
+                    else:
+                        self.depth -= 1
+                        if self.depth == 0:
+                            fields.append(self._emit(self.pos + 1, "key_or_end"))
+                elif c == "," and self.depth == 0:
+                    fields.append(self._emit(self.pos, "key_or_end"))
+
+            self.pos += 1
+
+        # Drop everything already consumed, keeping the current token.
+        if self.state in ("key", "value"):
+            keep = self.start
+        else:
+            keep = self.pos
+        self.text = self.text[keep:]
+        self.pos -= keep
+        self.start -= keep
+        return fields
+
+    def _emit(self, end: int, next_state: str) -> tuple[str, object]:
+        value = json.loads(self.text[self.start:end])
+        self.state = next_state
+        return self.key, value
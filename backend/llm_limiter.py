@@ -0,0 +1,182 @@
+import asyncio
+import os
+import random
+import re
+import statistics
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP", "30"))
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        # A single request bigger than the whole bucket waits for a full one.
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+def is_rate_limited(e: Exception) -> bool:
+    response = getattr(e, "response", None)
+    code = getattr(e, "code", None) or getattr(e, "status_code", None) or getattr(response, "status_code", None)
+    if code in (429, 503):
+        return True
+    status = str(getattr(e, "status", "") or "")
+    if status in ("RESOURCE_EXHAUSTED", "UNAVAILABLE"):
+        return True
+    error_msg = str(e).lower()
+    return "429" in error_msg or "quota" in error_msg or "rate limit" in error_msg or "resource_exhausted" in error_msg
+
+
+def retry_after(e: Exception) -> float | None:
+    """Server-suggested delay in seconds: Retry-After header, RetryInfo detail or message text."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value and value.replace(".", "", 1).isdigit():
+            return float(value)
+    text = f"{getattr(e, 'details', '')} {e}"
+    m = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?([\d.]+)s", text) or re.search(r"retry in ([\d.]+)\s*s", text, re.I)
+    return float(m.group(1)) if m else None
+
+
+class LLMLimiter:
+    """
+    Shared admission control for LLM calls: at most `max_in_flight`
+    generations at once, plus requests-per-minute and tokens-per-minute
+    buckets. Callers queue here instead of stampeding the API into 429s, and
+    a 429 pauses everyone for the server's retry-after.
+    """
+
+    def __init__(self, max_in_flight: int, rpm: float, tpm: float):
+        self.max_in_flight = max_in_flight
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.lock = asyncio.Lock()  # keeps bucket admission FIFO
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.queued = 0
+        self.calls = 0
+        self.rate_limited = 0
+        self.waits = deque(maxlen=500)
+        self.first_tokens = deque(maxlen=500)  # seconds from admission to the first output chunk
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            await self.semaphore.acquire()
+            try:
+                async with self.lock:
+                    while True:
+                        wait = max(
+                            self.paused_until - time.monotonic(),
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(estimated_tokens),
+                        )
+                        if wait <= 0:
+                            break
+                        await asyncio.sleep(wait)
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+            except BaseException:
+                self.semaphore.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        self.waits.append(time.monotonic() - started)
+        self.calls += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def record_tokens(self, estimated: int, actual: int | None, cached: int | None = None):
+        """Correct the token bucket once the real usage is known."""
+        if actual:
+            self.tokens.take(actual - estimated)
+        self.prompt_tokens += actual or estimated
+        self.cached_tokens += cached or 0
+
+    def record_first_token(self, seconds: float):
+        self.first_tokens.append(seconds)
+
+    def backoff(self, e: Exception, attempt: int) -> float:
+        """Delay before retrying after a rate limit; also pauses other callers."""
+        self.rate_limited += 1
+        hint = retry_after(e)
+        # Full jitter so a burst of failures doesn't retry in lockstep.
+        delay = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt))
+        if hint is not None:
+            delay = max(delay, hint)
+            self.paused_until = max(self.paused_until, time.monotonic() + hint)
+        return delay
+
+    def stats(self) -> dict:
+        waits = sorted(self.waits)
+        firsts = sorted(self.first_tokens)
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "queue_wait_avg_s": round(statistics.mean(waits), 3) if waits else 0.0,
+            "queue_wait_p95_s": round(waits[int(len(waits) * 0.95) - 1], 3) if waits else 0.0,
+            "queue_wait_max_s": round(waits[-1], 3) if waits else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "first_token_avg_s": round(statistics.mean(firsts), 3) if firsts else 0.0,
+            "first_token_p95_s": round(firsts[int(len(firsts) * 0.95) - 1], 3) if firsts else 0.0,
+        }
+
+
+llm_limiter: LLMLimiter | None = None
+
+
+def get_llm_limiter() -> LLMLimiter:
+    global llm_limiter
+    if llm_limiter is None:
+        llm_limiter = LLMLimiter(
+            max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "4")),
+            rpm=float(os.getenv("LLM_RPM", "60")),
+            tpm=float(os.getenv("LLM_TPM", "1000000")),
+        )
+    return llm_limiter
+
+
+def estimate_tokens(*texts: str) -> int:
+    # ~4 characters per token for English prose and code.
+    return sum(len(t) for t in texts) // 4 + 1
@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, NamedTuple
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "180"))
+# "auto" sends fix prompts and simple problems to the fast model; anything else always uses the strong one
+LLM_ROUTING = os.getenv("LLM_ROUTING", "auto")
+
+
+class LLMResult(NamedTuple):
+    text: str
+    prompt_tokens: int | None = None
+    cached_tokens: int | None = None  # part of prompt_tokens served from a prompt cache
+
+
+class LLMProvider(ABC):
+    """
+    One chat backend. `models` maps a tier ("fast" / "strong") to the model
+    name used for it; the rest of the app only ever asks for a tier.
+    """
+
+    name = "base"
+
+    def __init__(self, fast_model: str, strong_model: str):
+        self.models = {"fast": fast_model, "strong": strong_model}
+
+    @abstractmethod
+    async def generate(self, prompt: str, system: str, tier: str, json_mode: bool, max_tokens: int) -> LLMResult:
+        ...
+
+    @abstractmethod
+    def stream(self, prompt: str, system: str, tier: str, json_mode: bool, max_tokens: int) -> AsyncIterator[LLMResult]:
+        """Yields text chunks; the last chunk may carry the prompt token count."""
+
+    def configured(self) -> bool:
+        return True
+
+    async def close(self):
+        pass
+
+    def info(self) -> dict:
+        return {"provider": self.name, "models": self.models, "key_set": self.configured()}
+
+
+# ─── Gemini ───────────────────────────────────────────────────────────────────
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, fast_model: str, strong_model: str):
+        super().__init__(fast_model, strong_model)
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            from google import genai
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY not set")
+            self.client = genai.Client(api_key=api_key)
+        return self.client
+
+    @staticmethod
+    def config(system: str, json_mode: bool, max_tokens: int) -> dict:
+        return {
+            "system_instruction": system,
+            "temperature": 0.2,
+            "max_output_tokens": max_tokens,
+            "response_mime_type": "application/json" if json_mode else "text/plain",
+        }
+
+    @staticmethod
+    def result(response) -> LLMResult:
+        # Gemini 2.5 caches repeated prompt prefixes implicitly and reports the hits here.
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResult(
+            response.text or "",
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "cached_content_token_count", None),
+        )
+
+    async def generate(self, prompt, system, tier, json_mode, max_tokens):
+        response = await self.get_client().aio.models.generate_content(
+            model=self.models[tier], contents=prompt, config=self.config(system, json_mode, max_tokens),
+        )
+        return self.result(response)
+
+    async def stream(self, prompt, system, tier, json_mode, max_tokens):
+        stream = await self.get_client().aio.models.generate_content_stream(
+            model=self.models[tier], contents=prompt, config=self.config(system, json_mode, max_tokens),
+        )
+        async for chunk in stream:
+            yield self.result(chunk)
+
+    def configured(self) -> bool:
+        return bool(os.getenv("GEMINI_API_KEY"))
+
+
+# ─── OpenAI-compatible (OpenAI, Groq, Ollama's /v1) ──────────────────────────
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, fast_model: str, strong_model: str, base_url: str, api_key: str | None):
+        super().__init__(fast_model, strong_model)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.client: httpx.AsyncClient | None = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self.client = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=LLM_TIMEOUT)
+        return self.client
+
+    def body(self, prompt, system, tier, json_mode, max_tokens) -> dict:
+        body = {
+            "model": self.models[tier],
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.2,
+            "max_tokens": max_tokens,
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        return body
+
+    @staticmethod
+    def usage(data: dict) -> tuple[int | None, int | None]:
+        # OpenAI caches long prompt prefixes on its own; it only reports the hits.
+        usage = data.get("usage") or {}
+        return usage.get("prompt_tokens"), (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+
+    async def generate(self, prompt, system, tier, json_mode, max_tokens):
+        res = await self.get_client().post("/chat/completions", json=self.body(prompt, system, tier, json_mode, max_tokens))
+        res.raise_for_status()
+        data = res.json()
+        return LLMResult(data["choices"][0]["message"]["content"] or "", *self.usage(data))
+
+    async def stream(self, prompt, system, tier, json_mode, max_tokens):
+        body = self.body(prompt, system, tier, json_mode, max_tokens)
+        body["stream"] = True
+        body["stream_options"] = {"include_usage": True}
+        async with self.get_client().stream("POST", "/chat/completions", json=body) as res:
+            if res.is_error:
+                await res.aread()
+                res.raise_for_status()
+            async for line in res.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    return
+                data = json.loads(payload)
+                text = "".join((c.get("delta") or {}).get("content") or "" for c in data.get("choices") or [])
+                yield LLMResult(text, *self.usage(data))
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+    def configured(self) -> bool:
+        # Local Ollama needs no key.
+        return bool(self.api_key) or "localhost" in self.base_url or "127.0.0.1" in self.base_url
+
+
+# ─── Fake (tests and offline development) ────────────────────────────────────
+
+FAKE_P5JS = """let t = 0;
+function setup() { createCanvas(600, 400); }
+function draw() {
+  background(255);
+  fill(0); noStroke();
+  circle(300 + 100 * cos(t), 200 + 100 * sin(t), 20);
+  t += deltaTime / 1000;
+}"""
+
+FAKE_MANIM = """from manim import *
+
+class PhysicsScene(Scene):
+    def construct(self):
+        title = Text("PhysicsAI", font_size=40, color=WHITE)
+        self.play(Write(title), run_time=0.5)
+"""
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic stand-in: JSON prompts get a fixed, valid simulation keyed
+    on the prompt hash, code prompts get a fixed sketch or scene, and fix
+    prompts get the broken code back unchanged.
+    """
+
+    name = "fake"
+
+    def __init__(self):
+        super().__init__("fake-fast", "fake-strong")
+
+    @staticmethod
+    def answer(prompt: str, json_mode: bool) -> str:
+        if not json_mode:
+            m = re.search(r"BROKEN CODE:\n(.*?)\n\nFix the code", prompt, re.S)
+            if m:
+                return m.group(1)
+            return FAKE_MANIM if "PhysicsScene" in prompt else FAKE_P5JS
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return json.dumps({
+            "problem_type": "fake",
+            "parameters": {"seed": {"value": int(digest, 16) % 100, "unit": "", "symbol": "s"}},
+            "equations": [{"label": "Identity", "formula": "x = x"}],
+            "explanation": [{"step": 1, "text": f"Fake answer {digest}"}],
+            "key_results": {"Seed": {"value": int(digest, 16) % 100, "unit": ""}},
+            "p5js_code": FAKE_P5JS,
+            "manim_code": FAKE_MANIM,
+        })
+
+    async def generate(self, prompt, system, tier, json_mode, max_tokens):
+        return LLMResult(self.answer(prompt, json_mode), (len(system) + len(prompt)) // 4)
+
+    async def stream(self, prompt, system, tier, json_mode, max_tokens):
+        text = self.answer(prompt, json_mode)
+        for i in range(0, len(text), 64):
+            yield LLMResult(text[i:i + 64])
+
+
+# ─── Routing ──────────────────────────────────────────────────────────────────
+
+# Standard textbook setups a fast model answers as well as the strong one.
+SIMPLE_PROBLEMS = re.compile(
+    r"projectile|thrown|launched|kicked|river|boat|swim|incline|ramp|slope|atwood|pulley"
+    r"|pendulum|spring|oscillat|circular motion|centripetal|collision|collide|free fall|dropped",
+    re.I,
+)
+
+
+def question_tier(question: str) -> str:
+    """Tier to try first for a question; anything unrecognized goes to the strong model."""
+    if LLM_ROUTING != "auto":
+        return "strong"
+    return "fast" if SIMPLE_PROBLEMS.search(question) else "strong"
+
+
+def fix_tier(attempt: int = 0) -> str:
+    """Fix prompts start on the fast model and escalate if its fix didn't work."""
+    if LLM_ROUTING != "auto":
+        return "strong"
+    return "fast" if attempt == 0 else "strong"
+
+
+llm_provider: LLMProvider | None = None
+
+
+def get_llm_provider() -> LLMProvider:
+    global llm_provider
+    if llm_provider is None:
+        kind = os.getenv("LLM_PROVIDER", "gemini")
+        if kind == "fake":
+            llm_provider = FakeProvider()
+        elif kind in ("openai", "ollama"):
+            strong = os.getenv("LLM_STRONG_MODEL", "qwen2.5-coder:7b")
+            llm_provider = OpenAIProvider(
+                os.getenv("LLM_FAST_MODEL", strong), strong,
+                base_url=os.getenv("OPENAI_BASE_URL", "http://localhost:11434/v1"),
+                api_key=os.getenv("OPENAI_API_KEY") or None,
+            )
+        else:
+            llm_provider = GeminiProvider(
+                os.getenv("LLM_FAST_MODEL", "gemini-2.5-flash"),
+                os.getenv("LLM_STRONG_MODEL", "gemini-2.5-pro"),
+            )
+        print(f"[LLM] Provider {llm_provider.name}: {llm_provider.models}")
+    return llm_provider
@@ -1,16 +1,45 @@
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from google import genai
+from contextlib import asynccontextmanager
 import json, os, uuid, traceback, time, asyncio
+import numpy as np
 from dotenv import load_dotenv
-from prompt import SYSTEM_PROMPT, build_user_prompt, build_p5js_fix_prompt, build_manim_fix_prompt
-from manim_runner import render_manim
+from prompt import (
+    SYSTEM_PROMPT, CODE_SYSTEM_PROMPT, FIX_SYSTEM_PROMPT, build_user_prompt, build_p5js_fix_prompt, build_manim_fix_prompt,
+    build_analysis_prompt, build_p5js_prompt, build_manim_prompt,
+)
+from render_pool import get_render_pool
+from manim_runner import preflight_manim, RENDER_PREVIEW, RENDER_UPGRADE
+from p5_repair import repair_p5js
+from fix_cache import get_fix_cache
+from singleflight import SingleFlight
+from render_cache import get_render_cache
+from response_cache import get_response_cache, response_key
+from job_store import get_job_store
+from json_stream import JsonFieldParser
+from job_events import job_events, TERMINAL_STATUSES
+from llm_limiter import get_llm_limiter, is_rate_limited, estimate_tokens
+from llm_providers import get_llm_provider, question_tier, fix_tier
+from problem_templates import template_simulation, template_stats
+from storage import LocalStorage, get_storage
+from media import media_response
+from workdir import get_scratch
+from solver import SOLVERS, detect_family, solve_grid, resolve_params, verify_key_results, solver_stats
 
 load_dotenv()
 
-app = FastAPI(title="PhysicsAI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Work dirs left behind by a previous run that crashed or was killed
+    await asyncio.to_thread(get_scratch().sweep)
+    yield
+    await get_render_pool().shutdown()
+    await get_llm_provider().close()
+    get_storage().close()
+
+app = FastAPI(title="PhysicsAI API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +49,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -31,21 +60,20 @@ async def global_exception_handler(request, exc):
         content={"detail": str(exc), "type": type(exc).__name__, "trace": tb[-800:]},
     )
 
-# In-memory job store
-jobs: dict = {}
+# Seconds between job store re-checks while streaming job events
+JOB_EVENTS_RECHECK = float(os.getenv("JOB_EVENTS_RECHECK", "5"))
+# Attempts per LLM call when the API rate limits us
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
 
-# Global client
-gemini_client = None
+# "pipeline" generates the analysis, then p5.js and Manim code in parallel;
+# "single" asks for everything in one JSON response
+SIMULATE_MODE = os.getenv("SIMULATE_MODE", "pipeline")
+ANALYSIS_MAX_TOKENS = int(os.getenv("ANALYSIS_MAX_TOKENS", "3000"))
+P5JS_MAX_TOKENS = int(os.getenv("P5JS_MAX_TOKENS", "6000"))
+MANIM_MAX_TOKENS = int(os.getenv("MANIM_MAX_TOKENS", "4000"))
 
-def get_client():
-    global gemini_client
-    if gemini_client is None:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="GEMINI_API_KEY not set")
-        # Initialize the modern Google GenAI Client
-        gemini_client = genai.Client(api_key=api_key)
-    return gemini_client
+# In-flight /api/simulate generations, keyed on the normalized question
+simulate_flight = SingleFlight()
 
 # ─── Models ───────────────────────────────────────────────────────────────────
 
@@ -67,47 +95,92 @@ class PhysicsResponse(BaseModel):
     manim_code: str
     job_id: str
 
+class SolveRequest(BaseModel):
+    problem_type: str
+    # name or symbol -> number, list of numbers (one grid axis) or {"value", "unit"}
+    parameters: dict
+
 class JobStatus(BaseModel):
     status: str
+    stage: str | None = None
+    attempt: int | None = None
     url: str | None = None
     error: str | None = None
+    # "preview" (PNG or low-fps MP4), "standard" and "hd" URLs, as each lands
+    renditions: dict[str, str] = {}
+    upgrading: bool = False
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
-async def call_llm(messages: list, json_mode: bool = True, max_tokens: int = 8000, max_retries: int = 3) -> str:
-    client = get_client()
+def log_usage(tier: str, prompt_tokens: int | None, cached_tokens: int | None, first_token: float):
+    cached = f" ({cached_tokens} cached)" if cached_tokens else ""
+    print(f"[LLM] {tier}: {prompt_tokens if prompt_tokens is not None else '?'} input tokens{cached}, first token after {first_token:.2f}s")
+
+async def call_llm(messages: list, json_mode: bool = True, max_tokens: int = 8000, max_retries: int = LLM_MAX_RETRIES, tier: str = "strong", system: str = SYSTEM_PROMPT) -> str:
+    provider = get_llm_provider()
+    limiter = get_llm_limiter()
     
     # Format prompts: concatenate user messages for simple one-shot
     prompt_text = "\n".join([m["content"] for m in messages if m["role"] == "user"])
-    
-    # Config per latest SDK docs
-    config = {
-        "temperature": 0.2,
-        "max_output_tokens": max_tokens,
-        "response_mime_type": "application/json" if json_mode else "text/plain",
-        "system_instruction": SYSTEM_PROMPT,
-    }
+    estimated = estimate_tokens(system, prompt_text)
 
     # Retry logic
     for attempt in range(max_retries):
         try:
-            # Modern async call via .aio attribute
-            response = await client.aio.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=prompt_text,
-                config=config,
-            )
-            return response.text
+            async with limiter.slot(estimated):
+                started = time.monotonic()
+                result = await provider.generate(prompt_text, system, tier, json_mode, max_tokens)
+                # Non-streaming calls see the whole answer at once.
+                elapsed = time.monotonic() - started
+            limiter.record_tokens(estimated, result.prompt_tokens, result.cached_tokens)
+            limiter.record_first_token(elapsed)
+            log_usage(tier, result.prompt_tokens, result.cached_tokens, elapsed)
+            return result.text
         except Exception as e:
-            error_msg = str(e).lower()
-            if "429" in error_msg or "quota" in error_msg or "rate" in error_msg:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    await asyncio.sleep(wait_time) 
-                    continue
+            if is_rate_limited(e) and attempt < max_retries - 1:
+                # Back off outside the slot so other callers aren't held up.
+                wait_time = limiter.backoff(e, attempt)
+                print(f"[LLM] Rate limited, retrying in {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                continue
             raise
     return ""
 
+async def stream_llm(messages: list, json_mode: bool = True, max_tokens: int = 8000, max_retries: int = LLM_MAX_RETRIES, tier: str = "strong", system: str = SYSTEM_PROMPT):
+    """Like call_llm, but yields text chunks as they are generated."""
+    provider = get_llm_provider()
+    limiter = get_llm_limiter()
+    prompt_text = "\n".join([m["content"] for m in messages if m["role"] == "user"])
+    estimated = estimate_tokens(system, prompt_text)
+
+    for attempt in range(max_retries):
+        started = False
+        try:
+            async with limiter.slot(estimated):
+                requested = time.monotonic()
+                first_token = 0.0
+                prompt_tokens = cached_tokens = None
+                async for chunk in provider.stream(prompt_text, system, tier, json_mode, max_tokens):
+                    prompt_tokens = chunk.prompt_tokens or prompt_tokens
+                    cached_tokens = chunk.cached_tokens or cached_tokens
+                    if chunk.text:
+                        if not started:
+                            first_token = time.monotonic() - requested
+                        started = True
+                        yield chunk.text
+            limiter.record_tokens(estimated, prompt_tokens, cached_tokens)
+            limiter.record_first_token(first_token)
+            log_usage(tier, prompt_tokens, cached_tokens, first_token)
+            return
+        except Exception as e:
+            # Once chunks have gone out a retry would duplicate them.
+            if is_rate_limited(e) and not started and attempt < max_retries - 1:
+                wait_time = limiter.backoff(e, attempt)
+                print(f"[LLM] Rate limited, retrying in {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                continue
+            raise
+
 def extract_json(text: str) -> dict:
     text = text.strip()
     if text.startswith("```"):
@@ -119,87 +192,464 @@ def extract_json(text: str) -> dict:
         raise ValueError("No JSON in response")
     return json.loads(text[start:end])
 
+async def generate_simulation(question: str) -> dict:
+    """LLM analysis + code for a question, served from the response cache when possible."""
+    key = response_key(question)
+    cache = get_response_cache()
+    cached = cache.get(key)
+    if cached:
+        print(f"[Cache] Response hit for: {question[:60]}")
+        return cached
+
+    # Simple problems try the fast model first and escalate if its answer doesn't validate.
+    tiers = ["fast", "strong"] if question_tier(question) == "fast" else ["strong"]
+    for tier in tiers:
+        raw = await call_llm([
+            {"role": "user", "content": build_user_prompt(question)},
+        ], tier=tier)
+        try:
+            data = checked(validate_simulation(extract_json(raw)), question)
+            break
+        except (ValueError, HTTPException) as e:
+            if tier == tiers[-1]:
+                raise
+            print(f"[LLM] {tier} model answer rejected ({getattr(e, 'detail', e)}), escalating")
+
+    cache.set(key, data)
+    return data
+
+def validate_simulation(data: dict) -> dict:
+    required = ["problem_type", "parameters", "equations", "explanation", "key_results", "p5js_code", "manim_code"]
+    missing = [f for f in required if f not in data]
+    if missing:
+        raise HTTPException(status_code=500, detail=f"LLM missing fields: {missing}")
+    return PhysicsResponse(**data, job_id="").model_dump(exclude={"job_id"})
+
+def checked(data: dict, question: str, emit=None) -> dict:
+    """Recompute the LLM's key_results with the solver, re-emitting them if they changed."""
+    key_results, corrections = verify_key_results(data, question)
+    if not corrections or key_results is data["key_results"]:
+        return data
+    if emit:
+        emit("key_results", key_results)
+    return {**data, "key_results": key_results}
+
+ANALYSIS_FIELDS = ["problem_type", "parameters", "equations", "explanation", "key_results"]
+
+def extract_code(text: str, *langs: str) -> str:
+    """Strip a markdown fence (```lang ... ```) from a code-only LLM answer."""
+    for lang in langs:
+        if f"```{lang}" in text:
+            return text.split(f"```{lang}")[1].split("```")[0].strip()
+    if "```" in text:
+        return text.split("```")[1].split("```")[0].strip()
+    return text.strip()
+
+async def pipeline_simulation(question: str, emit=None) -> dict:
+    """
+    Pipeline mode: generate the analysis first, then the p5.js sketch and the
+    Manim script concurrently, each with its own prompt and token budget. The
+    render job starts as soon as the Manim script arrives, and `emit(name,
+    value)` is called for every field as it becomes available.
+    """
+    emit = emit or (lambda name, value: None)
+    tiers = ["fast", "strong"] if question_tier(question) == "fast" else ["strong"]
+    started = time.time()
+
+    analysis = await generate_analysis(question, tiers, emit)
+    print(f"[Pipeline] Analysis ready in {time.time() - started:.1f}s")
+    job_id = None
+
+    async def p5js_branch() -> str:
+        code = await generate_code(build_p5js_prompt(question, analysis), P5JS_MAX_TOKENS, tiers, check_p5js)
+        print(f"[Pipeline] p5.js code ready in {time.time() - started:.1f}s")
+        emit("p5js_code", code)
+        return code
+
+    async def manim_branch() -> str:
+        nonlocal job_id
+        code = await generate_code(build_manim_prompt(question, analysis), MANIM_MAX_TOKENS, tiers, check_manim)
+        print(f"[Pipeline] Manim code ready in {time.time() - started:.1f}s")
+        emit("manim_code", code)
+        job_id = start_manim_job(code, question)
+        return code
+
+    p5js_code, manim_code = await asyncio.gather(p5js_branch(), manim_branch())
+    data = validate_simulation({**analysis, "p5js_code": p5js_code, "manim_code": manim_code})
+    get_response_cache().set(response_key(question), data)
+    return {**data, "job_id": job_id}
+
+async def generate_analysis(question: str, tiers: list, emit) -> dict:
+    for tier in tiers:
+        parser = JsonFieldParser()
+        analysis = {}
+        async for chunk in stream_llm([
+            {"role": "user", "content": build_analysis_prompt(question)},
+        ], max_tokens=ANALYSIS_MAX_TOKENS, tier=tier):
+            for name, value in parser.feed(chunk):
+                if name in ANALYSIS_FIELDS:
+                    analysis[name] = value
+                    emit(name, value)
+        missing = [f for f in ANALYSIS_FIELDS if f not in analysis]
+        if not missing:
+            return checked(analysis, question, emit)
+        if tier == tiers[-1]:
+            raise HTTPException(status_code=500, detail=f"LLM missing fields: {missing}")
+        print(f"[LLM] {tier} model analysis missing {missing}, escalating")
+
+async def generate_code(prompt: str, max_tokens: int, tiers: list, check) -> str:
+    """One code artifact; `check` raises ValueError/RuntimeError if the code is unusable."""
+    for tier in tiers:
+        raw = await call_llm([{"role": "user", "content": prompt}], json_mode=False, max_tokens=max_tokens, tier=tier,
+                             system=CODE_SYSTEM_PROMPT)
+        code = extract_code(raw, "javascript", "js", "python")
+        try:
+            check(code)
+            return code
+        except (ValueError, RuntimeError) as e:
+            if tier == tiers[-1]:
+                # Let the normal fix paths (render retries, /api/fix-p5js) deal with it.
+                return code
+            print(f"[LLM] {tier} model code rejected ({e}), escalating")
+
+def check_p5js(code: str):
+    if "setup" not in code or "draw" not in code:
+        raise ValueError("p5.js sketch has no setup()/draw()")
+
+def check_manim(code: str):
+    preflight_manim(code)
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def simulation_events(question: str):
+    """
+    SSE stream for /api/simulate/stream: one `field` event per top-level JSON
+    field as soon as it has been generated, then `done` with the job id.
+    """
+    try:
+        fields = asyncio.Queue()
+        task, shared = simulate_flight.start(
+            response_key(question), lambda: stream_simulation(question, fields)
+        )
+        if shared:
+            # Someone else is already generating this question: wait for
+            # their result and replay it.
+            print(f"[Simulate] Coalesced stream for: {question[:60]}")
+            result = await asyncio.shield(task)
+            for name, value in result.items():
+                if name != "job_id":
+                    yield sse("field", {"name": name, "value": value})
+        else:
+            while (field := await fields.get()) is not None:
+                yield sse("field", {"name": field[0], "value": field[1]})
+            result = await asyncio.shield(task)
+        yield sse("done", {"job_id": result["job_id"]})
+    except HTTPException as e:
+        yield sse("error", {"detail": e.detail})
+    except Exception as e:
+        traceback.print_exc()
+        yield sse("error", {"detail": str(e)})
+
+async def stream_simulation(question: str, fields: asyncio.Queue) -> dict:
+    """Generate a simulation, putting (name, value) on `fields` as each field completes."""
+    try:
+        key = response_key(question)
+        cache = get_response_cache()
+        data = templated(question)
+        if data is None:
+            data = cache.get(key)
+            if data:
+                print(f"[Cache] Response hit for: {question[:60]}")
+        if data:
+            for name, value in data.items():
+                fields.put_nowait((name, value))
+        elif SIMULATE_MODE == "pipeline":
+            return await pipeline_simulation(question, lambda name, value: fields.put_nowait((name, value)))
+        else:
+            tiers = ["fast", "strong"] if question_tier(question) == "fast" else ["strong"]
+            for tier in tiers:
+                parser = JsonFieldParser()
+                data = {}
+                async for chunk in stream_llm([
+                    {"role": "user", "content": build_user_prompt(question)},
+                ], tier=tier):
+                    for name, value in parser.feed(chunk):
+                        data[name] = value
+                        fields.put_nowait((name, value))
+                try:
+                    data = checked(validate_simulation(data), question, lambda name, value: fields.put_nowait((name, value)))
+                    break
+                except (ValueError, HTTPException) as e:
+                    if tier == tiers[-1]:
+                        raise
+                    # Fields streamed so far are replaced as the strong model resends them.
+                    print(f"[LLM] {tier} model answer rejected ({getattr(e, 'detail', e)}), escalating")
+            cache.set(key, data)
+        return start_render(data, question)
+    finally:
+        fields.put_nowait(None)
+
+def templated(question: str) -> dict | None:
+    """Known textbook problems are filled into pre-tested templates without the LLM."""
+    data = template_simulation(question)
+    return validate_simulation(data) if data else None
+
+async def simulate_once(question: str) -> dict:
+    data = templated(question)
+    if data:
+        return start_render(data, question)
+    if SIMULATE_MODE == "pipeline" and get_response_cache().get(response_key(question)) is None:
+        return await pipeline_simulation(question)
+    return start_render(await generate_simulation(question), question)
+
+def start_render(data: dict, question: str) -> dict:
+    """Create the render job for a simulation; returns the payload with its job_id."""
+    return {**data, "job_id": start_manim_job(data["manim_code"], question)}
+
+def start_manim_job(manim_code: str, question: str) -> str:
+    job_id = str(uuid.uuid4())
+    set_job(job_id, {"status": "pending", "stage": "queued"})
+    start_background(run_manim_job(job_id, manim_code, question))
+    return job_id
+
+# Strong refs to fire-and-forget tasks so they aren't garbage collected mid-run.
+background_jobs: set = set()
+
+def start_background(coro):
+    task = asyncio.create_task(coro)
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+    return task
+
+def set_job(job_id: str, job: dict):
+    """Persist a job state and push it to anyone watching the job."""
+    get_job_store().put(job_id, job)
+    job_events.publish(job_id, job)
+
 async def run_manim_job(job_id: str, manim_code: str, question: str):
-    jobs[job_id] = {"status": "pending"}
+    set_job(job_id, {"status": "pending", "stage": "queued"})
     code = manim_code
+    fix_cache = get_fix_cache()
+    pool = get_render_pool()
+    last_fix = None  # code produced by the previous fix, to report whether it worked
+    renditions = {}
+
+    def stage(name: str, attempt: int, **extra):
+        set_job(job_id, {"status": "pending", "stage": name, "attempt": attempt + 1, "renditions": dict(renditions), **extra})
 
     for attempt in range(3):
         try:
-            url = render_manim(code, job_id)
-            jobs[job_id] = {"status": "done", "url": url}
+            code, fixes = preflight_manim(code)
+            if fixes:
+                print(f"[Manim] Pre-flight fixes for job {job_id}: {', '.join(fixes)}")
+            # A preview lands within seconds and also catches a broken scene
+            # before the full render is paid for.
+            if RENDER_PREVIEW != "off" and not pool.cached(code):
+                stage("previewing", attempt)
+                renditions["preview"] = await pool.render(code, job_id, rendition="preview", use_cache=attempt < 2)
+            # The last attempt skips the shared manim cache, so a bad cache
+            # entry can't be what fails the job.
+            url = await pool.render(
+                code, job_id,
+                on_stage=lambda name: stage(name, attempt),
+                use_cache=attempt < 2,
+            )
+            if last_fix:
+                fix_cache.report(last_fix, "manim", ok=True)
+            renditions["standard"] = url
+            set_job(job_id, {"status": "done", "stage": "done", "url": url, "renditions": dict(renditions), "upgrading": bool(RENDER_UPGRADE)})
+            if RENDER_UPGRADE:
+                start_background(upgrade_render(job_id, code, renditions))
             return
         except RuntimeError as e:
             error_msg = str(e)
+            if last_fix:
+                fix_cache.report(last_fix, "manim", ok=False)
+                last_fix = None
             if attempt < 2:
+                # Keeps the preview already rendered on screen while the scene is fixed.
+                stage("fixing", attempt)
+                cached = fix_cache.get(code, error_msg, "manim")
+                if cached:
+                    print(f"[Cache] Manim fix hit for job {job_id}")
+                    code = last_fix = cached
+                    continue
                 try:
                     fix_prompt = build_manim_fix_prompt(code, error_msg)
                     fixed = await call_llm(
                         [{"role": "user", "content": fix_prompt}], 
                         json_mode=False, 
-                        max_tokens=4000
+                        max_tokens=4000,
+                        tier=fix_tier(attempt),
+                        system=FIX_SYSTEM_PROMPT,
                     )
-                    if "```python" in fixed:
-                        fixed = fixed.split("```python")[1].split("```")[0]
-                    elif "```" in fixed:
-                        fixed = fixed.split("```")[1].split("```")[0]
-                    code = fixed.strip()
-                except:
-                    pass
+                    fixed = extract_code(fixed, "python")
+                    fix_cache.put(code, error_msg, "manim", fixed)
+                    code = last_fix = fixed
+                except Exception as e:
+                    # The next attempt re-renders the unfixed code, which can still pass (a timeout, a flaky cache).
+                    print(f"[Manim] Fix for job {job_id} failed: {type(e).__name__}: {e}")
+                    stage("fixing", attempt, error=f"Could not fix the scene: {e}"[:500])
             else:
-                jobs[job_id] = {"status": "error", "error": error_msg[:500]}
+                set_job(job_id, {"status": "error", "stage": "error", "error": error_msg[:500]})
+
+async def upgrade_render(job_id: str, code: str, renditions: dict):
+    """High-quality rendition, rendered after the job is already done."""
+    try:
+        renditions["hd"] = await get_render_pool().render(code, job_id, rendition="hd")
+    except RuntimeError as e:
+        print(f"[Manim] HD render failed for job {job_id}: {e}")
+    job = get_job_store().get(job_id) or {"status": "done", "stage": "done", "url": renditions.get("standard")}
+    set_job(job_id, {**job, "renditions": dict(renditions), "upgrading": False})
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
 
 @app.post("/api/simulate", response_model=PhysicsResponse)
-async def simulate(req: PhysicsRequest, background_tasks: BackgroundTasks):
+async def simulate(req: PhysicsRequest):
     if not req.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
-    raw = await call_llm([
-        {"role": "user", "content": build_user_prompt(req.question)},
-    ])
+    # Identical questions arriving together (a whole class asking at once)
+    # share one LLM call and one render job.
+    result, shared = await simulate_flight.do(
+        response_key(req.question), lambda: simulate_once(req.question)
+    )
+    if shared:
+        print(f"[Simulate] Coalesced request for: {req.question[:60]}")
+    return PhysicsResponse(**result)
 
-    data = extract_json(raw)
-    
-    # Validation
-    required = ["problem_type", "parameters", "equations", "explanation", "key_results", "p5js_code", "manim_code"]
-    missing = [f for f in required if f not in data]
-    if missing:
-         raise HTTPException(status_code=500, detail=f"LLM missing fields: {missing}")
+@app.post("/api/simulate/stream")
+async def simulate_stream(req: PhysicsRequest):
+    if not req.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    return StreamingResponse(
+        simulation_events(req.question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "pending"}
-    background_tasks.add_task(run_manim_job, job_id, data["manim_code"], req.question)
+@app.post("/api/solve")
+async def solve_problem(req: SolveRequest):
+    """
+    Closed-form key results for slider changes, without another generation.
+    List-valued parameters are evaluated over their outer product.
+    """
+    family = req.problem_type if req.problem_type in SOLVERS else detect_family(req.problem_type)
+    if family is None:
+        raise HTTPException(status_code=400, detail=f"No solver for problem type '{req.problem_type}'")
+    params = resolve_params(family, req.parameters)
+    if params is None:
+        raise HTTPException(status_code=400, detail=f"Missing parameters for {family}: needs {list(SOLVERS[family].defaults)}")
+    units = SOLVERS[family].units
+
+    def evaluate() -> dict:
+        return {
+            name: {"value": np.where(np.isfinite(value), value, None).tolist(), "unit": units[name]}
+            for name, value in solve_grid(family, params).items()
+        }
 
-    return PhysicsResponse(**data, job_id=job_id)
+    # A big grid takes a while; keep it off the event loop.
+    try:
+        results = await asyncio.to_thread(evaluate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"family": family, "parameters": params, "results": results}
 
 @app.get("/api/video/{job_id}", response_model=JobStatus)
 async def get_video(job_id: str):
-    if job_id not in jobs:
+    job = get_job_store().get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    job = jobs[job_id]
     return JobStatus(**job)
 
+@app.get("/api/video/{job_id}/events")
+async def video_events(job_id: str):
+    """SSE stream of job state transitions; ends after "done" or "error"."""
+    if get_job_store().get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_status_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def job_status_events(job_id: str):
+    # Subscribe before reading the current state so no transition is missed.
+    with job_events.subscribe(job_id) as queue:
+        job = get_job_store().get(job_id)
+        if job is None:
+            return
+        yield sse("status", JobStatus(**job).model_dump())
+        # Done jobs keep streaming until their background upgrade lands.
+        while job["status"] not in TERMINAL_STATUSES or job.get("upgrading"):
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout=JOB_EVENTS_RECHECK)
+            except asyncio.TimeoutError:
+                # The job may be rendering in another uvicorn worker whose
+                # events we never see; fall back to the shared store.
+                latest = get_job_store().get(job_id)
+                if latest is None:
+                    return
+                if latest == job:
+                    yield ": keepalive\n\n"
+                    continue
+                job = latest
+            yield sse("status", JobStatus(**job).model_dump())
+
 @app.post("/api/fix-p5js")
 async def fix_p5js(req: FixRequest):
+    fix_cache = get_fix_cache()
+    # The sketch failing here may itself be the output of a cached fix; if so,
+    # the fast model already had its go and the strong model gets this one.
+    failed_fix = fix_cache.report(req.code, "p5js", ok=False)
+    cached = fix_cache.get(req.code, req.error, "p5js")
+    if cached:
+        print("[Cache] p5.js fix hit")
+        return {"p5js_code": cached, "source": "cache"}
+
+    # Known error classes are fixed mechanically; the LLM only sees the rest.
+    repaired = repair_p5js(req.code, req.error)
+    if repaired:
+        code, fixes = repaired
+        print(f"[p5] Local repair: {', '.join(fixes)}")
+        return {"p5js_code": code, "source": "local"}
+
     fix_prompt = build_p5js_fix_prompt(req.code, req.error)
     fixed = await call_llm(
         [{"role": "user", "content": fix_prompt}], 
-        json_mode=False
+        json_mode=False,
+        tier=fix_tier(1 if failed_fix else 0),
+        system=FIX_SYSTEM_PROMPT,
     )
-    if "```javascript" in fixed:
-        fixed = fixed.split("```javascript")[1].split("```")[0]
-    elif "```js" in fixed:
-        fixed = fixed.split("```js")[1].split("```")[0]
-    elif "```" in fixed:
-        fixed = fixed.split("```")[1].split("```")[0]
-    return {"p5js_code": fixed.strip()}
+    fixed = extract_code(fixed, "javascript", "js")
+    fix_cache.put(req.code, req.error, "p5js", fixed)
+    return {"p5js_code": fixed, "source": "llm"}
+
+@app.api_route("/media/{filename}", methods=["GET", "HEAD"])
+async def media(filename: str, request: Request):
+    """Videos and preview frames stored by the local storage backend, seekable via Range."""
+    storage = get_storage()
+    path = storage.path(filename) if isinstance(storage, LocalStorage) else None
+    if not path:
+        raise HTTPException(status_code=404, detail="Not found")
+    return media_response(request, path)
 
 @app.get("/health")
 async def health():
     return {
         "status": "ok",
-        "model": "gemini-2.5-pro",
-        "api": "GOOGLE_GENAI_SDK",
-        "key_set": bool(os.getenv("GEMINI_API_KEY")),
+        **get_llm_provider().info(),
+        "render": get_render_pool().stats(),
+        "render_cache": get_render_cache().stats(),
+        "storage": get_storage().stats(),
+        "scratch": get_scratch().stats(),
+        "response_cache": get_response_cache().stats(),
+        "fix_cache": get_fix_cache().stats(),
+        "templates": template_stats(),
+        "solver": solver_stats(),
+        "simulate_flight": simulate_flight.stats(),
+        "llm": get_llm_limiter().stats(),
+        "jobs": get_job_store().stats(),
+        "job_events": job_events.stats(),
     }
@@ -0,0 +1,153 @@
+import fcntl
+import os
+import shutil
+import time
+import uuid
+from dotenv import load_dotenv
+
+from workdir import scratch_base
+
+load_dotenv()
+
+# Shared across jobs and worker processes: Pango text SVGs, LaTeX output and
+# partial movies (one mp4 per play() call, named by manim from a hash of the
+# scene state and animation).
+MANIM_CACHE = os.getenv("MANIM_CACHE", "1") == "1"
+# Defaults to the render scratch filesystem (RAM-backed when that is
+# /dev/shm) so files are hard linked rather than copied.
+MANIM_CACHE_DIR = os.getenv("MANIM_CACHE_DIR") or os.path.join(scratch_base(), "physicsai_manim_cache")
+MANIM_CACHE_MAX_MB = float(os.getenv("MANIM_CACHE_MAX_MB", "2048"))
+# Eviction scans the whole cache, so each process does it at most this often.
+MANIM_CACHE_EVICT_INTERVAL = float(os.getenv("MANIM_CACHE_EVICT_INTERVAL", "60"))
+
+KINDS = ("texts", "tex", "partial")
+
+
+class ManimCache:
+    """
+    Jobs never render into the shared directory directly: `checkout` hard
+    links the cached files into the job's own directory, manim reads and adds
+    files there, and `publish` links the new ones back. A link either appears
+    complete or not at all, so no worker ever reads a half-written SVG or
+    partial movie. Across filesystems it falls back to copy + atomic rename.
+    """
+
+    def __init__(self, root: str, max_bytes: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.evicted_at = 0.0
+
+    def shared_dir(self, kind: str, variant: str) -> str:
+        # Partial movies depend on resolution and frame rate; text and tex don't.
+        return os.path.join(self.root, kind, variant) if kind == "partial" else os.path.join(self.root, kind)
+
+    def checkout(self, work_dir: str, variant: str) -> dict[str, str]:
+        """Populate a job's private cache dirs; returns {kind: dir}."""
+        dirs = {}
+        linked = 0
+        for kind in KINDS:
+            shared = self.shared_dir(kind, variant)
+            private = os.path.join(work_dir, "cache", kind)
+            os.makedirs(shared, exist_ok=True)
+            os.makedirs(private, exist_ok=True)
+            for name in os.listdir(shared):
+                if name.startswith("."):
+                    continue
+                if _link(os.path.join(shared, name), os.path.join(private, name)):
+                    linked += 1
+            dirs[kind] = private
+        print(f"[Cache] manim: {linked} cached files linked into {work_dir}")
+        return dirs
+
+    def publish(self, dirs: dict[str, str], variant: str):
+        """Share the files this job rendered that the cache didn't have yet."""
+        added = 0
+        for kind, private in dirs.items():
+            shared = self.shared_dir(kind, variant)
+            for root, _, files in os.walk(private):
+                for name in files:
+                    if name.startswith(".") or name.endswith(".txt"):
+                        continue  # manim's own file lists for concatenation
+                    if _link(os.path.join(root, name), os.path.join(shared, name)):
+                        added += 1
+        if added:
+            print(f"[Cache] manim: published {added} new files")
+        if time.monotonic() - self.evicted_at > MANIM_CACHE_EVICT_INTERVAL:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used files until the cache is back under 80% of its limit."""
+        self.evicted_at = time.monotonic()
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another worker is already evicting
+            entries, total = self.scan()
+            if total <= self.max_bytes:
+                return 0
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= 0.8 * self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)  # jobs holding a link keep their copy
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            print(f"[Cache] manim: evicted {removed} files, {total / 2**20:.0f} MB left")
+            return removed
+
+    def scan(self) -> tuple[list[tuple[float, int, str]], int]:
+        entries = []
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # atime is refreshed when a job reads the file (relatime: at least daily)
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+        return entries, sum(e[1] for e in entries)
+
+    def stats(self) -> dict:
+        entries, total = self.scan()
+        return {"enabled": MANIM_CACHE, "files": len(entries), "bytes": total, "max_bytes": int(self.max_bytes)}
+
+
+def _link(src: str, dst: str) -> bool:
+    """Make dst the same file as src unless it already exists; True if it was added."""
+    if os.path.exists(dst):
+        return False
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        return False
+    except FileNotFoundError:
+        return False  # evicted meanwhile
+    except OSError:
+        # Different filesystem (or no hard links): copy next to dst, then rename into place.
+        tmp = os.path.join(os.path.dirname(dst), f".{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return False
+    return True
+
+
+manim_cache: ManimCache | None = None
+
+
+def get_manim_cache() -> ManimCache:
+    global manim_cache
+    if manim_cache is None:
+        manim_cache = ManimCache(MANIM_CACHE_DIR, MANIM_CACHE_MAX_MB * 2**20)
+    return manim_cache
@@ -1,32 +1,67 @@
 
 import subprocess
 import os
-import tempfile
+import sys
+import re
+import ast
+import shutil
+import time
 import uuid
-import cloudinary
-import cloudinary.uploader
+from typing import NamedTuple
 from dotenv import load_dotenv
 
+from manim_cache import MANIM_CACHE, get_manim_cache
+from workdir import get_scratch
+from sandbox import RENDER_TIMEOUT, BudgetExceeded, budget_for, exceeded, run_limited
+
 load_dotenv()
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-)
+# Render flags. These are part of the render cache key, so changing them
+# never serves a video rendered with different settings.
+RENDER_QUALITY = "l"        # low quality (480p) — faster render
+RENDER_FPS = 15
+# Shown while the video renders: "frame" (last frame only, manim -s), "lowfps" or "off"
+RENDER_PREVIEW = os.getenv("RENDER_PREVIEW", "frame")
+# "m" (720p) or "h" (1080p) also renders a high-quality video in the background
+RENDER_UPGRADE = os.getenv("RENDER_UPGRADE", "")
 
 
-def render_manim(code: str, job_id: str) -> str:
-    """
-    Renders a Manim script to video, uploads to Cloudinary.
-    Returns the public video URL.
-    Raises RuntimeError on failure.
-    """
-    print(f"[Manim] Starting render for job {job_id}")
-    work_dir = tempfile.mkdtemp(prefix=f"manim_{job_id}_")
+class Rendition(NamedTuple):
+    quality: str
+    fps: int
+    still: bool = False     # render only the last frame, to a PNG
+
+
+# A job renders "preview" and "standard" on the critical path, "hd" after it's done.
+# Long scenes are split by animation number and rendered in parallel: "auto" or "off"
+RENDER_SEGMENTS = os.getenv("RENDER_SEGMENTS", "auto")
+# Fewest play()/wait() calls worth a segment of their own (each pays a manim start-up).
+RENDER_SEGMENT_MIN_ANIMATIONS = int(os.getenv("RENDER_SEGMENT_MIN_ANIMATIONS", "6"))
+
+RENDITIONS = {
+    "preview": Rendition("l", 5) if RENDER_PREVIEW == "lowfps" else Rendition("l", RENDER_FPS, still=True),
+    "standard": Rendition(RENDER_QUALITY, RENDER_FPS),
+    "hd": Rendition(RENDER_UPGRADE or "h", 30),
+}
+
+
+class RenderOutput(NamedTuple):
+    path: str
+    bytes: int
+    seconds: float          # wall-clock time of the manim run
+    partial_movies: int     # play()/wait() calls rendered; 0 for stills
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def prepare_work_dir(code: str, job_id: str) -> tuple[str, str, str]:
+    """Create a job's work directory in the render scratch area and write the scene into it.
+    Returns (work_dir, script_path, media_dir)."""
+    work_dir = get_scratch().create(job_id)
     script_path = os.path.join(work_dir, "scene.py")
     media_dir = os.path.join(work_dir, "media")
-    
+
     print(f"[Manim] Work directory: {work_dir}")
     print(f"[Manim] Script path: {script_path}")
 
@@ -35,73 +70,405 @@ def render_manim(code: str, job_id: str) -> str:
             f.write(code)
         print(f"[Manim] Script written successfully ({len(code)} bytes)")
     except Exception as e:
+        get_scratch().release(work_dir)
         raise RuntimeError(f"Failed to write Manim script: {e}")
+    return work_dir, script_path, media_dir
+
+
+def cache_overrides(work_dir: str, settings: Rendition, use_cache: bool) -> dict | None:
+    """Manim config pointing a job at its checkout of the shared text/tex/partial-movie cache."""
+    if not (use_cache and MANIM_CACHE):
+        return None
+    dirs = get_manim_cache().checkout(work_dir, f"{settings.quality}{settings.fps}")
+    return {
+        "disable_caching": False,
+        "text_dir": dirs["texts"],
+        "tex_dir": dirs["tex"],
+        "partial_movie_dir": dirs["partial"],
+        # manim prunes its partial movie dir past this; the shared cache does its own eviction
+        "max_files_cached": 100000,
+    }
+
+
+def publish_cache(overrides: dict | None, settings: Rendition):
+    if overrides:
+        dirs = {"texts": overrides["text_dir"], "tex": overrides["tex_dir"], "partial": overrides["partial_movie_dir"]}
+        get_manim_cache().publish(dirs, f"{settings.quality}{settings.fps}")
+
+
+def output_config(work_dir: str) -> dict:
+    """
+    Manim config writing a render's files to fixed places in its work dir, so
+    the output is found by name rather than by searching media/.
+    """
+    return {
+        "video_dir": os.path.join(work_dir, "out"),
+        "images_dir": os.path.join(work_dir, "out"),
+        "partial_movie_dir": os.path.join(work_dir, "partial"),
+    }
 
-    cmd = [
-        "manim",
-        "-ql",                      # low quality (480p) — faster render
-        "--media_dir", media_dir,
-        "--disable_caching",
-        script_path,
-        "PhysicsScene",
-    ]
-    
-    print(f"[Manim] Running command: {' '.join(cmd)}")
 
+def output_path(work_dir: str, rendition: str) -> str:
+    """Where a rendition's file lands: out/<rendition>.mp4, or .png for stills."""
+    return os.path.join(work_dir, "out", rendition + (".png" if RENDITIONS[rendition].still else ".mp4"))
+
+
+def collect_output(work_dir: str, rendition: str, partial_dir: str, seconds: float) -> RenderOutput:
+    """
+    Check the rendered file is really there and complete enough to serve: non-
+    empty, with a PNG signature or an MP4 ftyp box up front.
+    Raises RuntimeError otherwise.
+    """
+    path = output_path(work_dir, rendition)
+    still = RENDITIONS[rendition].still
+    kind = "PNG" if still else "MP4"
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
-    except FileNotFoundError:
-        raise RuntimeError("Manim command not found. Is Manim installed? Try: pip install manim")
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Manim rendering timed out after 120 seconds")
-    except Exception as e:
-        raise RuntimeError(f"Manim subprocess error: {e}")
-
-    print(f"[Manim] Return code: {result.returncode}")
-    if result.stdout:
-        print(f"[Manim] STDOUT: {result.stdout[:500]}")
-    if result.stderr:
-        print(f"[Manim] STDERR: {result.stderr[:500]}")
-
-    if result.returncode != 0:
-        error_msg = result.stderr[-2000:] if result.stderr else "Unknown Manim error"
-        raise RuntimeError(f"Manim rendering failed: {error_msg}")
-
-    # Find the rendered MP4
-    print(f"[Manim] Searching for video in {media_dir}")
-    video_path = _find_video(media_dir)
-    if not video_path:
-        raise RuntimeError(f"Manim rendered but no MP4 file found in {media_dir}")
-    
-    print(f"[Manim] Found video: {video_path} ({os.path.getsize(video_path)} bytes)")
-
-    # Upload to Cloudinary
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(12)
+    except OSError:
+        raise RuntimeError(f"Manim rendered but no {kind} file was written to {path}")
+    valid = header.startswith(PNG_SIGNATURE) if still else header[4:8] == b"ftyp"
+    if not size or not valid:
+        raise RuntimeError(f"Manim wrote an invalid {kind} file ({size} bytes) to {path}")
+    # manim lists the partial movies it joins, one "file '...'" line each.
+    partial_movies = 0
+    try:
+        with open(os.path.join(partial_dir, "partial_movie_file_list.txt"), encoding="utf-8") as f:
+            partial_movies = sum(1 for line in f if line.startswith("file "))
+    except OSError:
+        pass
+    print(f"[Manim] Rendered {path} ({size} bytes, {partial_movies} partial movies) in {seconds:.1f}s")
+    return RenderOutput(path, size, seconds, partial_movies)
+
+
+def render_video(code: str, job_id: str, rendition: str = "standard", animations: tuple[int, int] | None = None,
+                 use_cache: bool = True) -> RenderOutput:
+    """
+    Renders a Manim script to video (a PNG for still renditions). With
+    `animations` = (first, last) only that inclusive range of play()/wait()
+    calls is rendered; manim skips through the earlier ones to rebuild the
+    scene state. `use_cache` renders against the shared manim cache. The
+    manim process runs under the rendition's resource budget.
+    Returns the rendered file with its size and timing.
+    Raises RuntimeError on failure, BudgetExceeded if a budget killed it.
+    """
+    print(f"[Manim] Starting {rendition} render for job {job_id}")
+    work_dir, script_path, media_dir = prepare_work_dir(code, job_id)
+    # A failed render leaves nothing behind; a finished one is released after its upload.
+    with get_scratch().discard_on_error(work_dir):
+        settings = RENDITIONS[rendition]
+        cache = cache_overrides(work_dir, settings, use_cache)
+        config = {**output_config(work_dir), **(cache or {"disable_caching": True})}
+        config_path = os.path.join(work_dir, "manim.cfg")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write("[CLI]\n" + "".join(f"{key} = {value}\n" for key, value in config.items()))
+
+        cmd = [
+            "manim",
+            f"-q{settings.quality}",
+            "--fps", str(settings.fps),
+            "--media_dir", media_dir,
+            "--config_file", config_path,
+            "-o", rendition,
+            *(["-s"] if settings.still else []),
+            *(["-n", f"{animations[0]},{animations[1]}"] if animations else []),
+            script_path,
+            "PhysicsScene",
+        ]
+
+        print(f"[Manim] Running command: {' '.join(cmd)}")
+
+        budget = budget_for(rendition)
+        started = time.monotonic()
+        try:
+            result = run_limited(cmd, budget)
+        except FileNotFoundError:
+            raise RuntimeError("Manim command not found. Is Manim installed? Try: pip install manim")
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Manim subprocess error: {e}")
+
+        print(f"[Manim] Return code: {result.returncode}")
+        if result.stdout:
+            print(f"[Manim] STDOUT: {result.stdout[:500]}")
+        if result.stderr:
+            print(f"[Manim] STDERR: {result.stderr[:500]}")
+
+        if result.returncode != 0:
+            over = exceeded(result.returncode, result.stderr or "", budget)
+            if over:
+                raise over
+            error_msg = result.stderr[-2000:] if result.stderr else "Unknown Manim error"
+            raise RuntimeError(f"Manim rendering failed: {error_msg}")
+
+        output = collect_output(work_dir, rendition, config["partial_movie_dir"], time.monotonic() - started)
+        publish_cache(cache, settings)
+        # The upload runs in the main process, which leases the dir from here.
+        get_scratch().unlease(work_dir)
+        return output
+
+
+# Runs the scene with every animation skipped (as `manim -s` does) and
+# prints how many play()/wait() calls construct() made.
+COUNT_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[3])
+from manim_worker import count_in_process
+print("ANIMATIONS", count_in_process(sys.argv[1], sys.argv[2]))
+"""
+
+
+def count_animations(code: str, job_id: str) -> int:
+    """Number of animations in a scene, from a fast skip-everything run."""
+    work_dir, script_path, media_dir = prepare_work_dir(code, f"{job_id}_count")
+    budget = budget_for("count")
     try:
-        print(f"[Manim] Uploading to Cloudinary...")
-        upload_result = cloudinary.uploader.upload(
-            video_path,
-            resource_type="video",
-            public_id=f"physicsai/{job_id}",
-            overwrite=True,
+        result = run_limited(
+            [sys.executable, "-c", COUNT_SCRIPT, script_path, media_dir, os.path.dirname(os.path.abspath(__file__))],
+            budget,
         )
-        url = upload_result["secure_url"]
-        print(f"[Manim] Upload successful: {url}")
-        return url
-    except Exception as e:
-        raise RuntimeError(f"Cloudinary upload failed: {e}")
+    finally:
+        get_scratch().release(work_dir)
+    match = re.search(r"^ANIMATIONS (\d+)$", result.stdout, re.M)
+    over = exceeded(result.returncode, result.stderr, budget) if result.returncode != 0 else None
+    if over:
+        raise over
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"Manim rendering failed: {(result.stderr or 'Unknown Manim error')[-2000:]}")
+    return int(match.group(1))
 
 
-def _find_video(media_dir: str) -> str | None:
-    """Recursively find the first .mp4 in media_dir."""
-    print(f"[Manim] Scanning directory: {media_dir}")
-    for root, dirs, files in os.walk(media_dir):
-        print(f"[Manim] Checking {root}: {len(files)} files")
-        for f in files:
-            if f.endswith(".mp4"):
-                return os.path.join(root, f)
+def segmentable(code: str) -> bool:
+    """
+    Segments rebuild their starting state by skipping the earlier animations,
+    which only works for state that animations set. Updaters driven by `dt`
+    don't advance while skipping, so those scenes render in one piece.
+    """
+    if RENDER_SEGMENTS != "auto" or re.search(r"\bdt\b", code):
+        return False
+    # Not worth a counting pass unless the scene could fill two segments.
+    calls = len(re.findall(r"self\.(?:play|wait)\(", code))
+    return calls >= 2 * RENDER_SEGMENT_MIN_ANIMATIONS or bool(re.search(r"\b(?:for|while)\b", code))
+
+
+def split_animations(count: int, workers: int) -> list[tuple[int, int]]:
+    """Inclusive (first, last) animation ranges, one per parallel segment."""
+    segments = max(1, min(workers, count // RENDER_SEGMENT_MIN_ANIMATIONS))
+    bounds = [round(i * count / segments) for i in range(segments + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(segments)]
+
+
+def concat_videos(paths: list[str], job_id: str) -> str:
+    """
+    Join segment MP4s with ffmpeg's concat demuxer, copying the streams as
+    they are. The segments' work dirs are released once joined.
+    """
+    if len(paths) == 1:
+        return paths[0]
+    scratch = get_scratch()
+    work_dir = scratch.create(f"{job_id}_concat")
+    try:
+        with scratch.discard_on_error(work_dir):
+            list_path = os.path.join(work_dir, "segments.txt")
+            output_path = os.path.join(work_dir, "PhysicsScene.mp4")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for path in paths:
+                    f.write("file '{}'\n".format(path.replace("'", "'\\''")))
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-c", "copy", "-movflags", "+faststart",
+                output_path,
+            ]
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=RENDER_TIMEOUT)
+            except FileNotFoundError:
+                raise RuntimeError("ffmpeg not found; it is needed to join rendered segments")
+            except subprocess.TimeoutExpired:
+                raise RuntimeError(f"Joining segments timed out after {RENDER_TIMEOUT} seconds")
+            if result.returncode != 0 or not os.path.exists(output_path):
+                raise RuntimeError(f"Joining segments failed: {result.stderr[-2000:]}")
+            print(f"[Manim] Joined {len(paths)} segments into {output_path} ({os.path.getsize(output_path)} bytes)")
+    finally:
+        for path in paths:
+            scratch.release(path)
+    return output_path
+
+
+# ─── Pre-flight ───────────────────────────────────────────────────────────────
+
+# Deprecated animation names the LLM keeps producing.
+RENAMED_ANIMATIONS = {"ShowCreation": "Create", "GrowArrow": "Create"}
+
+# LaTeX commands mapped to plain text for MathTex -> Text rewrites.
+LATEX_SYMBOLS = {
+    r"\alpha": "α", r"\beta": "β", r"\gamma": "γ", r"\delta": "δ", r"\Delta": "Δ",
+    r"\theta": "θ", r"\lambda": "λ", r"\mu": "μ", r"\pi": "π", r"\rho": "ρ",
+    r"\sigma": "σ", r"\tau": "τ", r"\phi": "φ", r"\omega": "ω", r"\Omega": "Ω",
+    r"\cdot": "·", r"\times": "×", r"\sqrt": "√", r"\approx": "≈", r"\neq": "≠",
+    r"\leq": "≤", r"\geq": "≥", r"\pm": "±", r"\infty": "∞", r"\circ": "°",
+    r"\rightarrow": "→", r"\to": "→",
+}
+# Mobject calls and keywords that take a point; a 2-element array() there is a missing z.
+POINT_CALLS = {
+    "move_to", "shift", "next_to", "align_to", "put_start_and_end_on", "add_line_to",
+    "Dot", "Dot3D", "Line", "DashedLine", "Arrow", "DoubleArrow", "Vector", "Polygon", "Elbow", "CurvedArrow",
+}
+POINT_KEYWORDS = {"point", "start", "end", "arc_center", "about_point", "direction"}
+# manim's direction constants: always 3D, so a 2D array added to one won't broadcast.
+DIRECTIONS = {"ORIGIN", "UP", "DOWN", "LEFT", "RIGHT", "IN", "OUT", "UL", "UR", "DL", "DR"}
+LATEX_SPACING = [r"\left", r"\right", r"\,", r"\;", r"\!", r"\quad", r"\text", r"\mathrm"]
+
+
+def preflight_manim(code: str) -> tuple[str, list[str]]:
+    """
+    Static checks and deterministic fixes run before a render, so common LLM
+    mistakes never cost a manim run plus an LLM fix round-trip.
+    Returns (code, list of fixes applied).
+    Raises RuntimeError for code that can't render.
+    """
+    fixes = []
+    if "```" in code:
+        code = code.split("```python")[-1] if "```python" in code else code.split("```")[1]
+        code = code.split("```")[0].strip() + "\n"
+        fixes.append("stripped markdown fence")
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        raise RuntimeError(f"Manim script has a syntax error: {e.msg} (line {e.lineno}): {(e.text or '').strip()}")
+
+    source = _Source(code)
+    edits = []
+    latex = shutil.which("latex") is not None
+    points = set()  # 2-element array() calls used as a point
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in RENAMED_ANIMATIONS:
+            edits.append((source.span(node), RENAMED_ANIMATIONS[node.id]))
+            fixes.append(f"{node.id} -> {RENAMED_ANIMATIONS[node.id]}")
+
+        elif isinstance(node, ast.Call) and _call_name(node) in ("MathTex", "Tex") and not latex:
+            strings = [a.value for a in node.args if isinstance(a, ast.Constant) and isinstance(a.value, str)]
+            if node.args and len(strings) == len(node.args) and not any(isinstance(a, ast.Starred) for a in node.args):
+                edits.append((source.span(node.func), "Text"))
+                start, _ = source.span(node.args[0])
+                _, end = source.span(node.args[-1])
+                edits.append(((start, end), repr(_latex_to_text(" ".join(strings)))))
+                for kw in node.keywords:
+                    if kw.arg == "tex_to_color_map":
+                        start, _ = source.span(kw)
+                        edits.append(((start, start + len(kw.arg)), "t2c"))
+                fixes.append(f"{_call_name(node)} -> Text (no LaTeX installed)")
+
+        elif isinstance(node, ast.Call) and _call_name(node) in POINT_CALLS:
+            args = node.args + [kw.value for kw in node.keywords if kw.arg in POINT_KEYWORDS]
+            points.update(a for arg in args for a in _flat_arrays(arg))
+
+        elif isinstance(node, ast.Call) and any(kw.arg in POINT_KEYWORDS for kw in node.keywords):
+            points.update(a for kw in node.keywords if kw.arg in POINT_KEYWORDS for a in _flat_arrays(kw.value))
+
+        elif isinstance(node, ast.BinOp) and any(isinstance(n, ast.Name) and n.id in DIRECTIONS for n in ast.walk(node)):
+            points.update(_flat_arrays(node))
+
+    for array in points:
+        _, end = source.span(array.args[0].elts[-1])
+        edits.append(((end, end), ", 0"))
+        fixes.append("2D coordinate -> 3D")
+
+    scenes = [
+        node for node in tree.body
+        if isinstance(node, ast.ClassDef)
+        and any(_base_name(b).endswith("Scene") for b in node.bases)
+        and any(isinstance(item, ast.FunctionDef) and item.name == "construct" for item in node.body)
+    ]
+    if not scenes:
+        raise RuntimeError("Manim script defines no Scene subclass with a construct() method")
+    if not any(scene.name == "PhysicsScene" for scene in scenes):
+        if len(scenes) > 1:
+            raise RuntimeError(f"Manim script has several scenes ({', '.join(s.name for s in scenes)}) and none is PhysicsScene")
+        scene = scenes[0]
+        start = source.offset(scene.lineno, 0)
+        start = code.index(scene.name, code.index("class", start))
+        edits.append(((start, start + len(scene.name)), "PhysicsScene"))
+        fixes.append(f"renamed {scene.name} -> PhysicsScene")
+
+    imports_manim = any(
+        isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] == "manim"
+        or isinstance(node, ast.Import) and any(a.name.split(".")[0] == "manim" for a in node.names)
+        for node in tree.body
+    )
+
+    for (start, end), text in sorted(edits, key=lambda e: e[0], reverse=True):
+        code = code[:start] + text + code[end:]
+    if not imports_manim:
+        code = "from manim import *\n" + code
+        fixes.append("added manim import")
+
+    if fixes:
+        try:
+            compile(code, "scene.py", "exec")
+        except SyntaxError as e:
+            raise RuntimeError(f"Manim pre-flight rewrite produced invalid code: {e.msg} (line {e.lineno})")
+    return code, fixes
+
+
+class _Source:
+    """Maps ast (line, UTF-8 byte column) positions to string offsets."""
+
+    def __init__(self, code: str):
+        self.lines = code.splitlines(keepends=True)
+        self.starts = [0]
+        for line in self.lines:
+            self.starts.append(self.starts[-1] + len(line))
+
+    def offset(self, lineno: int, col: int) -> int:
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ""
+        return self.starts[lineno - 1] + len(line.encode("utf-8")[:col].decode("utf-8", "ignore"))
+
+    def span(self, node) -> tuple[int, int]:
+        return self.offset(node.lineno, node.col_offset), self.offset(node.end_lineno, node.end_col_offset)
+
+
+def _call_name(node: ast.Call) -> str | None:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
     return None
+
+
+def _flat_arrays(node) -> list[ast.Call]:
+    """2-element array([x, y]) calls that are `node` or combined into it with arithmetic."""
+    if isinstance(node, ast.BinOp):
+        return _flat_arrays(node.left) + _flat_arrays(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return _flat_arrays(node.operand)
+    if isinstance(node, ast.Call) and _call_name(node) == "array" and node.args:
+        elts = node.args[0]
+        if isinstance(elts, (ast.List, ast.Tuple)) and len(elts.elts) == 2 \
+                and not any(isinstance(e, (ast.List, ast.Tuple, ast.Starred)) for e in elts.elts):
+            return [node]
+    return []
+
+
+def _base_name(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _latex_to_text(tex: str) -> str:
+    for command in sorted(LATEX_SYMBOLS, key=len, reverse=True):
+        tex = tex.replace(command, LATEX_SYMBOLS[command])
+    for command in LATEX_SPACING:
+        tex = tex.replace(command, " " if command in (r"\,", r"\;", r"\quad") else "")
+    tex = re.sub(r"\\frac\{([^{}]*)\}\{([^{}]*)\}", r"(\1)/(\2)", tex)
+    tex = tex.replace("^{2}", "²").replace("^2", "²").replace("^{3}", "³").replace("^3", "³")
+    tex = re.sub(r"\\([a-zA-Z]+)", r"\1", tex)
+    tex = tex.replace("{", "").replace("}", "")
+    return " ".join(tex.split())
@@ -0,0 +1,205 @@
+# Warm render worker mode: a pool worker imports manim once, then forks a
+# short-lived child per job that inherits the warm interpreter, renders
+# PhysicsScene in-process and exits. Scene code never runs in the long-lived
+# worker itself, so one job can't leak state or memory into the next.
+import importlib.util
+import os
+import signal
+import time
+import traceback
+
+from manim_runner import (
+    RENDITIONS, RenderOutput,
+    prepare_work_dir, render_video, count_animations, cache_overrides, publish_cache, output_config, collect_output,
+)
+from workdir import get_scratch
+from sandbox import Budget, BudgetExceeded, apply_limits, budget_for, exceeded
+
+QUALITY_NAMES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+manim_loaded = False
+
+
+def preload():
+    """Pool initializer: import the heavy modules once per worker."""
+    global manim_loaded
+    if not hasattr(os, "fork"):
+        print("[Worker] os.fork unavailable, using the manim CLI")
+        return
+    started = time.time()
+    try:
+        import numpy  # noqa: F401
+        import manim  # noqa: F401
+    except Exception as e:
+        print(f"[Worker] Could not preload manim ({e}), using the manim CLI")
+        return
+    manim_loaded = True
+    print(f"[Worker] pid {os.getpid()} preloaded manim in {time.time() - started:.1f}s")
+
+
+def render_video_warm(code: str, job_id: str, rendition: str = "standard", animations: tuple[int, int] | None = None,
+                      use_cache: bool = True) -> RenderOutput:
+    """
+    Same contract as manim_runner.render_video, rendered in a forked child of
+    this pre-warmed worker. Falls back to the CLI if preloading failed.
+    """
+    if not manim_loaded:
+        return render_video(code, job_id, rendition, animations, use_cache)
+
+    print(f"[Worker] Starting warm {rendition} render for job {job_id}")
+    work_dir, script_path, media_dir = prepare_work_dir(code, job_id)
+    with get_scratch().discard_on_error(work_dir):
+        settings = RENDITIONS[rendition]
+        cache = cache_overrides(work_dir, settings, use_cache)
+        config = {**output_config(work_dir), **(cache or {"disable_caching": True})}
+        started = time.monotonic()
+        _run_forked(work_dir, lambda: _render_in_child(script_path, media_dir, rendition, animations, config),
+                    budget_for(rendition))
+
+        output = collect_output(work_dir, rendition, config["partial_movie_dir"], time.monotonic() - started)
+        publish_cache(cache, settings)
+        # The upload runs in the main process, which leases the dir from here.
+        get_scratch().unlease(work_dir)
+        return output
+
+
+def count_animations_warm(code: str, job_id: str) -> int:
+    """Same contract as manim_runner.count_animations, counted in a forked child."""
+    if not manim_loaded:
+        return count_animations(code, job_id)
+    work_dir, script_path, media_dir = prepare_work_dir(code, f"{job_id}_count")
+    count_path = os.path.join(work_dir, "count.txt")
+
+    def count():
+        with open(count_path, "w") as f:
+            f.write(str(count_in_process(script_path, media_dir)))
+
+    try:
+        _run_forked(work_dir, count, budget_for("count"))
+        with open(count_path) as f:
+            return int(f.read())
+    finally:
+        get_scratch().release(work_dir)
+
+
+def _run_forked(work_dir: str, target, budget: Budget):
+    """
+    Run target() in a forked child under the budget's rlimits. Raises
+    BudgetExceeded if it went over one, RuntimeError with its traceback if it
+    failed otherwise.
+    """
+    error_path = os.path.join(work_dir, "error.txt")
+    pid = os.fork()
+    if pid == 0:
+        # Child: never return into the worker's code, always _exit. Own process
+        # group so a timeout kill also takes down manim's ffmpeg.
+        os.setpgid(0, 0)
+        status = 1
+        try:
+            apply_limits(budget)
+            target()
+            status = 0
+        except BaseException:
+            with open(error_path, "w", encoding="utf-8") as f:
+                f.write(traceback.format_exc())
+        finally:
+            os._exit(status)
+
+    status = _wait(pid, budget.wall_s)
+    if status is None:
+        raise BudgetExceeded("wall_s", budget.wall_s)
+    if status != 0:
+        try:
+            with open(error_path, encoding="utf-8") as f:
+                error_msg = f.read()[-2000:]
+        except OSError:
+            error_msg = f"render process exited with status {status}"
+        over = exceeded(status, error_msg, budget)
+        if over:
+            raise over
+        raise RuntimeError(f"Manim rendering failed: {error_msg}")
+
+
+def _render_in_child(script_path: str, media_dir: str, rendition: str, animations: tuple[int, int] | None = None,
+                     config: dict | None = None):
+    from manim import tempconfig
+
+    settings = RENDITIONS[rendition]
+    overrides = {
+        "quality": QUALITY_NAMES[settings.quality],
+        "frame_rate": settings.fps,
+        "media_dir": media_dir,
+        "input_file": script_path,
+        "output_file": rendition,  # what `manim -o` sets
+        "progress_bar": "none",
+    }
+    if settings.still:
+        # What `manim -s` sets: skip writing the movie, save the final frame.
+        overrides.update(save_last_frame=True, write_to_movie=False)
+    if animations:
+        # What `manim -n first,last` sets.
+        overrides.update(from_animation_number=animations[0], upto_animation_number=animations[1])
+    # Output dirs, and either the shared cache dirs or disable_caching.
+    overrides.update(config or {"disable_caching": True})
+    with tempconfig(overrides):
+        _load_scene(script_path)().render()
+
+
+def count_in_process(script_path: str, media_dir: str) -> int:
+    """Run construct() with every animation skipped and count its play()/wait() calls."""
+    from manim import tempconfig
+
+    overrides = {
+        "media_dir": media_dir,
+        "input_file": script_path,
+        "disable_caching": True,
+        "progress_bar": "none",
+        "save_last_frame": True,
+        "write_to_movie": False,
+    }
+    with tempconfig(overrides):
+        scene = _load_scene(script_path)()
+        scene.render()
+        return scene.renderer.num_plays
+
+
+def _load_scene(script_path: str):
+    spec = importlib.util.spec_from_file_location("scene", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    scene_cls = getattr(module, "PhysicsScene", None)
+    if scene_cls is None:
+        raise RuntimeError("Scene code does not define PhysicsScene")
+    return scene_cls
+
+
+def _wait(pid: int, timeout: float) -> int | None:
+    """Wait for a child; returns its exit code, or None after killing it on timeout."""
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        if time.monotonic() >= deadline:
+            os.killpg(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
+
+
+def worker_rss_mb() -> float:
+    """Resident memory of the current process in MB (0 where unsupported)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return 0.0
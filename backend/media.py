@@ -0,0 +1,131 @@
+import asyncio
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from starlette.requests import Request
+from starlette.responses import Response
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Bytes per read when sending a file; bounds memory per download.
+MEDIA_CHUNK_KB = int(os.getenv("MEDIA_CHUNK_KB", "256"))
+# Stored files never change under the same name (a re-render gets a new job id).
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+
+def etag(st: os.stat_result) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    The (start, end) inclusive byte range a `Range: bytes=...` header asks for,
+    or None to send the whole file (bad syntax or several ranges).
+    Raises ValueError if the range lies beyond the end of the file.
+    """
+    match = RANGE_RE.match(header)
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes.
+        if int(last) == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"range starts past the end ({start} >= {size})")
+    return start, end
+
+
+def _matches(header: str, tag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == tag for t in header.split(","))
+
+
+def media_response(request: Request, path: str) -> Response:
+    """
+    Serve a stored file with Range, ETag/If-None-Match and immutable caching,
+    so a <video> element can seek and start playing before it has the whole file.
+    """
+    st = os.stat(path)
+    tag = etag(st)
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": tag,
+        "last-modified": formatdate(st.st_mtime, usegmt=True),
+        "cache-control": MEDIA_CACHE_CONTROL,
+    }
+    if _matches(request.headers.get("if-none-match", ""), tag):
+        return Response(status_code=304, headers=headers)
+
+    size = st.st_size
+    start, end, status = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    # If-Range: only honour the range if the client's copy is still current.
+    if range_header and request.headers.get("if-range", tag) == tag:
+        try:
+            requested = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if requested:
+            (start, end), status = requested, 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end - start + 1, status, headers, send_body=request.method != "HEAD")
+
+
+class FileRangeResponse(Response):
+    """
+    Sends `count` bytes of a file from `offset`, read with os.pread in
+    MEDIA_CHUNK_KB chunks on a thread. Never holds the file in memory.
+    """
+
+    def __init__(self, path: str, offset: int, count: int, status_code: int, headers: dict, send_body: bool = True):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        self.status_code = status_code
+        self.background = None
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.init_headers({**headers, "content-length": str(count), "content-type": content_type})
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        with open(self.path, "rb") as file:
+            await self._send_chunks(file.fileno(), receive, send)
+
+    async def _send_chunks(self, fd: int, receive, send):
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            offset, remaining = self.offset, self.count
+            chunk = MEDIA_CHUNK_KB * 1024
+            while remaining > 0 and not disconnected.is_set():
+                data = await asyncio.to_thread(os.pread, fd, min(chunk, remaining), offset)
+                if not data:
+                    # Truncated underneath us: end the body, the server flags the short response.
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                offset += len(data)
+                remaining -= len(data)
+                await send({"type": "http.response.body", "body": data, "more_body": remaining > 0})
+        finally:
+            watcher.cancel()
@@ -0,0 +1,293 @@
+import re
+from typing import NamedTuple
+
+# Local, deterministic fixes for the p5.js error classes build_p5js_fix_prompt
+# lists. The iframe posts back the browser's error message; we tokenize the
+# sketch, apply the fix that message calls for, and only fall back to the LLM
+# when nothing here applies.
+
+TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>=>|===|!==|==|!=|<=|>=|&&|\|\||\+\+|--|\+=|-=|\*=|/=|\*\*|\.\.\.|[{}()\[\];,.<>+\-*/%=!?:&|^~])
+  | (?P<other>.)
+""", re.S | re.X)
+
+DECLARATION_KEYWORDS = ("let", "const", "var")
+ASSIGNMENT_OPS = ("=", "+=", "-=", "*=", "/=", "++", "--")
+
+# p5 calls these by name on window, so they must be function declarations.
+P5_CALLBACKS = {
+    "preload", "setup", "draw", "windowResized", "mousePressed", "mouseReleased",
+    "mouseClicked", "mouseDragged", "mouseMoved", "mouseWheel", "keyPressed",
+    "keyReleased", "keyTyped", "touchStarted", "touchMoved", "touchEnded",
+}
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+def tokenize(code: str) -> list[Token]:
+    """Significant tokens (no whitespace/comments). Regex literals are not
+    recognised; p5 sketches practically never contain them."""
+    tokens = []
+    for m in TOKEN_RE.finditer(code):
+        if m.lastgroup not in ("ws", "comment"):
+            tokens.append(Token(m.lastgroup, m.group(), m.start(), m.end()))
+    return tokens
+
+
+def repair_p5js(code: str, error: str) -> tuple[str, list[str]] | None:
+    """
+    Try to fix `code` for the browser `error` without an LLM.
+    Returns (fixed code, fixes applied), or None if the error isn't one we
+    can resolve locally.
+    """
+    fixes = []
+    handled = False
+
+    m = re.search(r"Cannot access '([\w$]+)' before initialization", error)
+    if m:
+        code, handled = _hoist(code, m.group(1), fixes)
+
+    m = re.search(r"([\w$]+) is not defined", error)
+    if m and not handled:
+        code, handled = _declare(code, m.group(1), fixes)
+
+    m = re.search(r"Identifier '([\w$]+)' has already been declared", error)
+    if m:
+        code, handled = _drop_redeclaration(code, m.group(1), fixes)
+
+    if "Assignment to constant variable" in error:
+        code, handled = _const_to_let(code, fixes)
+
+    m = re.search(r"Class constructor ([\w$]+) cannot be invoked without 'new'", error)
+    if m:
+        code, handled = _add_new(code, m.group(1), fixes)
+
+    if not handled:
+        return None
+
+    # p5 only finds callbacks declared as functions; worth fixing whenever we touch the sketch.
+    code = _callbacks_as_functions(code, fixes)
+    return code, fixes
+
+
+# ─── Error-specific fixes ─────────────────────────────────────────────────────
+
+def _apply(code: str, edits: list[tuple[int, int, str]]) -> str:
+    for start, end, text in sorted(edits, reverse=True):
+        code = code[:start] + text + code[end:]
+    return code
+
+
+def _depths(tokens: list[Token]) -> list[int]:
+    """Brace/paren/bracket nesting depth before each token."""
+    depths, depth = [], 0
+    for tok in tokens:
+        if tok.value in ")]}":
+            depth -= 1
+        depths.append(depth)
+        if tok.value in "([{":
+            depth += 1
+    return depths
+
+
+def declared_names(tokens: list[Token]) -> set[str]:
+    names = set()
+    depths = _depths(tokens)
+    for i, tok in enumerate(tokens):
+        if tok.kind != "name":
+            continue
+        if tok.value in ("function", "class") and i + 1 < len(tokens) and tokens[i + 1].kind == "name":
+            names.add(tokens[i + 1].value)
+        elif tok.value in DECLARATION_KEYWORDS:
+            # let a = f(x, y), b;  -> a, b
+            j, expect_name = i + 1, True
+            while j < len(tokens) and tokens[j].value != ";" and depths[j] >= depths[i]:
+                if depths[j] == depths[i]:
+                    if tokens[j].value in DECLARATION_KEYWORDS or tokens[j].value == "function":
+                        break
+                    if expect_name and tokens[j].kind == "name":
+                        names.add(tokens[j].value)
+                    expect_name = tokens[j].value == ","
+                j += 1
+    return names
+
+
+def _assigned_first(tokens: list[Token], name: str) -> bool:
+    """True if the sketch's first use of `name` is a plain `name = ...` whose
+    right-hand side doesn't read it; anything else (`x += 1`, `x = x + 1`, a
+    read) would see the injected declaration's undefined and turn into NaN."""
+    uses = [
+        i for i, tok in enumerate(tokens)
+        if tok.kind == "name" and tok.value == name and (i == 0 or tokens[i - 1].value != ".")
+    ]
+    if not uses:
+        return False
+    first = uses[0]
+    if first + 1 >= len(tokens) or tokens[first + 1].value != "=":
+        return False
+    depths = _depths(tokens)
+    for j in range(first + 2, len(tokens)):
+        if depths[j] < depths[first] or (depths[j] == depths[first] and tokens[j].value in (";", "}")):
+            break
+        if j in uses:
+            return False
+    return True
+
+
+def _declare(code: str, name: str, fixes: list) -> tuple[str, bool]:
+    """ReferenceError: x is not defined -> `let x;` at the top, if x is a
+    variable the sketch assigns before it reads it (an unknown function, or
+    a variable read first, is left to the LLM)."""
+    tokens = tokenize(code)
+    if name in declared_names(tokens) or not _assigned_first(tokens, name):
+        return code, False
+    fixes.append(f"declared {name}")
+    return f"let {name};\n" + code, True
+
+
+def _declaration_at(tokens: list[Token], name: str, occurrence: int = 0) -> int | None:
+    """Index of the top-level let/const/var keyword declaring `name`."""
+    seen = 0
+    depths = _depths(tokens)
+    for i, tok in enumerate(tokens[:-1]):
+        if tok.value in DECLARATION_KEYWORDS and tokens[i + 1].value == name and depths[i] == 0:
+            if seen == occurrence:
+                return i
+            seen += 1
+    return None
+
+
+def _hoist(code: str, name: str, fixes: list) -> tuple[str, bool]:
+    """Temporal dead zone: something runs before `let x = ...`/`class X` is
+    reached. A class moves to the top. A variable is declared at the top and
+    its late declaration turned into an assignment, but only if the early use
+    assigns it; an early read would get undefined instead of an error."""
+    tokens = tokenize(code)
+    i = _declaration_at(tokens, name)
+    if i is not None:
+        if not _assigned_first(tokens, name):
+            return code, False
+        tok = tokens[i]
+        code = _apply(code, [(tok.start, tokens[i + 1].start, "")])
+        fixes.append(f"hoisted declaration of {name}")
+        return f"let {name};\n" + code, True
+
+    for i, tok in enumerate(tokens[:-1]):
+        if tok.value == "class" and tokens[i + 1].value == name:
+            end = _block_end(tokens, i)
+            if end is None:
+                return code, False
+            block = code[tok.start:tokens[end].end]
+            code = _apply(code, [(tok.start, tokens[end].end, "")])
+            fixes.append(f"moved class {name} to the top")
+            return block + "\n" + code, True
+    return code, False
+
+
+def _block_end(tokens: list[Token], i: int) -> int | None:
+    """Index of the `}` closing the first `{` at or after tokens[i]."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j].value == "{":
+            depth += 1
+        elif tokens[j].value == "}":
+            depth -= 1
+            if depth == 0:
+                return j
+    return None
+
+
+def _drop_redeclaration(code: str, name: str, fixes: list) -> tuple[str, bool]:
+    tokens = tokenize(code)
+    i = _declaration_at(tokens, name, occurrence=1)
+    if i is None:
+        return code, False
+    fixes.append(f"removed duplicate declaration of {name}")
+    return _apply(code, [(tokens[i].start, tokens[i + 1].start, "")]), True
+
+
+def _const_to_let(code: str, fixes: list) -> tuple[str, bool]:
+    """TypeError: Assignment to constant variable (the browser doesn't say
+    which) -> `let` for the consts the sketch assigns again."""
+    tokens = tokenize(code)
+    assigned = {
+        tok.value for i, tok in enumerate(tokens)
+        if tok.kind == "name" and (i == 0 or tokens[i - 1].value not in (".", *DECLARATION_KEYWORDS))
+        and ((i + 1 < len(tokens) and tokens[i + 1].value in ASSIGNMENT_OPS)
+             or (i > 0 and tokens[i - 1].value in ("++", "--")))
+    }
+    consts = [(tok, tokens[i + 1].value) for i, tok in enumerate(tokens[:-1])
+              if tok.value == "const" and tokens[i + 1].value in assigned]
+    if not consts:
+        return code, False
+    fixes.append("const -> let for " + ", ".join(name for _, name in consts))
+    return _apply(code, [(tok.start, tok.end, "let") for tok, _ in consts]), True
+
+
+def _add_new(code: str, name: str, fixes: list) -> tuple[str, bool]:
+    tokens = tokenize(code)
+    edits = [
+        (tok.start, tok.start, "new ")
+        for i, tok in enumerate(tokens[:-1])
+        if tok.value == name and tokens[i + 1].value == "("
+        and (i == 0 or tokens[i - 1].value not in ("new", "class", ".", "function"))
+    ]
+    if not edits:
+        return code, False
+    fixes.append(f"added new before {name}()")
+    return _apply(code, edits), True
+
+
+# ─── Normalisations ───────────────────────────────────────────────────────────
+
+def _callbacks_as_functions(code: str, fixes: list) -> str:
+    """`const setup = () => {` / `let draw = function() {` -> `function setup() {`.
+    p5 global mode only finds callbacks declared as functions."""
+    tokens = tokenize(code)
+    edits = []
+    for i, tok in enumerate(tokens[:-4]):
+        if tok.value not in DECLARATION_KEYWORDS or tokens[i + 1].value not in P5_CALLBACKS:
+            continue
+        name = tokens[i + 1].value
+        if tokens[i + 2].value != "=":
+            continue
+        j = i + 3
+        if tokens[j].value == "function" and tokens[j + 1].value == "(":
+            close = _matching(tokens, j + 1)
+            if close is not None:
+                params = code[tokens[j + 1].start:tokens[close].end]
+                edits.append((tok.start, tokens[close].end, f"function {name}{params}"))
+                fixes.append(f"{name} as function declaration")
+        elif tokens[j].value == "(":
+            close = _matching(tokens, j)
+            if close is not None and close + 2 < len(tokens) and tokens[close + 1].value == "=>" \
+                    and tokens[close + 2].value == "{":
+                params = code[tokens[j].start:tokens[close].end]
+                edits.append((tok.start, tokens[close + 1].end, f"function {name}{params}"))
+                fixes.append(f"{name} as function declaration")
+    return _apply(code, edits)
+
+
+def _matching(tokens: list[Token], i: int) -> int | None:
+    opener, closer = tokens[i].value, {"(": ")", "[": "]", "{": "}"}[tokens[i].value]
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j].value == opener:
+            depth += 1
+        elif tokens[j].value == closer:
+            depth -= 1
+            if depth == 0:
+                return j
+    return None
+
@@ -0,0 +1,601 @@
+import math
+import os
+import re
+from string import Template
+from typing import Callable, NamedTuple
+from dotenv import load_dotenv
+
+from response_cache import canonicalize_question
+from solver import G, UNIT_KINDS, solve
+
+load_dotenv()
+
+TEMPLATES_ENABLED = os.getenv("TEMPLATES_ENABLED", "1") == "1"
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+
+# ─── Quantity extraction ─────────────────────────────────────────────────────
+
+class Quantity(NamedTuple):
+    kind: str
+    value: float  # SI units, angles in degrees
+    context: str  # question text between the previous quantity and this one
+
+
+QUANTITY_RE = re.compile(
+    r"(?<![\w.])(-?\d+(?:\.\d+)?) (" + "|".join(re.escape(u) for u in UNIT_KINDS) + r")(?![\w/^])"
+)
+NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+FRICTION_RE = re.compile(r"(?:μ|mu|coefficient of (?:kinetic |static )?friction)(?: \w+){0,6}? (?:is |of |= ?)?(\d+(?:\.\d+)?)")
+GRAVITY_RE = re.compile(r"\b(?:g|gravity|acceleration due to gravity)\b")
+
+
+def extract_quantities(text: str) -> tuple[list[Quantity], dict, bool]:
+    """
+    Quantities with units, plus unitless extras (friction coefficient, a
+    stated g). The flag is False if any other bare number is left over, in
+    which case the question says something the templates don't model.
+    """
+    quantities = []
+    extras = {}
+    used = []
+    last = 0
+    for m in QUANTITY_RE.finditer(text):
+        kind, factor = UNIT_KINDS[m.group(2)]
+        context = text[last:m.start()]
+        used.append(m.span(1))
+        last = m.end()
+        if kind == "accel" and GRAVITY_RE.search(context):
+            extras["g"] = float(m.group(1))
+            continue
+        quantities.append(Quantity(kind, float(m.group(1)) * factor, context))
+    for m in FRICTION_RE.finditer(text):
+        extras["mu"] = float(m.group(1))
+        used.append(m.span(1))
+    leftover = [m for m in NUMBER_RE.finditer(text) if m.span() not in used]
+    return quantities, extras, not leftover
+
+
+def _of(quantities: list[Quantity], kind: str) -> list[Quantity]:
+    return [q for q in quantities if q.kind == kind]
+
+
+def _only(quantities: list[Quantity], **limits: int) -> bool:
+    """True if every quantity is of an allowed kind, at most `limits[kind]` of each."""
+    counts = {}
+    for q in quantities:
+        counts[q.kind] = counts.get(q.kind, 0) + 1
+    return all(kind in limits and n <= limits[kind] for kind, n in counts.items())
+
+
+# ─── Problem families ────────────────────────────────────────────────────────
+#
+# Each family has a keyword pattern, a pattern for variants the template
+# doesn't model, a parameter extractor (None when the question doesn't fit)
+# and an analysis builder. Templates live in templates/p5/<name>.js.tmpl and
+# templates/manim/<name>.py.tmpl with $placeholders for the parameters.
+
+class Family(NamedTuple):
+    name: str
+    keywords: re.Pattern
+    unsupported: re.Pattern
+    extract: Callable[[list, dict, str], dict | None]
+    analyze: Callable[[dict], dict]
+
+
+def _projectile(qs, extras, text):
+    speeds, angles = _of(qs, "speed"), _of(qs, "angle")
+    if len(speeds) != 1 or len(angles) != 1 or not _only(qs, speed=1, angle=1, mass=1):
+        return None
+    angle = angles[0].value
+    if not 0 < angle < 90 or speeds[0].value <= 0:
+        return None
+    return {"v0": speeds[0].value, "angle": angle}
+
+
+SPEED_OWNER_RE = re.compile(r"(boat|swim|still water|\brows?\b)|(river|current|stream|flow)")
+
+
+def _speed_owner(q: Quantity) -> str | None:
+    """"boat" or "river", from the keyword closest before the speed; None if there is none."""
+    found = list(SPEED_OWNER_RE.finditer(q.context))
+    if not found:
+        return None
+    return "boat" if found[-1].group(1) else "river"
+
+
+def _river_boat(qs, extras, text):
+    speeds, widths = _of(qs, "speed"), _of(qs, "length")
+    if len(speeds) != 2 or len(widths) != 1 or not _only(qs, speed=2, length=1):
+        return None
+    owners = [_speed_owner(q) for q in speeds]
+    # One speed's keyword decides the other; both pointing at the same thing
+    # (or nothing) is ambiguous, so the LLM gets the question.
+    if owners[0] is None:
+        owners[0] = {"boat": "river", "river": "boat"}.get(owners[1])
+    elif owners[1] is None:
+        owners[1] = {"boat": "river", "river": "boat"}[owners[0]]
+    if sorted(owners, key=str) != ["boat", "river"]:
+        return None
+    boat, river = speeds if owners[0] == "boat" else speeds[::-1]
+    if boat.value <= 0 or river.value < 0 or widths[0].value <= 0:
+        return None
+    return {"vb": boat.value, "vr": river.value, "d": widths[0].value}
+
+
+def _incline(qs, extras, text):
+    angles = _of(qs, "angle")
+    if len(angles) != 1 or not _only(qs, angle=1, mass=1, length=1):
+        return None
+    if not 0 < angles[0].value < 90:
+        return None
+    masses, lengths = _of(qs, "mass"), _of(qs, "length")
+    return {
+        "angle": angles[0].value,
+        "mu": extras.get("mu", 0.0),
+        "m": masses[0].value if masses else 1.0,
+        "length": lengths[0].value if lengths else 0.0,
+    }
+
+
+def _atwood(qs, extras, text):
+    masses = _of(qs, "mass")
+    if len(masses) != 2 or not _only(qs, mass=2) or "mu" in extras:
+        return None
+    if masses[0].value <= 0 or masses[1].value <= 0:
+        return None
+    return {"m1": masses[0].value, "m2": masses[1].value}
+
+
+def _pendulum(qs, extras, text):
+    lengths, angles = _of(qs, "length"), _of(qs, "angle")
+    if len(lengths) != 1 or not _only(qs, length=1, angle=1, mass=1) or lengths[0].value <= 0:
+        return None
+    amplitude = angles[0].value if angles else 10.0
+    if not 0 < amplitude < 90:
+        return None
+    return {"length": lengths[0].value, "amplitude": amplitude}
+
+
+def _spring_mass(qs, extras, text):
+    ks, masses, lengths = _of(qs, "stiffness"), _of(qs, "mass"), _of(qs, "length")
+    if len(ks) != 1 or len(masses) != 1 or not _only(qs, stiffness=1, mass=1, length=1):
+        return None
+    if ks[0].value <= 0 or masses[0].value <= 0:
+        return None
+    return {"k": ks[0].value, "m": masses[0].value, "amplitude": lengths[0].value if lengths else 0.1}
+
+
+def _circular(qs, extras, text):
+    radii, speeds, times, masses = _of(qs, "length"), _of(qs, "speed"), _of(qs, "time"), _of(qs, "mass")
+    if len(radii) != 1 or len(speeds) + len(times) != 1 or not _only(qs, length=1, speed=1, time=1, mass=1):
+        return None
+    r = radii[0].value
+    v = speeds[0].value if speeds else 2 * math.pi * r / times[0].value
+    if r <= 0 or v <= 0:
+        return None
+    return {"r": r, "v": v, "m": masses[0].value if masses else 0.0}
+
+
+def _collision(qs, extras, text):
+    masses, speeds = _of(qs, "mass"), _of(qs, "speed")
+    if len(masses) != 2 or len(speeds) not in (1, 2) or not _only(qs, mass=2, speed=2):
+        return None
+    if re.search(r"\binelastic|stick|together|coalesce|embed", text):
+        elastic = 0
+    elif re.search(r"\belastic", text):
+        elastic = 1
+    else:
+        return None
+    v1 = speeds[0].value
+    if len(speeds) == 2:
+        v2 = speeds[1].value
+        if re.search(r"opposite|towards each other|toward each other|head-on", text) and v2 > 0:
+            v2 = -v2
+    elif re.search(r"at rest|stationary", text):
+        v2 = 0.0
+    else:
+        return None
+    if v1 <= v2 or masses[0].value <= 0 or masses[1].value <= 0:
+        return None  # they never meet
+    return {"m1": masses[0].value, "m2": masses[1].value, "v1": v1, "v2": v2, "elastic": elastic}
+
+
+def _param(value: float, unit: str, symbol: str) -> dict:
+    return {"value": round(value, 4), "unit": unit, "symbol": symbol}
+
+
+def _result(value: float, unit: str) -> dict:
+    return {"value": round(value, 4), "unit": unit}
+
+
+def _solved(family: str, p: dict) -> dict:
+    return {name: float(value) for name, value in solve(family, p).items()}
+
+
+def _analyze_projectile(p):
+    g, v0 = p["g"], p["v0"]
+    r = _solved("projectile", p)
+    vx, vy = r["Horizontal velocity"], r["Initial vertical velocity"]
+    T, H, R = r["Time of flight"], r["Maximum height"], r["Range"]
+    return {
+        "problem_type": "Projectile Motion",
+        "parameters": {
+            "Initial speed": _param(v0, "m/s", "v₀"),
+            "Launch angle": _param(p["angle"], "°", "θ"),
+            "Gravity": _param(g, "m/s²", "g"),
+        },
+        "equations": [
+            {"label": "Horizontal position", "formula": "x(t) = v₀·cos(θ)·t"},
+            {"label": "Vertical position", "formula": "y(t) = v₀·sin(θ)·t − ½·g·t²"},
+            {"label": "Time of flight", "formula": "T = 2·v₀·sin(θ)/g"},
+            {"label": "Maximum height", "formula": "H = (v₀·sin(θ))²/(2g)"},
+            {"label": "Range", "formula": "R = v₀²·sin(2θ)/g"},
+        ],
+        "explanation": [
+            {"step": 1, "text": f"Resolve the launch velocity: vx = {v0:g}·cos({p['angle']:g}°) = {vx:.2f} m/s, vy = {v0:g}·sin({p['angle']:g}°) = {vy:.2f} m/s."},
+            {"step": 2, "text": f"Vertically the motion is uniformly decelerated by g = {g:g} m/s²; the ball returns to launch height after T = 2·vy/g = {T:.2f} s."},
+            {"step": 3, "text": f"At the top vy = 0, reached at T/2 = {T / 2:.2f} s, giving a maximum height H = vy²/(2g) = {H:.2f} m."},
+            {"step": 4, "text": f"Horizontally the speed stays {vx:.2f} m/s, so the range is R = vx·T = {R:.2f} m."},
+        ],
+        "key_results": {
+            "Time of flight": _result(T, "s"),
+            "Maximum height": _result(H, "m"),
+            "Range": _result(R, "m"),
+            "Horizontal velocity": _result(vx, "m/s"),
+            "Initial vertical velocity": _result(vy, "m/s"),
+        },
+    }
+
+
+def _analyze_river_boat(p):
+    vb, vr, d = p["vb"], p["vr"], p["d"]
+    r = _solved("river_boat", p)
+    t, drift, v, angle = r["Time to cross"], r["Drift"], r["Resultant speed"], r["Drift angle"]
+    return {
+        "problem_type": "Relative Velocity (River-Boat)",
+        "parameters": {
+            "Boat speed": _param(vb, "m/s", "v_b"),
+            "River speed": _param(vr, "m/s", "v_r"),
+            "River width": _param(d, "m", "d"),
+        },
+        "equations": [
+            {"label": "Time to cross", "formula": "t = d / v_b"},
+            {"label": "Drift", "formula": "x = v_r · t"},
+            {"label": "Resultant speed", "formula": "v = √(v_b² + v_r²)"},
+            {"label": "Drift angle", "formula": "φ = arctan(v_r / v_b)"},
+        ],
+        "explanation": [
+            {"step": 1, "text": f"The boat heads straight across at {vb:g} m/s relative to the water while the river carries it downstream at {vr:g} m/s."},
+            {"step": 2, "text": f"Only the boat's own velocity moves it across, so crossing takes t = d/v_b = {d:g}/{vb:g} = {t:.2f} s."},
+            {"step": 3, "text": f"In that time the current carries it x = v_r·t = {drift:.2f} m downstream."},
+            {"step": 4, "text": f"Relative to the bank it moves at √(v_b² + v_r²) = {v:.2f} m/s, {angle:.1f}° off the straight-across line."},
+        ],
+        "key_results": {
+            "Time to cross": _result(t, "s"),
+            "Drift": _result(drift, "m"),
+            "Resultant speed": _result(v, "m/s"),
+            "Drift angle": _result(angle, "°"),
+        },
+    }
+
+
+def _analyze_incline(p):
+    g, m, mu = p["g"], p["m"], p["mu"]
+    r = _solved("incline", p)
+    normal, parallel, a = r["Normal force"], r["Force along incline"], r["Acceleration"]
+    friction_max = mu * normal
+    friction = r["Friction force"]
+    results = {
+        "Acceleration": _result(a, "m/s²"),
+        "Normal force": _result(normal, "N"),
+        "Force along incline": _result(parallel, "N"),
+        "Friction force": _result(friction, "N"),
+    }
+    steps = [
+        {"step": 1, "text": f"Resolve the weight mg = {m * g:.2f} N into N = mg·cos(θ) = {normal:.2f} N perpendicular to the incline and mg·sin(θ) = {parallel:.2f} N along it."},
+        {"step": 2, "text": f"Kinetic friction can supply at most f = μ·N = {mu:g}·{normal:.2f} = {friction_max:.2f} N up the slope."},
+    ]
+    if a > 0:
+        steps.append({"step": 3, "text": f"The net force down the slope is mg·sin(θ) − μ·mg·cos(θ), so a = g·(sin(θ) − μ·cos(θ)) = {a:.2f} m/s²."})
+    else:
+        steps.append({"step": 3, "text": "Friction can balance the pull along the slope (tan θ ≤ μ), so the block stays at rest and a = 0."})
+    if p["length"] > 0 and a > 0:
+        t, v = r["Time to slide down"], r["Speed at bottom"]
+        results["Time to slide down"] = _result(t, "s")
+        results["Speed at bottom"] = _result(v, "m/s")
+        steps.append({"step": 4, "text": f"Starting from rest over L = {p['length']:g} m: t = √(2L/a) = {t:.2f} s and v = a·t = {v:.2f} m/s."})
+    return {
+        "problem_type": "Inclined Plane",
+        "parameters": {
+            "Incline angle": _param(p["angle"], "°", "θ"),
+            "Mass": _param(m, "kg", "m"),
+            "Friction coefficient": _param(mu, "", "μ"),
+            **({"Incline length": _param(p["length"], "m", "L")} if p["length"] > 0 else {}),
+        },
+        "equations": [
+            {"label": "Normal force", "formula": "N = mg·cos(θ)"},
+            {"label": "Component along incline", "formula": "F∥ = mg·sin(θ)"},
+            {"label": "Friction", "formula": "f = μ·N"},
+            {"label": "Acceleration", "formula": "a = g·(sin(θ) − μ·cos(θ))"},
+        ],
+        "explanation": steps,
+        "key_results": results,
+    }
+
+
+def _analyze_atwood(p):
+    g, m1, m2 = p["g"], p["m1"], p["m2"]
+    r = _solved("atwood", p)
+    a, T = r["Acceleration"], r["Tension"]
+    heavier = "m₁" if m1 > m2 else "m₂"
+    return {
+        "problem_type": "Atwood Machine",
+        "parameters": {
+            "Mass 1": _param(m1, "kg", "m₁"),
+            "Mass 2": _param(m2, "kg", "m₂"),
+            "Gravity": _param(g, "m/s²", "g"),
+        },
+        "equations": [
+            {"label": "Acceleration", "formula": "a = (m₁ − m₂)·g / (m₁ + m₂)"},
+            {"label": "Tension", "formula": "T = 2·m₁·m₂·g / (m₁ + m₂)"},
+        ],
+        "explanation": [
+            {"step": 1, "text": "Both masses hang from one light string over a frictionless pulley, so they share the same tension T and the same magnitude of acceleration a."},
+            {"step": 2, "text": f"Newton's second law for each mass: m₁g − T = m₁a and T − m₂g = m₂a. Adding them gives a = (m₁ − m₂)g/(m₁ + m₂) = {a:.2f} m/s², with {heavier} moving down."},
+            {"step": 3, "text": f"Substituting back gives T = 2m₁m₂g/(m₁ + m₂) = {T:.2f} N."},
+        ],
+        "key_results": {
+            "Acceleration": _result(a, "m/s²"),
+            "Tension": _result(T, "N"),
+        },
+    }
+
+
+def _analyze_pendulum(p):
+    g, L, amp = p["g"], p["length"], p["amplitude"]
+    r = _solved("pendulum", p)
+    w, T, v_max = r["Angular frequency"], r["Period"], r["Maximum speed"]
+    return {
+        "problem_type": "Simple Pendulum",
+        "parameters": {
+            "Length": _param(L, "m", "L"),
+            "Amplitude": _param(amp, "°", "θ₀"),
+            "Gravity": _param(g, "m/s²", "g"),
+        },
+        "equations": [
+            {"label": "Period", "formula": "T = 2π·√(L/g)"},
+            {"label": "Angular frequency", "formula": "ω = √(g/L)"},
+            {"label": "Angle", "formula": "θ(t) = θ₀·cos(ω·t)"},
+            {"label": "Speed at bottom", "formula": "v = √(2gL·(1 − cos θ₀))"},
+        ],
+        "explanation": [
+            {"step": 1, "text": "For small swings the restoring torque is proportional to the angle, so the bob moves in simple harmonic motion."},
+            {"step": 2, "text": f"The angular frequency is ω = √(g/L) = √({g:g}/{L:g}) = {w:.3f} rad/s."},
+            {"step": 3, "text": f"The period is T = 2π/ω = {T:.3f} s, independent of the mass and (for small angles) of the amplitude."},
+            {"step": 4, "text": f"Energy conservation from θ₀ = {amp:g}° gives the speed at the lowest point: v = √(2gL(1 − cos θ₀)) = {v_max:.3f} m/s."},
+        ],
+        "key_results": {
+            "Period": _result(T, "s"),
+            "Frequency": _result(r["Frequency"], "Hz"),
+            "Angular frequency": _result(w, "rad/s"),
+            "Maximum speed": _result(v_max, "m/s"),
+        },
+    }
+
+
+def _analyze_spring_mass(p):
+    k, m, A = p["k"], p["m"], p["amplitude"]
+    r = _solved("spring_mass", p)
+    w, T = r["Angular frequency"], r["Period"]
+    return {
+        "problem_type": "Spring-Mass Oscillator (SHM)",
+        "parameters": {
+            "Spring constant": _param(k, "N/m", "k"),
+            "Mass": _param(m, "kg", "m"),
+            "Amplitude": _param(A, "m", "A"),
+        },
+        "equations": [
+            {"label": "Angular frequency", "formula": "ω = √(k/m)"},
+            {"label": "Period", "formula": "T = 2π·√(m/k)"},
+            {"label": "Position", "formula": "x(t) = A·cos(ω·t)"},
+            {"label": "Maximum speed", "formula": "v_max = A·ω"},
+            {"label": "Energy", "formula": "E = ½·k·A²"},
+        ],
+        "explanation": [
+            {"step": 1, "text": "The spring pulls back with F = −kx, so the mass performs simple harmonic motion about equilibrium."},
+            {"step": 2, "text": f"ω = √(k/m) = √({k:g}/{m:g}) = {w:.3f} rad/s, so T = 2π/ω = {T:.3f} s."},
+            {"step": 3, "text": f"Released from A = {A:g} m, the speed peaks at equilibrium: v_max = A·ω = {r['Maximum speed']:.3f} m/s."},
+            {"step": 4, "text": f"The total energy ½kA² = {r['Total energy']:.3f} J swaps between the spring and the mass every quarter period."},
+        ],
+        "key_results": {
+            "Period": _result(T, "s"),
+            "Frequency": _result(r["Frequency"], "Hz"),
+            "Angular frequency": _result(w, "rad/s"),
+            "Maximum speed": _result(r["Maximum speed"], "m/s"),
+            "Maximum acceleration": _result(r["Maximum acceleration"], "m/s²"),
+            "Total energy": _result(r["Total energy"], "J"),
+        },
+    }
+
+
+def _analyze_circular(p):
+    r, v, m = p["r"], p["v"], p["m"]
+    solved = _solved("circular", p)
+    ac, w, T = solved["Centripetal acceleration"], solved["Angular velocity"], solved["Period"]
+    results = {
+        "Centripetal acceleration": _result(ac, "m/s²"),
+        "Angular velocity": _result(w, "rad/s"),
+        "Period": _result(T, "s"),
+        "Speed": _result(v, "m/s"),
+    }
+    steps = [
+        {"step": 1, "text": f"Moving at constant speed v = {v:.2f} m/s on a circle of radius r = {r:g} m, the velocity keeps turning towards the centre."},
+        {"step": 2, "text": f"The centripetal acceleration is a_c = v²/r = {ac:.2f} m/s², always pointing at the centre."},
+        {"step": 3, "text": f"One revolution takes T = 2πr/v = {T:.2f} s, i.e. ω = v/r = {w:.3f} rad/s."},
+    ]
+    params = {
+        "Radius": _param(r, "m", "r"),
+        "Speed": _param(v, "m/s", "v"),
+    }
+    if m > 0:
+        results["Centripetal force"] = _result(solved["Centripetal force"], "N")
+        params["Mass"] = _param(m, "kg", "m")
+        steps.append({"step": 4, "text": f"Keeping m = {m:g} kg on the circle takes a net inward force F_c = m·v²/r = {solved['Centripetal force']:.2f} N."})
+    return {
+        "problem_type": "Uniform Circular Motion",
+        "parameters": params,
+        "equations": [
+            {"label": "Centripetal acceleration", "formula": "a_c = v²/r = ω²·r"},
+            {"label": "Centripetal force", "formula": "F_c = m·v²/r"},
+            {"label": "Period", "formula": "T = 2πr/v"},
+            {"label": "Angular velocity", "formula": "ω = v/r"},
+        ],
+        "explanation": steps,
+        "key_results": results,
+    }
+
+
+def _analyze_collision(p):
+    m1, m2, v1, v2 = p["m1"], p["m2"], p["v1"], p["v2"]
+    r = _solved("collision", p)
+    p_total, ke_before, ke_after = r["Total momentum"], r["Kinetic energy before"], r["Kinetic energy after"]
+    u1, u2 = r["Final velocity 1"], r["Final velocity 2"]
+    if p["elastic"]:
+        kind = "Elastic Collision (1D)"
+        equations = [
+            {"label": "Momentum", "formula": "m₁v₁ + m₂v₂ = m₁v₁' + m₂v₂'"},
+            {"label": "Final velocity 1", "formula": "v₁' = ((m₁ − m₂)v₁ + 2m₂v₂)/(m₁ + m₂)"},
+            {"label": "Final velocity 2", "formula": "v₂' = ((m₂ − m₁)v₂ + 2m₁v₁)/(m₁ + m₂)"},
+        ]
+        step = f"Kinetic energy is conserved too, which gives v₁' = {u1:.2f} m/s and v₂' = {u2:.2f} m/s."
+    else:
+        kind = "Perfectly Inelastic Collision (1D)"
+        equations = [
+            {"label": "Momentum", "formula": "m₁v₁ + m₂v₂ = (m₁ + m₂)·v_f"},
+            {"label": "Final velocity", "formula": "v_f = (m₁v₁ + m₂v₂)/(m₁ + m₂)"},
+        ]
+        step = f"The bodies stick together, so they share v_f = p/(m₁ + m₂) = {u1:.2f} m/s."
+    results = {
+        "Final velocity 1": _result(u1, "m/s"),
+        "Final velocity 2": _result(u2, "m/s"),
+        "Total momentum": _result(p_total, "kg·m/s"),
+        "Kinetic energy before": _result(ke_before, "J"),
+        "Kinetic energy after": _result(ke_after, "J"),
+    }
+    if not p["elastic"]:
+        results = {"Final velocity": _result(u1, "m/s"), **{k: v for k, v in results.items() if not k.startswith("Final")}}
+    return {
+        "problem_type": kind,
+        "parameters": {
+            "Mass 1": _param(m1, "kg", "m₁"),
+            "Mass 2": _param(m2, "kg", "m₂"),
+            "Velocity 1": _param(v1, "m/s", "v₁"),
+            "Velocity 2": _param(v2, "m/s", "v₂"),
+        },
+        "equations": equations + [{"label": "Kinetic energy", "formula": "KE = ½·m·v²"}],
+        "explanation": [
+            {"step": 1, "text": f"No external horizontal force acts, so momentum is conserved: p = m₁v₁ + m₂v₂ = {p_total:.2f} kg·m/s."},
+            {"step": 2, "text": step},
+            {"step": 3, "text": f"Kinetic energy goes from {ke_before:.2f} J to {ke_after:.2f} J ({ke_before - ke_after:.2f} J lost to deformation and heat)."},
+        ],
+        "key_results": results,
+    }
+
+
+FAMILIES = [
+    Family("projectile",
+           re.compile(r"projectile|thrown|launched|kicked|fired|hurled|\bthrows?\b|\bkicks?\b"),
+           re.compile(r"horizontally|vertically|straight up|cliff|building|tower|roof|table|wall|height of|above the ground|air resistance|drag|lands? on|incline"),
+           _projectile, _analyze_projectile),
+    Family("river_boat",
+           re.compile(r"river|boat|swimmer|swims"),
+           re.compile(r"directly opposite|shortest path|straight across|upstream|heading|at an angle|minimum|wind|aeroplane|plane"),
+           _river_boat, _analyze_river_boat),
+    Family("incline",
+           re.compile(r"incline|ramp|slope"),
+           re.compile(r"push|pull|applied|pulley|spring|rolls?|rolling|cylinder|sphere|initial (?:speed|velocity)|up the|projected|static friction"),
+           _incline, _analyze_incline),
+    Family("atwood",
+           re.compile(r"atwood|pulley"),
+           re.compile(r"incline|table|friction|massive pulley|moment of inertia|three|3 masses"),
+           _atwood, _analyze_atwood),
+    Family("pendulum",
+           re.compile(r"pendulum"),
+           re.compile(r"conical|physical|compound|spring|rod|damp|elevator|lift|accelerat"),
+           _pendulum, _analyze_pendulum),
+    Family("spring_mass",
+           re.compile(r"spring"),
+           re.compile(r"vertical|hang|hung|damp|series|parallel|two springs|natural length|unstretched|incline|collid|dropped|pendulum|compress|launch|release"),
+           _spring_mass, _analyze_spring_mass),
+    Family("circular",
+           re.compile(r"circular|circle|centripetal|revolv|revolution|whirl"),
+           re.compile(r"banked|vertical circle|loop|conical|breaks|satellite|orbit|friction|rpm|acceleration of"),
+           _circular, _analyze_circular),
+    Family("collision",
+           re.compile(r"collid|collision|collides|stick together|sticks to"),
+           re.compile(r"2d|two dimensions|angle|glancing|oblique|spring|restitution|explo|recoil|wall"),
+           _collision, _analyze_collision),
+]
+
+
+# ─── Filling ──────────────────────────────────────────────────────────────────
+
+def classify(question: str) -> tuple[Family, dict] | None:
+    """(family, parameters) for a question a template can answer exactly, else None."""
+    text = canonicalize_question(question)
+    matches = [f for f in FAMILIES if f.keywords.search(text)]
+    if len(matches) != 1:
+        return None
+    family = matches[0]
+    if family.unsupported.search(text):
+        return None
+    quantities, extras, complete = extract_quantities(text)
+    if not complete:
+        return None
+    params = family.extract(quantities, extras, text)
+    if params is None:
+        return None
+    params["g"] = extras.get("g", G)
+    return family, params
+
+
+_template_cache: dict = {}
+
+
+def _template(path: str) -> Template:
+    if path not in _template_cache:
+        with open(os.path.join(TEMPLATE_DIR, path), encoding="utf-8") as f:
+            _template_cache[path] = Template(f.read())
+    return _template_cache[path]
+
+
+def fill(family: Family, params: dict) -> tuple[str, str]:
+    """p5.js and Manim code for a family with the given parameters."""
+    values = {k: repr(round(float(v), 6)) for k, v in params.items()}
+    p5js = _template("p5/common.js.tmpl").substitute(values) + "\n" + _template(f"p5/{family.name}.js.tmpl").substitute(values)
+    manim = _template(f"manim/{family.name}.py.tmpl").substitute(values)
+    return p5js, manim
+
+
+template_counts = {"hits": 0, "misses": 0}
+
+
+def template_simulation(question: str) -> dict | None:
+    """A complete simulation from templates, or None if the question needs the LLM."""
+    if not TEMPLATES_ENABLED:
+        return None
+    match = classify(question)
+    if match is None:
+        template_counts["misses"] += 1
+        return None
+    family, params = match
+    p5js_code, manim_code = fill(family, params)
+    template_counts["hits"] += 1
+    template_counts[family.name] = template_counts.get(family.name, 0) + 1
+    print(f"[Template] {family.name} {params}")
+    return {**family.analyze(params), "p5js_code": p5js_code, "manim_code": manim_code}
+
+
+def template_stats() -> dict:
+    return {"enabled": TEMPLATES_ENABLED, **template_counts}
@@ -1,7 +1,7 @@
+import json
 
-SYSTEM_PROMPT = """You are PhysicsAI, a high-precision physics engine. Generate MONOCHROME (Black & White) p5.js simulations.
 
-=== p5.js MONOCHROME ENGINE (Priority) ===
+STYLE_RULES = """=== p5.js MONOCHROME ENGINE (Priority) ===
 1. AESTHETICS (Strict B&W):
    - Background: #FFFFFF (Pure White).
    - Grid: stroke(240), strokeWeight(1), line every 40px.
@@ -17,7 +17,11 @@ SYSTEM_PROMPT = """You are PhysicsAI, a high-precision physics engine. Generate
 
 === MANIM SUMMARY (Legacy) ===
 - Strict B&W (Black background, White shapes/text). No LaTeX.
+"""
+
+SYSTEM_PROMPT = """You are PhysicsAI, a high-precision physics engine. Generate MONOCHROME (Black & White) p5.js simulations.
 
+""" + STYLE_RULES + """
 === JSON OUTPUT ===
 {
   "problem_type": "str",
@@ -31,6 +35,24 @@ SYSTEM_PROMPT = """You are PhysicsAI, a high-precision physics engine. Generate
 """
 
 
+# The p5.js and Manim code calls return bare code: the styling rules without
+# the JSON schema, which would pull them towards wrapping the code in JSON.
+CODE_SYSTEM_PROMPT = """You are PhysicsAI, a high-precision physics engine. You write the code for
+physics visualisations: p5.js sketches and Manim Community Edition scenes.
+
+""" + STYLE_RULES + """
+Return only the code the user asks for, with no JSON and no explanation."""
+
+
+# Fix calls only need to know what they are repairing, not the styling rules
+# or the JSON schema, so they get their own short system prompt.
+FIX_SYSTEM_PROMPT = """You repair broken code for a physics visualisation app: p5.js sketches
+(global mode, monochrome on white) and Manim Community Edition scenes (class
+PhysicsScene, white on black, Text() only, no LaTeX). Change only what the
+error requires, keep the simulation otherwise identical, and return only the
+corrected code."""
+
+
 def build_user_prompt(question: str) -> str:
     return f"""Physics Problem: "{question}"
 
@@ -67,3 +89,50 @@ Fix the code. Common fixes:
 - Ensure class is named exactly PhysicsScene
 
 Return ONLY the fixed Python Manim code, no JSON, no markdown."""
+
+
+# ─── Pipeline mode: analysis first, then each artifact on its own ────────────
+
+def build_analysis_prompt(question: str) -> str:
+    return f"""Physics Problem: "{question}"
+
+Instructions:
+1. Identify the problem type and extract every given parameter with units.
+2. Write the governing equations and a step-by-step solution.
+3. Compute the key results numerically.
+
+Output ONLY JSON with the fields problem_type, parameters, equations, explanation
+and key_results. Do NOT include p5js_code or manim_code."""
+
+
+def build_p5js_prompt(question: str, analysis: dict) -> str:
+    return f"""Physics Problem: "{question}"
+
+Solved analysis (use these parameters and results exactly):
+{_analysis_summary(analysis)}
+
+Write an interactive MONOCHROME p5.js simulation of this problem (B&W only):
+- Sliders for the key parameters inside the HUD panel.
+- Vectors and trails in black/gray on white.
+
+Return ONLY the p5.js code, no JSON, no markdown."""
+
+
+def build_manim_prompt(question: str, analysis: dict) -> str:
+    return f"""Physics Problem: "{question}"
+
+Solved analysis (use these parameters and results exactly):
+{_analysis_summary(analysis)}
+
+Write a short Manim Community Edition animation of this problem:
+- One scene class named exactly PhysicsScene(Scene), with `from manim import *`.
+- Black background, white shapes and text. Text() only, no MathTex/Tex.
+- Coordinates as 3-element arrays: np.array([x, y, 0]).
+- Keep the whole animation under 15 seconds.
+
+Return ONLY the Python Manim code, no JSON, no markdown."""
+
+
+def _analysis_summary(analysis: dict) -> str:
+    fields = ("problem_type", "parameters", "equations", "key_results")
+    return json.dumps({k: analysis[k] for k in fields if k in analysis}, indent=1)
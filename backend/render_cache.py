@@ -0,0 +1,50 @@
+import ast
+import hashlib
+import os
+from importlib.metadata import version, PackageNotFoundError
+from dotenv import load_dotenv
+
+from cache import LRUCache
+from manim_runner import RENDITIONS
+
+load_dotenv()
+
+try:
+    MANIM_VERSION = version("manim")
+except PackageNotFoundError:
+    MANIM_VERSION = "unknown"
+
+
+def normalize_scene(code: str) -> str:
+    """
+    Canonical form of a Manim script. The AST dump ignores comments, blank
+    lines and indentation style, so cosmetically different copies of the same
+    scene share one cache entry. Unparseable code falls back to stripping
+    trailing whitespace and blank lines.
+    """
+    try:
+        return ast.dump(ast.parse(code))
+    except SyntaxError:
+        lines = [line.rstrip() for line in code.replace("\r\n", "\n").split("\n")]
+        return "\n".join(line for line in lines if line)
+
+
+def render_key(code: str, rendition: str = "standard") -> str:
+    settings = RENDITIONS[rendition]
+    flags = f"q={settings.quality};fps={settings.fps};manim={MANIM_VERSION}" + (";still" if settings.still else "")
+    return hashlib.sha256(f"{flags}\n{normalize_scene(code)}".encode()).hexdigest()
+
+
+render_cache: LRUCache | None = None
+
+
+def get_render_cache() -> LRUCache:
+    global render_cache
+    if render_cache is None:
+        render_cache = LRUCache(
+            "render",
+            max_entries=int(os.getenv("RENDER_CACHE_ENTRIES", "2000")),
+            ttl=float(os.getenv("RENDER_CACHE_TTL", str(7 * 24 * 3600))),
+            path=os.getenv("RENDER_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "render")),
+        )
+    return render_cache
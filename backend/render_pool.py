@@ -0,0 +1,306 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+from manim_runner import (
+    RENDITIONS, RenderOutput, render_video, count_animations, segmentable, split_animations, concat_videos,
+)
+from manim_worker import preload, render_video_warm, count_animations_warm, worker_rss_mb
+from render_cache import get_render_cache, render_key
+from storage import artifact_name, get_storage
+from workdir import get_scratch
+from sandbox import BudgetExceeded
+
+load_dotenv()
+
+# Rough peak RSS of a single 480p Manim render (manim + cairo + ffmpeg).
+RENDER_MEMORY_MB = int(os.getenv("RENDER_MEMORY_MB", "1024"))
+
+# "warm": workers pre-import manim and fork per job; "cli": shell out to manim.
+RENDER_MODE = os.getenv("RENDER_MODE", "warm")
+# Workers are replaced after this many jobs, or once their RSS exceeds the limit.
+RENDER_WORKER_MAX_JOBS = int(os.getenv("RENDER_WORKER_MAX_JOBS", "50"))
+RENDER_WORKER_MAX_RSS_MB = float(os.getenv("RENDER_WORKER_MAX_RSS_MB", "1500"))
+
+# Queue order: previews jump ahead of full renders, background upgrades go last.
+RENDITION_PRIORITY = {"preview": 0, "standard": 1, "hd": 2}
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memory_mb() -> int | None:
+    """Memory available to this container: cgroup limit if set, else physical RAM."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+            if raw.isdigit() and int(raw) < 1 << 60:
+                return int(raw) // (1024 * 1024)
+        except OSError:
+            continue
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_worker_count() -> int:
+    """One worker per core, capped by how many renders fit in memory."""
+    workers = _cpu_count()
+    memory = _memory_mb()
+    if memory:
+        # Leave one render's worth of headroom for the API process itself.
+        workers = min(workers, memory // RENDER_MEMORY_MB - 1)
+    return max(1, workers)
+
+
+def _mp_context():
+    # fork() from a threaded event loop process is unsafe; forkserver keeps
+    # workers clean on Linux, spawn is the only option on Windows.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _run_job(fn, *args):
+    """Runs in the worker: the result plus the worker's RSS afterwards."""
+    return fn(*args), worker_rss_mb()
+
+
+class RenderPool:
+    """
+    Bounded pool of render worker processes fed from an explicit priority
+    queue. Callers enqueue work and await the result; the event loop never
+    blocks on a render.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: asyncio.PriorityQueue | None = None
+        self.sequence = itertools.count()  # FIFO within a priority
+        self.executor: ProcessPoolExecutor | None = None
+        self.tasks: list[asyncio.Task] = []
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.recycled = 0
+        self.segmented = 0
+        self.rendered = 0  # renditions, however many segments each took
+        self.render_seconds = 0.0
+        self.over_budget: dict[str, int] = {}
+
+    def start(self):
+        if self.executor is not None:
+            return
+        print(f"[Render] Starting {RENDER_MODE} pool with {self.workers} workers (queue size {self.queue_size})")
+        self.queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        self.executor = self._new_executor()
+        self.tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        warm = RENDER_MODE == "warm"
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_mp_context(),
+            initializer=preload if warm else None,
+            max_tasks_per_child=RENDER_WORKER_MAX_JOBS or None,
+        )
+
+    def recycle(self, reason: str):
+        """Swap in fresh workers; the old ones finish their current job and exit."""
+        print(f"[Render] Recycling workers: {reason}")
+        old = self.executor
+        self.executor = self._new_executor()
+        self.recycled += 1
+        old.shutdown(wait=False)
+
+    async def shutdown(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, fn, args, future, on_start = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                if on_start:
+                    on_start()
+                self.active += 1
+                executor = self.executor
+                try:
+                    result, rss = await loop.run_in_executor(executor, _run_job, fn, *args)
+                finally:
+                    self.active -= 1
+                if RENDER_WORKER_MAX_RSS_MB and rss > RENDER_WORKER_MAX_RSS_MB:
+                    self.recycle(f"worker RSS {rss:.0f} MB over {RENDER_WORKER_MAX_RSS_MB:.0f} MB")
+                self.completed += 1
+                if not future.done():
+                    future.set_result(result)
+            except BrokenProcessPool:
+                # A worker died (OOM kill, segfault in cairo...). Replace the
+                # executor so later jobs still have somewhere to run.
+                # Every job on the dead executor lands here; only the first
+                # one to notice replaces it.
+                self.failed += 1
+                if self.executor is executor:
+                    print("[Render] Worker process died, restarting pool")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._new_executor()
+                if not future.done():
+                    future.set_exception(RuntimeError("Render worker crashed"))
+            except asyncio.CancelledError:
+                # The dispatcher itself is stopping: let the cancellation through.
+                if asyncio.current_task().cancelling():
+                    raise
+                # Otherwise a pool shutdown cancelled the job before it started.
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(RuntimeError("Render worker pool was restarted"))
+            except Exception as e:
+                self.failed += 1
+                if isinstance(e, BudgetExceeded):
+                    print(f"[Render] Job over its {e.budget} budget: {e}")
+                    self.over_budget[e.budget] = self.over_budget.get(e.budget, 0) + 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def submit(self, fn, *args, on_start=None, priority: int = 1):
+        """
+        Queue fn(*args) for a worker process and await its result. Lower
+        priorities are picked up first; on_start() is called when a worker
+        picks the job up.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((priority, next(self.sequence), fn, args, future, on_start))
+        except asyncio.QueueFull:
+            raise RuntimeError("Render queue is full, try again later")
+        return await future
+
+    def cached(self, code: str, rendition: str = "standard") -> str | None:
+        entry = get_render_cache().get(render_key(code, rendition))
+        return entry["url"] if entry else None
+
+    async def render(self, code: str, job_id: str, on_stage=None, rendition: str = "standard", use_cache: bool = True) -> str:
+        """
+        Render and upload one rendition of a scene, returning its URL.
+        on_stage(name) is told when the job starts "rendering" and "uploading".
+        use_cache renders against the shared manim text/partial-movie cache.
+        """
+        on_stage = on_stage or (lambda stage: None)
+        key = render_key(code, rendition)
+        cached = get_render_cache().get(key)
+        if cached:
+            print(f"[Render] Cache hit for job {job_id} ({rendition})")
+            return cached["url"]
+        output = await self.render_file(code, job_id, rendition, on_stage, use_cache)
+        self.rendered += 1
+        self.render_seconds += output.seconds
+        # The worker process is already free for the next render; the upload
+        # waits for one of the storage's own upload threads.
+        on_stage("uploading")
+        get_scratch().lease(output.path)
+        try:
+            url = await get_storage().upload(output.path, artifact_name(job_id, rendition))
+        finally:
+            get_scratch().release(output.path)
+        get_render_cache().set(key, {
+            "url": url, "job_id": job_id,
+            "bytes": output.bytes, "render_s": round(output.seconds, 2), "partial_movies": output.partial_movies,
+        })
+        return url
+
+    async def render_file(self, code: str, job_id: str, rendition: str, on_stage, use_cache: bool = True) -> RenderOutput:
+        """
+        Render to a local file. With several workers, scenes with enough
+        animations are split into segments rendered in parallel and joined.
+        """
+        warm = RENDER_MODE == "warm"
+        render = render_video_warm if warm else render_video
+        priority = RENDITION_PRIORITY[rendition]
+        segments = [None]
+        if self.workers > 1 and not RENDITIONS[rendition].still and segmentable(code):
+            count = await self.submit(count_animations_warm if warm else count_animations, code, job_id, priority=priority)
+            segments = split_animations(count, self.workers)
+            if len(segments) > 1:
+                print(f"[Render] Job {job_id}: {count} animations in {len(segments)} parallel segments")
+                self.segmented += 1
+
+        started = False
+
+        def on_start():
+            nonlocal started
+            if not started:
+                started = True
+                on_stage("rendering")
+
+        async def segment(i: int, animations: tuple[int, int] | None) -> RenderOutput:
+            output = await self.submit(render, code, f"{job_id}_{i}" if animations else job_id, rendition,
+                                       animations, use_cache, on_start=on_start, priority=priority)
+            # Finished segments may wait on slower ones; keep them out of eviction.
+            get_scratch().lease(output.path)
+            return output
+
+        results = await asyncio.gather(*[
+            segment(i, animations) for i, animations in enumerate(segments)
+        ], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Segments that did render are of no use without the others.
+            for output in results:
+                if isinstance(output, RenderOutput):
+                    get_scratch().release(output.path)
+            raise errors[0]
+        if len(results) == 1:
+            return results[0]
+        path = await asyncio.to_thread(concat_videos, [output.path for output in results], job_id)
+        # Segments render side by side, so the slowest one is the render time.
+        return RenderOutput(
+            path, os.path.getsize(path),
+            max(output.seconds for output in results), sum(output.partial_movies for output in results),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recycled": self.recycled,
+            "segmented": self.segmented,
+            "over_budget": self.over_budget,
+            "avg_render_s": round(self.render_seconds / self.rendered, 2) if self.rendered else None,
+            "mode": RENDER_MODE,
+        }
+
+
+render_pool: RenderPool | None = None
+
+
+def get_render_pool() -> RenderPool:
+    global render_pool
+    if render_pool is None:
+        workers = int(os.getenv("RENDER_WORKERS", "0")) or default_worker_count()
+        queue_size = int(os.getenv("RENDER_QUEUE_SIZE", "64"))
+        render_pool = RenderPool(workers, queue_size)
+    return render_pool
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import re
+from dotenv import load_dotenv
+
+from cache import LRUCache
+from prompt import SYSTEM_PROMPT, build_user_prompt, build_analysis_prompt, build_p5js_prompt, build_manim_prompt
+
+load_dotenv()
+
+# Changing either prompt changes what the LLM would answer, so it is part of
+# every key and old entries simply stop matching.
+PROMPT_VERSION = hashlib.sha256((
+    SYSTEM_PROMPT + build_user_prompt("{question}") + build_analysis_prompt("{question}")
+    + build_p5js_prompt("{question}", {}) + build_manim_prompt("{question}", {})
+).encode()).hexdigest()[:12]
+
+# Unit spellings, matched only directly after a number ("1 metre" but not
+# "the metre stick"). Longer phrases come first so "km per hour" wins over "km".
+UNITS = [
+    (r"(?:kilomet(?:er|re)s?|km)\s*(?:per|/)\s*(?:hour|hr|h)|kmph|kph", "km/h"),
+    (r"(?:met(?:er|re)s?|m)\s*(?:per|/)\s*(?:second|sec|s)\s*(?:squared|\^?2|²)", "m/s^2"),
+    (r"(?:met(?:er|re)s?|m)\s*(?:per|/)\s*(?:second|sec|s)|mps", "m/s"),
+    (r"(?:newtons?|n)\s*(?:per|/)\s*(?:met(?:er|re)|m)", "n/m"),
+    (r"kilomet(?:er|re)s?|kms?", "km"),
+    (r"centimet(?:er|re)s?|cms?", "cm"),
+    (r"millimet(?:er|re)s?|mm", "mm"),
+    (r"met(?:er|re)s?|m", "m"),
+    (r"kilograms?|kgs?|kilos?", "kg"),
+    (r"grams?|gms?|g", "g"),
+    (r"seconds?|secs?|s", "s"),
+    (r"minutes?|mins?", "min"),
+    (r"hours?|hrs?|h", "h"),
+    (r"degrees?|degs?|°", "deg"),
+    (r"radians?|rads?", "rad"),
+    (r"newtons?|n", "n"),
+    (r"joules?|j", "j"),
+    (r"hertz|hz", "hz"),
+]
+UNIT_RE = [
+    (re.compile(r"(\d)\s*(?:" + pattern + r")(?![a-z])"), rf"\1 {unit}")
+    for pattern, unit in UNITS
+]
+
+
+def _number(match: re.Match) -> str:
+    # "1.50" and "1.5", "2.0" and "2" mean the same thing.
+    value = match.group(0)
+    if "." in value:
+        value = value.rstrip("0").rstrip(".")
+    return value
+
+
+def canonicalize_question(question: str) -> str:
+    """Case-fold, normalise whitespace, numbers and unit spellings."""
+    q = question.casefold().replace("°", " deg ")
+    q = re.sub(r"\d+\.\d+|\d+", _number, q)
+    for pattern, unit in UNIT_RE:
+        q = pattern.sub(unit, q)
+    q = re.sub(r"[?!.,;:]+(\s|$)", r"\1", q)
+    return " ".join(q.split())
+
+
+def response_key(question: str) -> str:
+    return f"{PROMPT_VERSION}:{canonicalize_question(question)}"
+
+
+response_cache: LRUCache | None = None
+
+
+def get_response_cache() -> LRUCache:
+    global response_cache
+    if response_cache is None:
+        response_cache = LRUCache(
+            "response",
+            max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "500")),
+            max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))),
+            path=os.getenv("RESPONSE_CACHE_DIR") or None,
+        )
+    return response_cache
@@ -0,0 +1,131 @@
+import os
+import signal
+import subprocess
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Generated scene code is untrusted: each render process runs under rlimits so
+# a pathological scene (a huge always_redraw loop, a giant NumberPlane) fails
+# on its own instead of starving every other render on the box.
+RENDER_SANDBOX = os.getenv("RENDER_SANDBOX", "1") == "1"
+RENDER_TIMEOUT = int(os.getenv("RENDER_TIMEOUT", "120"))            # wall-clock seconds
+RENDER_CPU_SECONDS = int(os.getenv("RENDER_CPU_SECONDS", "120"))
+# Address space, not RSS: numpy, cairo and thread stacks map well beyond what they touch.
+RENDER_MEMORY_LIMIT_MB = int(os.getenv("RENDER_MEMORY_LIMIT_MB", "4096"))
+RENDER_MAX_OPEN_FILES = int(os.getenv("RENDER_MAX_OPEN_FILES", "1024"))
+RENDER_MAX_FILE_MB = int(os.getenv("RENDER_MAX_FILE_MB", "512"))
+# The HD upgrade renders several times the pixels; its time and file budgets scale up.
+RENDER_HD_BUDGET_SCALE = float(os.getenv("RENDER_HD_BUDGET_SCALE", "4"))
+
+
+class Budget(NamedTuple):
+    wall_s: int
+    cpu_s: int
+    memory_mb: int
+    open_files: int
+    file_mb: int
+
+
+STANDARD = Budget(RENDER_TIMEOUT, RENDER_CPU_SECONDS, RENDER_MEMORY_LIMIT_MB, RENDER_MAX_OPEN_FILES, RENDER_MAX_FILE_MB)
+
+# Per rendition; anything else (the animation count pass) gets the standard budget.
+BUDGETS = {
+    "preview": STANDARD,
+    "standard": STANDARD,
+    "hd": STANDARD._replace(
+        wall_s=int(RENDER_TIMEOUT * RENDER_HD_BUDGET_SCALE),
+        cpu_s=int(RENDER_CPU_SECONDS * RENDER_HD_BUDGET_SCALE),
+        file_mb=int(RENDER_MAX_FILE_MB * RENDER_HD_BUDGET_SCALE),
+    ),
+}
+
+LABELS = {
+    "wall_s": "wall-clock time",
+    "cpu_s": "CPU time",
+    "memory_mb": "memory",
+    "open_files": "open files",
+    "file_mb": "output file size",
+}
+UNITS = {"wall_s": "s", "cpu_s": "s", "memory_mb": " MB", "open_files": "", "file_mb": " MB"}
+
+
+def budget_for(rendition: str) -> Budget:
+    return BUDGETS.get(rendition, STANDARD)
+
+
+class BudgetExceeded(RuntimeError):
+    """A render killed (or failed) for going over one of its budgets."""
+
+    def __init__(self, budget: str, limit: int):
+        self.budget = budget
+        self.limit = limit
+        super().__init__(
+            f"Manim rendering exceeded its {LABELS[budget]} budget ({limit}{UNITS[budget]}). "
+            "The scene is too expensive: use fewer mobjects, shorter run_time values and fewer "
+            "always_redraw/updater calls."
+        )
+
+    def __reduce__(self):
+        # Crosses the process pool boundary intact.
+        return BudgetExceeded, (self.budget, self.limit)
+
+
+def apply_limits(budget: Budget):
+    """
+    Set the rlimits in the process about to run a render (a preexec_fn or a
+    forked child); they carry over to anything it starts, like ffmpeg.
+    """
+    if not RENDER_SANDBOX:
+        return
+    import resource
+
+    limits = [
+        # SIGXCPU at the soft limit, SIGKILL a little later if it's caught.
+        (resource.RLIMIT_CPU, budget.cpu_s, budget.cpu_s + 5),
+        (resource.RLIMIT_AS, budget.memory_mb * 2**20, budget.memory_mb * 2**20),
+        (resource.RLIMIT_NOFILE, budget.open_files, budget.open_files),
+        (resource.RLIMIT_FSIZE, budget.file_mb * 2**20, budget.file_mb * 2**20),
+    ]
+    for kind, soft, hard in limits:
+        _, current_hard = resource.getrlimit(kind)
+        if current_hard != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current_hard), min(hard, current_hard)
+        resource.setrlimit(kind, (soft, hard))
+
+
+def run_limited(cmd: list[str], budget: Budget) -> subprocess.CompletedProcess:
+    """
+    subprocess.run under the budget's rlimits, in its own process group so a
+    wall-clock timeout kills everything it started (manim's ffmpeg too), not
+    just cmd. Raises BudgetExceeded on timeout.
+    """
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        start_new_session=True, preexec_fn=lambda: apply_limits(budget),
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=budget.wall_s)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.communicate()
+        raise BudgetExceeded("wall_s", budget.wall_s)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+def exceeded(returncode: int, output: str, budget: Budget) -> BudgetExceeded | None:
+    """Which budget a failed render ran into, from how it exited and what it printed."""
+    if returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+        return BudgetExceeded("cpu_s", budget.cpu_s)
+    # Python and ffmpeg ignore SIGXFSZ and see EFBIG instead.
+    if returncode in (-signal.SIGXFSZ, 128 + signal.SIGXFSZ) or "File too large" in output:
+        return BudgetExceeded("file_mb", budget.file_mb)
+    if "MemoryError" in output or "Cannot allocate memory" in output or "bad_alloc" in output:
+        return BudgetExceeded("memory_mb", budget.memory_mb)
+    if "Too many open files" in output:
+        return BudgetExceeded("open_files", budget.open_files)
+    return None
@@ -0,0 +1,35 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: while a call for `key` is running,
+    later callers with the same key wait for that call's result instead of
+    starting their own. The work runs in its own task, so the caller that
+    started it disconnecting doesn't cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self.calls: dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    def start(self, key: str, fn) -> tuple[asyncio.Task, bool]:
+        """Returns (task, shared): the running task for key, or a new one for fn()."""
+        task = self.calls.get(key)
+        if task is not None:
+            self.shared += 1
+            return task, True
+        task = asyncio.create_task(fn())
+        self.calls[key] = task
+        self.started += 1
+        task.add_done_callback(lambda t: self.calls.pop(key, None) if self.calls.get(key) is t else None)
+        return task, False
+
+    async def do(self, key: str, fn) -> tuple[object, bool]:
+        """Returns (result, shared)."""
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self.calls), "started": self.started, "shared": self.shared}
@@ -0,0 +1,421 @@
+import math
+import os
+import re
+from typing import Callable, NamedTuple
+import numpy as np
+from dotenv import load_dotenv
+
+from response_cache import canonicalize_question
+
+load_dotenv()
+
+# "verify" only logs LLM key_results that disagree, "overwrite" corrects them, "off" skips the check
+SOLVER_MODE = os.getenv("SOLVER_MODE", "verify")
+SOLVER_TOLERANCE = float(os.getenv("SOLVER_TOLERANCE", "0.02"))
+# Largest /api/solve grid (product of the list lengths); 0 for no limit
+SOLVER_MAX_POINTS = int(os.getenv("SOLVER_MAX_POINTS", "1000000"))
+G = 9.81
+
+# Canonical unit (see response_cache.UNITS) -> (kind, factor to SI)
+UNIT_KINDS = {
+    "m/s^2": ("accel", 1),
+    "km/h": ("speed", 1 / 3.6),
+    "m/s": ("speed", 1),
+    "n/m": ("stiffness", 1),
+    "km": ("length", 1000),
+    "cm": ("length", 0.01),
+    "mm": ("length", 0.001),
+    "m": ("length", 1),
+    "kg": ("mass", 1),
+    "g": ("mass", 0.001),
+    "s": ("time", 1),
+    "min": ("time", 60),
+    "h": ("time", 3600),
+    "deg": ("angle", 1),
+    "rad": ("angle", 180 / math.pi),
+    "n": ("force", 1),
+    "j": ("energy", 1),
+    "hz": ("frequency", 1),
+}
+
+
+# ─── Closed forms ─────────────────────────────────────────────────────────────
+#
+# Every function takes scalars or NumPy arrays (angles in degrees, everything
+# else SI) and broadcasts, so one call evaluates a whole parameter grid.
+# Result keys are the key_results labels used by the templates.
+
+def projectile(v0, angle, g=G):
+    theta = np.radians(angle)
+    vx, vy = v0 * np.cos(theta), v0 * np.sin(theta)
+    return {
+        "Time of flight": 2 * vy / g,
+        "Maximum height": vy ** 2 / (2 * g),
+        "Range": v0 ** 2 * np.sin(2 * theta) / g,
+        "Horizontal velocity": vx,
+        "Initial vertical velocity": vy,
+    }
+
+
+def river_boat(vb, vr, d):
+    t = d / vb
+    return {
+        "Time to cross": t,
+        "Drift": vr * t,
+        "Resultant speed": np.hypot(vb, vr),
+        "Drift angle": np.degrees(np.arctan2(vr, vb)),
+    }
+
+
+def incline(angle, mu=0.0, m=1.0, length=0.0, g=G):
+    theta = np.radians(angle)
+    normal = m * g * np.cos(theta)
+    parallel = m * g * np.sin(theta)
+    a = np.maximum(0.0, g * (np.sin(theta) - mu * np.cos(theta)))
+    sliding = a > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(sliding & (length > 0), np.sqrt(2 * length / a), np.nan)
+    return {
+        "Acceleration": a,
+        "Normal force": normal,
+        "Force along incline": parallel,
+        # Kinetic friction while sliding, static friction holding it otherwise.
+        "Friction force": np.where(sliding, mu * normal, parallel),
+        "Time to slide down": t,
+        "Speed at bottom": a * t,
+    }
+
+
+def atwood(m1, m2, g=G):
+    total = m1 + m2
+    return {
+        "Acceleration": np.abs(m1 - m2) * g / total,
+        "Tension": 2 * m1 * m2 * g / total,
+    }
+
+
+def pendulum(length, amplitude=10.0, g=G):
+    w = np.sqrt(g / length)
+    T = 2 * np.pi / w
+    return {
+        "Period": T,
+        "Frequency": 1 / T,
+        "Angular frequency": w,
+        "Maximum speed": np.sqrt(2 * g * length * (1 - np.cos(np.radians(amplitude)))),
+    }
+
+
+def spring_mass(k, m, amplitude=0.1):
+    w = np.sqrt(k / m)
+    T = 2 * np.pi / w
+    return {
+        "Period": T,
+        "Frequency": 1 / T,
+        "Angular frequency": w,
+        "Maximum speed": amplitude * w,
+        "Maximum acceleration": amplitude * w * w,
+        "Total energy": 0.5 * k * amplitude ** 2,
+    }
+
+
+def circular(r, v, m=0.0):
+    ac = v * v / r
+    return {
+        "Centripetal acceleration": ac,
+        "Angular velocity": v / r,
+        "Period": 2 * np.pi * r / v,
+        "Speed": v * np.ones_like(ac),
+        "Centripetal force": np.where(m > 0, m * ac, np.nan),
+    }
+
+
+def collision(m1, m2, v1, v2=0.0, elastic=1):
+    total = m1 + m2
+    p = m1 * v1 + m2 * v2
+    elastic = np.asarray(elastic) > 0
+    u1 = np.where(elastic, ((m1 - m2) * v1 + 2 * m2 * v2) / total, p / total)
+    u2 = np.where(elastic, ((m2 - m1) * v2 + 2 * m1 * v1) / total, p / total)
+    return {
+        "Final velocity 1": u1,
+        "Final velocity 2": u2,
+        # Only perfectly inelastic collisions have a single final velocity.
+        "Common velocity": np.where(elastic, np.nan, p / total),
+        "Total momentum": p * np.ones_like(u1),
+        "Kinetic energy before": 0.5 * m1 * v1 ** 2 + 0.5 * m2 * v2 ** 2,
+        "Kinetic energy after": 0.5 * m1 * u1 ** 2 + 0.5 * m2 * u2 ** 2,
+    }
+
+
+class Solver(NamedTuple):
+    fn: Callable
+    defaults: dict      # parameter -> default (None when required)
+    param_aliases: dict  # parameter -> names/symbols an LLM might use for it
+    units: dict         # result -> display unit
+    result_aliases: dict  # result -> names an LLM might use for it
+    ignored: tuple = ()  # parameter names that don't change any result
+
+
+SOLVERS = {
+    "projectile": Solver(
+        projectile,
+        {"v0": None, "angle": None, "g": G},
+        {"v0": ("v0", "v₀", "u", "initial speed", "initial velocity", "launch speed", "launch velocity"),
+         "angle": ("θ", "theta", "angle", "launch angle", "projection angle"),
+         "g": ("g", "gravity")},
+        {"Time of flight": "s", "Maximum height": "m", "Range": "m", "Horizontal velocity": "m/s", "Initial vertical velocity": "m/s"},
+        {"Time of flight": ("time of flight", "flight time", "total time"),
+         "Maximum height": ("maximum height", "max height", "peak height", "max height h"),
+         "Range": ("range", "horizontal range", "horizontal distance")},
+        ("m", "mass"),
+    ),
+    "river_boat": Solver(
+        river_boat,
+        {"vb": None, "vr": None, "d": None},
+        {"vb": ("vb", "v_b", "boat speed", "boat velocity", "speed of boat", "swimmer speed"),
+         "vr": ("vr", "v_r", "river speed", "river velocity", "current speed", "speed of river", "stream speed"),
+         "d": ("d", "width", "river width", "width of river")},
+        {"Time to cross": "s", "Drift": "m", "Resultant speed": "m/s", "Drift angle": "deg"},
+        {"Time to cross": ("time to cross", "crossing time", "time taken"),
+         "Drift": ("drift", "downstream drift", "drift distance", "downstream distance"),
+         "Resultant speed": ("resultant speed", "resultant velocity")},
+    ),
+    "incline": Solver(
+        incline,
+        {"angle": None, "mu": 0.0, "m": 1.0, "length": 0.0, "g": G},
+        {"angle": ("θ", "theta", "angle", "incline angle", "angle of incline"),
+         "mu": ("μ", "mu", "μk", "friction coefficient", "coefficient of friction"),
+         "m": ("m", "mass"),
+         "length": ("l", "length", "incline length", "length of incline"),
+         "g": ("g", "gravity")},
+        {"Acceleration": "m/s²", "Normal force": "N", "Force along incline": "N", "Friction force": "N",
+         "Time to slide down": "s", "Speed at bottom": "m/s"},
+        {"Acceleration": ("acceleration",),
+         "Normal force": ("normal force", "normal reaction"),
+         "Friction force": ("friction force", "frictional force", "kinetic friction"),
+         "Speed at bottom": ("speed at bottom", "final speed", "final velocity")},
+    ),
+    "atwood": Solver(
+        atwood,
+        {"m1": None, "m2": None, "g": G},
+        {"m1": ("m1", "m₁", "mass 1", "mass1"), "m2": ("m2", "m₂", "mass 2", "mass2"), "g": ("g", "gravity")},
+        {"Acceleration": "m/s²", "Tension": "N"},
+        {"Acceleration": ("acceleration",), "Tension": ("tension", "string tension")},
+    ),
+    "pendulum": Solver(
+        pendulum,
+        {"length": None, "amplitude": 10.0, "g": G},
+        {"length": ("l", "length", "string length", "pendulum length"),
+         "amplitude": ("θ0", "θ₀", "theta0", "amplitude", "initial angle"),
+         "g": ("g", "gravity")},
+        {"Period": "s", "Frequency": "Hz", "Angular frequency": "rad/s", "Maximum speed": "m/s"},
+        {"Period": ("period", "time period"), "Frequency": ("frequency",),
+         "Angular frequency": ("angular frequency", "omega", "ω")},
+        ("m", "mass", "bob mass"),
+    ),
+    "spring_mass": Solver(
+        spring_mass,
+        {"k": None, "m": None, "amplitude": 0.1},
+        {"k": ("k", "spring constant", "stiffness"), "m": ("m", "mass"), "amplitude": ("a", "amplitude")},
+        {"Period": "s", "Frequency": "Hz", "Angular frequency": "rad/s", "Maximum speed": "m/s",
+         "Maximum acceleration": "m/s²", "Total energy": "J"},
+        {"Period": ("period", "time period"), "Frequency": ("frequency",),
+         "Angular frequency": ("angular frequency", "omega", "ω"),
+         "Maximum speed": ("maximum speed", "max speed", "maximum velocity", "max velocity", "v max"),
+         "Total energy": ("total energy", "mechanical energy")},
+    ),
+    "circular": Solver(
+        circular,
+        {"r": None, "v": None, "m": 0.0},
+        {"r": ("r", "radius"), "v": ("v", "speed", "velocity", "tangential speed"), "m": ("m", "mass")},
+        {"Centripetal acceleration": "m/s²", "Angular velocity": "rad/s", "Period": "s", "Speed": "m/s",
+         "Centripetal force": "N"},
+        {"Centripetal acceleration": ("centripetal acceleration",),
+         "Angular velocity": ("angular velocity", "angular speed", "ω"),
+         "Period": ("period", "time period"),
+         "Centripetal force": ("centripetal force",)},
+    ),
+    "collision": Solver(
+        collision,
+        {"m1": None, "m2": None, "v1": None, "v2": 0.0, "elastic": 1},
+        {"m1": ("m1", "m₁", "mass 1"), "m2": ("m2", "m₂", "mass 2"),
+         "v1": ("v1", "v₁", "velocity 1", "initial velocity 1", "u1"), "v2": ("v2", "v₂", "velocity 2", "initial velocity 2", "u2"),
+         "elastic": ("elastic",)},
+        {"Final velocity 1": "m/s", "Final velocity 2": "m/s", "Common velocity": "m/s", "Total momentum": "kg·m/s",
+         "Kinetic energy before": "J", "Kinetic energy after": "J"},
+        {"Final velocity 1": ("final velocity 1", "v1'", "v₁'", "v1 final"),
+         "Common velocity": ("common velocity", "final velocity", "v_f", "combined velocity"),
+         "Final velocity 2": ("final velocity 2", "v2'", "v₂'", "v2 final"),
+         "Total momentum": ("total momentum", "momentum")},
+    ),
+}
+
+# Recognising an LLM answer's family from its problem_type (plus the question).
+FAMILY_PATTERNS = {
+    "projectile": r"projectile",
+    "river_boat": r"river|boat|relative velocity",
+    "incline": r"incline",
+    "atwood": r"atwood",
+    "pendulum": r"pendulum",
+    "spring_mass": r"spring",
+    "circular": r"circular|centripetal",
+    "collision": r"collision",
+}
+
+
+# ─── Evaluation ──────────────────────────────────────────────────────────────
+
+def solve(family: str, params: dict) -> dict:
+    """Evaluate a family's closed forms; array parameters broadcast against each other."""
+    solver = SOLVERS[family]
+    args = {}
+    for name, default in solver.defaults.items():
+        value = params.get(name, default)
+        if value is None:
+            raise ValueError(f"Missing parameter '{name}' for {family}")
+        args[name] = np.asarray(value, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return solver.fn(**args)
+
+
+def solve_grid(family: str, grid: dict, max_points: int = SOLVER_MAX_POINTS) -> dict:
+    """
+    Evaluate over the outer product of the given parameter values: one axis
+    per list-valued parameter, in the order given, scalars held fixed.
+    Raises ValueError if the grid has more than max_points points.
+    """
+    axes = [name for name, value in grid.items() if np.ndim(value) > 0]
+    points = math.prod(np.size(grid[name]) for name in axes)
+    if max_points and points > max_points:
+        raise ValueError(f"Grid of {points} points is over the limit of {max_points}")
+    mesh = np.meshgrid(*[np.asarray(grid[name], dtype=float) for name in axes], indexing="ij", sparse=True)
+    return solve(family, {**grid, **dict(zip(axes, mesh))})
+
+
+def _norm(name: str) -> str:
+    return " ".join(re.sub(r"[^\w'₀₁₂θμω ]", " ", name.casefold().replace("_", " ")).split())
+
+
+def _matches(name: str, aliases: tuple) -> bool:
+    name = _norm(name)
+    return any(name == a or (len(a) > 3 and a in name) for a in map(_norm, aliases))
+
+
+def _to_si(value, unit: str) -> float:
+    """A value with a free-form unit ("km/h", "°", "cm") in the solver's units."""
+    value = float(value)
+    unit_text = canonicalize_question(f"1 {unit}")[2:] if unit else ""
+    kind = UNIT_KINDS.get(unit_text)
+    return value * kind[1] if kind else value
+
+
+def detect_family(problem_type: str, question: str = "") -> str | None:
+    text = f"{problem_type} {question}".casefold()
+    found = [f for f, pattern in FAMILY_PATTERNS.items() if re.search(pattern, problem_type.casefold())]
+    if not found:
+        found = [f for f, pattern in FAMILY_PATTERNS.items() if re.search(pattern, text)]
+    return found[0] if len(found) == 1 else None
+
+
+def resolve_params(family: str, parameters: dict, strict: bool = False) -> dict | None:
+    """
+    Map LLM-style parameters ({"Initial Velocity": {"value": 20, "unit":
+    "m/s", "symbol": "v₀"}}) or plain {"v0": 20} onto the solver's names.
+    None if a required parameter can't be found or, with `strict`, if any
+    given parameter isn't a solver input (a cliff height, an applied force):
+    then the closed form doesn't model the problem.
+    """
+    solver = SOLVERS[family]
+    resolved = {}
+    for key, entry in parameters.items():
+        if isinstance(entry, dict):
+            value, unit, symbol = entry.get("value"), entry.get("unit", ""), entry.get("symbol", "")
+        else:
+            value, unit, symbol = entry, "", ""
+        if _matches(key, solver.ignored) or (symbol and _matches(symbol, solver.ignored)):
+            continue
+        for name, aliases in solver.param_aliases.items():
+            if name in resolved:
+                continue
+            if key == name or _matches(key, aliases) or (symbol and _matches(symbol, aliases)):
+                try:
+                    resolved[name] = [_to_si(v, unit) for v in value] if isinstance(value, list) else _to_si(value, unit)
+                except (TypeError, ValueError):
+                    return None
+                break
+        else:
+            if strict:
+                return None
+    if any(default is None and name not in resolved for name, default in solver.defaults.items()):
+        return None
+    return resolved
+
+
+def unsupported(family: str, text: str) -> bool:
+    """True if the question is a variant the family's closed forms don't model."""
+    from problem_templates import FAMILIES  # imports this module
+
+    guard = next(f.unsupported for f in FAMILIES if f.name == family)
+    return bool(guard.search(canonicalize_question(text)))
+
+
+def collision_kind(text: str) -> int | None:
+    """1 for elastic, 0 for perfectly inelastic, None if the text doesn't say."""
+    text = text.casefold()
+    if re.search(r"\binelastic|stick|together|coalesce|embed|common velocity", text):
+        return 0
+    if re.search(r"\belastic", text):
+        return 1
+    return None
+
+
+solver_counts = {"verified": 0, "corrected": 0, "unverified": 0}
+
+
+def verify_key_results(data: dict, question: str = "") -> tuple[dict, list[str]]:
+    """
+    Recompute the key results of a known problem family from the answer's own
+    parameters. Returns the (possibly corrected) key_results and a list of
+    the corrections made; unrecognised answers come back unchanged.
+    """
+    key_results = data.get("key_results") or {}
+    problem_type = str(data.get("problem_type", ""))
+    family = detect_family(problem_type, question) if SOLVER_MODE != "off" else None
+    if family and unsupported(family, f"{question} {problem_type}"):
+        family = None
+    params = resolve_params(family, data.get("parameters") or {}, strict=True) if family else None
+    if params is not None and family == "collision":
+        # Never taken from the LLM's parameters: the default would make every collision elastic.
+        params["elastic"] = collision_kind(f"{problem_type} {question}")
+        if params["elastic"] is None:
+            params = None
+    if params is None:
+        solver_counts["unverified"] += 1
+        return key_results, []
+
+    solver = SOLVERS[family]
+    expected = solve(family, params)
+    corrected = dict(key_results)
+    corrections = []
+    for label, entry in key_results.items():
+        target = next((r for r, aliases in solver.result_aliases.items() if _matches(label, aliases)), None)
+        if target is None or not isinstance(entry, dict):
+            continue
+        want = float(expected[target])
+        try:
+            got = _to_si(entry.get("value"), entry.get("unit", ""))
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(want) or math.isclose(got, want, rel_tol=SOLVER_TOLERANCE, abs_tol=1e-3):
+            continue
+        corrections.append(f"{label}: {entry.get('value')} -> {want:.4g}")
+        if SOLVER_MODE == "overwrite":
+            corrected[label] = {"value": round(want, 4), "unit": solver.units[target]}
+
+    solver_counts["corrected" if corrections else "verified"] += 1
+    if corrections:
+        print(f"[Solver] {family} key_results disagree with the closed form: {'; '.join(corrections)}")
+    return (corrected if SOLVER_MODE == "overwrite" else key_results), corrections
+
+
+def solver_stats() -> dict:
+    return {"mode": SOLVER_MODE, **solver_counts}
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where rendered videos and preview frames go: "cloudinary", "local" (files
+# under STORAGE_DIR, served by this API at /media) or "auto" (Cloudinary when
+# its credentials are set, local otherwise).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "auto")
+STORAGE_DIR = os.getenv("STORAGE_DIR", ".cache/media")
+# Base URL the local backend's links start with
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8000").rstrip("/")
+# Uploads run on their own threads, never on a render worker
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+# Files above this are sent to Cloudinary in chunks of this size
+UPLOAD_CHUNK_MB = int(os.getenv("UPLOAD_CHUNK_MB", "20"))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "120"))
+
+
+def artifact_name(job_id: str, rendition: str = "standard") -> str:
+    """Stable name of a job's rendition, without extension."""
+    return job_id if rendition == "standard" else f"{job_id}_{rendition}"
+
+
+class Storage(ABC):
+    """
+    One artifact backend. `put` is the blocking upload; `upload` runs it on
+    the storage's own bounded thread pool so a stalled upload never holds a
+    render slot or the default executor.
+    """
+
+    name = "base"
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upload")
+        self.pending = 0
+        self.uploads = 0
+        self.failed = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @abstractmethod
+    def put(self, path: str, name: str) -> str:
+        """Store the file at path as `name` + its extension; returns its public URL."""
+
+    async def upload(self, path: str, name: str) -> str:
+        """Raises RuntimeError on failure."""
+        self.pending += 1
+        started = time.monotonic()
+        try:
+            url = await asyncio.get_running_loop().run_in_executor(self.executor, self.put, path, name)
+        except Exception as e:
+            self.failed += 1
+            raise RuntimeError(f"{self.name} upload failed: {e}")
+        finally:
+            self.pending -= 1
+        self.uploads += 1
+        self.bytes += os.path.getsize(path)
+        self.seconds += time.monotonic() - started
+        return url
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "concurrency": self.concurrency,
+            "pending": self.pending,
+            "uploads": self.uploads,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "avg_s": round(self.seconds / self.uploads, 2) if self.uploads else None,
+        }
+
+
+# ─── Cloudinary ───────────────────────────────────────────────────────────────
+
+class CloudinaryStorage(Storage):
+    name = "cloudinary"
+
+    def __init__(self, concurrency: int, chunk_size: int):
+        super().__init__(concurrency)
+        import cloudinary
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+        )
+        self.chunk_size = chunk_size
+
+    def put(self, path: str, name: str) -> str:
+        import cloudinary.uploader
+
+        options = {
+            "resource_type": "image" if path.endswith(".png") else "video",
+            "public_id": f"physicsai/{name}",
+            "overwrite": True,
+            "timeout": UPLOAD_TIMEOUT,
+        }
+        size = os.path.getsize(path)
+        print(f"[Storage] Uploading {name} to Cloudinary ({size} bytes)...")
+        if size > self.chunk_size:
+            # Chunked: a dropped connection only resends the current chunk.
+            result = cloudinary.uploader.upload_large(path, chunk_size=self.chunk_size, **options)
+        else:
+            result = cloudinary.uploader.upload(path, **options)
+        url = result["secure_url"]
+        print(f"[Storage] Upload successful: {url}")
+        return url
+
+
+# ─── Local disk ───────────────────────────────────────────────────────────────
+
+class LocalStorage(Storage):
+    """Files under `root`, served by the API itself. No credentials needed."""
+
+    name = "local"
+
+    def __init__(self, concurrency: int, root: str, public_url: str):
+        super().__init__(concurrency)
+        self.root = root
+        self.public_url = public_url
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, path: str, name: str) -> str:
+        filename = name + os.path.splitext(path)[1]
+        dest = os.path.join(self.root, filename)
+        # Copy next to the destination and rename, so /media never serves a partial file.
+        tmp = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        url = f"{self.public_url}/media/{filename}"
+        print(f"[Storage] Stored {dest}: {url}")
+        return url
+
+    def path(self, filename: str) -> str | None:
+        """Local path of a stored file, or None if there is no such file."""
+        if os.path.basename(filename) != filename or filename.startswith("."):
+            return None
+        path = os.path.join(self.root, filename)
+        return path if os.path.isfile(path) else None
+
+
+storage: Storage | None = None
+
+
+def get_storage() -> Storage:
+    global storage
+    if storage is None:
+        kind = STORAGE_BACKEND
+        if kind == "auto":
+            kind = "cloudinary" if os.getenv("CLOUDINARY_CLOUD_NAME") else "local"
+        if kind == "cloudinary":
+            storage = CloudinaryStorage(UPLOAD_CONCURRENCY, UPLOAD_CHUNK_MB * 2**20)
+        else:
+            storage = LocalStorage(UPLOAD_CONCURRENCY, STORAGE_DIR, STORAGE_PUBLIC_URL)
+        print(f"[Storage] Backend {storage.name}, {UPLOAD_CONCURRENCY} concurrent uploads")
+    return storage
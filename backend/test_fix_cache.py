@@ -0,0 +1,61 @@
+from cache import LRUCache
+from fix_cache import FixCache, error_signature
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/tmp/manim_a1b2c3/scene.py", line 12, in construct
+    self.play(Foo())
+NameError: name 'Foo' is not defined"""
+
+
+def test_error_signature_is_the_last_exception_line():
+    assert error_signature(TRACEBACK) == "NameError: name 'Foo' is not defined"
+
+
+def test_error_signature_strips_run_specific_details():
+    a = "TypeError: bad operand at 0x7f3a2b1c (line 12, col 4) in /tmp/manim_x1/scene.py:12:4"
+    b = "TypeError: bad operand at 0x55aa0011 (line 40, col 9) in /tmp/manim_y2/scene.py:40:9"
+    assert error_signature(a) == error_signature(b)
+    job = "RuntimeError: job 123e4567-e89b-12d3-a456-426614174000 failed"
+    assert error_signature(job) == "RuntimeError: job <id> failed"
+
+
+def make_cache() -> FixCache:
+    return FixCache(LRUCache("fix"))
+
+
+def test_hit_across_runs_of_the_same_error():
+    cache = make_cache()
+    cache.put("let x = ;", "SyntaxError: Unexpected token ';' (line 1)", "p5js", "let x = 0;")
+    assert cache.get("let x = ;", "SyntaxError: Unexpected token ';' (line 9)", "p5js") == "let x = 0;"
+    assert cache.get("let x = ;", "SyntaxError: Unexpected token ';'", "manim") is None
+
+
+def test_p5js_keys_ignore_whitespace():
+    cache = make_cache()
+    cache.put("let  x=1;\nfoo()", "ReferenceError: foo is not defined", "p5js", "fixed")
+    assert cache.get("let x=1; foo()", "ReferenceError: foo is not defined", "p5js") == "fixed"
+
+
+def test_manim_keys_keep_indentation():
+    cache = make_cache()
+    nested = "if ok:\n    a()\n    b()\n"
+    flat = "if ok:\n    a()\nb()\n"
+    cache.put(nested, "NameError: name 'a' is not defined", "manim", "fixed")
+    assert cache.get(nested + "# comment\n", "NameError: name 'a' is not defined", "manim") == "fixed"
+    assert cache.get(flat, "NameError: name 'a' is not defined", "manim") is None
+
+
+def test_failed_fix_is_dropped():
+    cache = make_cache()
+    cache.put("broken", "Error: x", "p5js", "fixed")
+    assert cache.report("fixed", "p5js", ok=False)
+    assert cache.get("broken", "Error: x", "p5js") is None
+    assert not cache.report("fixed", "p5js", ok=False)
+
+
+def test_working_fix_is_verified():
+    cache = make_cache()
+    cache.put("broken", "Error: x", "p5js", "fixed")
+    assert cache.report("fixed", "p5js", ok=True)
+    assert cache.cache.get(FixCache.key("broken", "Error: x", "p5js")) == {"fixed": "fixed", "verified": True}
+    assert not cache.report("unrelated", "p5js", ok=True)
@@ -0,0 +1,44 @@
+import json
+
+from json_stream import JsonFieldParser
+
+ANSWER = {
+    "problem_type": "Projectile \"motion\"",
+    "parameters": {"v0": {"value": 20, "unit": "m/s"}},
+    "equations": [{"label": "R", "formula": "v^2 sin(2θ) / g"}, {"label": "{x}", "formula": "]"}],
+    "steps": 3,
+    "ok": True,
+    "manim_code": "class PhysicsScene(Scene):\n    pass\n",
+}
+
+
+def feed_all(parser: JsonFieldParser, chunks) -> list:
+    return [field for chunk in chunks for field in parser.feed(chunk)]
+
+
+def test_whole_object():
+    assert feed_all(JsonFieldParser(), [json.dumps(ANSWER)]) == list(ANSWER.items())
+
+
+def test_one_character_at_a_time():
+    assert feed_all(JsonFieldParser(), json.dumps(ANSWER, indent=2)) == list(ANSWER.items())
+
+
+def test_fields_arrive_as_soon_as_complete():
+    parser = JsonFieldParser()
+    assert parser.feed('{"a": [1, 2') == []
+    assert parser.feed('], "b": "x') == [("a", [1, 2])]
+    assert parser.feed('y", "c": 4') == [("b", "xy")]
+    # A bare number only ends at the next comma or the closing brace.
+    assert parser.feed("}") == [("c", 4)]
+
+
+def test_skips_a_code_fence():
+    text = "```json\n" + json.dumps({"a": 1}) + "\n```"
+    assert feed_all(JsonFieldParser(), [text[:5], text[5:]]) == [("a", 1)]
+
+
+def test_escaped_key_and_nothing_after_the_end():
+    parser = JsonFieldParser()
+    assert parser.feed('{"we\\"ird": null} {"b": 2}') == [('we"ird', None)]
+    assert parser.feed('{"c": 3}') == []
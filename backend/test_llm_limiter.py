@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+import llm_limiter
+from llm_limiter import LLMLimiter, TokenBucket, is_rate_limited, retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_refills(clock):
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1)
+    clock.now += 30
+    assert bucket.wait_time(30) == 0
+    assert bucket.wait_time(31) == pytest.approx(1)
+
+
+def test_bucket_never_holds_more_than_a_minute(clock):
+    bucket = TokenBucket(60)
+    clock.now += 3600
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1)
+
+
+def test_bucket_oversized_request_waits_for_a_full_bucket(clock):
+    bucket = TokenBucket(60)
+    bucket.take(30)
+    assert bucket.wait_time(1000) == pytest.approx(30)
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, code: int | None = None, headers: dict | None = None):
+        super().__init__(message)
+        self.code = code
+        self.response = type("Response", (), {"headers": headers or {}, "status_code": code})()
+
+
+def test_is_rate_limited():
+    assert is_rate_limited(ApiError("too many", 429))
+    assert is_rate_limited(Exception("429 RESOURCE_EXHAUSTED: quota exceeded"))
+    assert not is_rate_limited(ApiError("bad request", 400))
+
+
+def test_retry_after():
+    assert retry_after(ApiError("slow down", 429, {"retry-after": "7"})) == 7
+    assert retry_after(Exception("{'retryDelay': '12s'}")) == 12
+    assert retry_after(Exception("Please retry in 3.5s")) == 3.5
+    assert retry_after(Exception("no hint")) is None
+
+
+def test_backoff_pauses_everyone_for_the_hint():
+    limiter = LLMLimiter(max_in_flight=2, rpm=60, tpm=1000)
+    assert limiter.backoff(ApiError("slow down", 429, {"retry-after": "5"}), attempt=0) >= 5
+    assert limiter.paused_until > time.monotonic() + 4
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_slot_caps_in_flight_calls():
+    limiter = LLMLimiter(max_in_flight=2, rpm=6000, tpm=10**6)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot(10):
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*[call() for _ in range(6)])
+
+    asyncio.run(main())
+    assert peak == 2
+    assert limiter.stats()["calls"] == 6
+    assert limiter.in_flight == 0
+
+
+def test_record_tokens_corrects_the_estimate():
+    limiter = LLMLimiter(max_in_flight=1, rpm=60, tpm=1000)
+    limiter.tokens.take(100)
+    limiter.record_tokens(100, 300, cached=200)
+    assert limiter.tokens.level == pytest.approx(700, abs=1)
+    assert limiter.stats()["prompt_tokens"] == 300
+    assert limiter.stats()["cached_tokens"] == 200
@@ -0,0 +1,84 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from media import media_response, parse_range
+
+BODY = bytes(range(256)) * 4
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+
+
+def test_parse_range_whole_file():
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-9", 1000) is None
+    assert parse_range("bytes=9-0", 1000) is None
+
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 1000)
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(BODY)
+
+    async def serve(request):
+        return media_response(request, str(path))
+
+    return TestClient(Starlette(routes=[Route("/media/video.mp4", serve, methods=["GET", "HEAD"])]))
+
+
+def test_whole_file(client):
+    r = client.get("/media/video.mp4")
+    assert r.status_code == 200
+    assert r.content == BODY
+    assert r.headers["content-type"] == "video/mp4"
+    assert r.headers["accept-ranges"] == "bytes"
+
+
+def test_range(client):
+    r = client.get("/media/video.mp4", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == BODY[10:20]
+    assert r.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+
+
+def test_range_past_end(client):
+    r = client.get("/media/video.mp4", headers={"Range": f"bytes={len(BODY)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_if_range(client):
+    tag = client.head("/media/video.mp4").headers["etag"]
+    current = client.get("/media/video.mp4", headers={"Range": "bytes=0-9", "If-Range": tag})
+    assert current.status_code == 206
+    stale = client.get("/media/video.mp4", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale.status_code == 200
+    assert stale.content == BODY
+
+
+def test_if_none_match(client):
+    tag = client.get("/media/video.mp4").headers["etag"]
+    r = client.get("/media/video.mp4", headers={"If-None-Match": f'W/{tag}'})
+    assert r.status_code == 304
+    assert r.content == b""
+
+
+def test_head(client):
+    r = client.head("/media/video.mp4")
+    assert r.status_code == 200
+    assert r.headers["content-length"] == str(len(BODY))
+    assert r.content == b""
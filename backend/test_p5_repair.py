@@ -0,0 +1,80 @@
+from p5_repair import declared_names, repair_p5js, tokenize
+
+
+def test_tokenize_skips_comments_and_keeps_strings():
+    tokens = tokenize('let s = "a // b"; // note\n/* x */ s += 1;')
+    assert [t.value for t in tokens] == ["let", "s", "=", '"a // b"', ";", "s", "+=", "1", ";"]
+
+
+def test_declared_names():
+    names = declared_names(tokenize("let a = f(x, y), b; const c = 1; function draw() {} class Ball {}"))
+    assert {"a", "b", "c", "draw", "Ball"} <= names
+    assert "x" not in names
+
+
+def test_declares_variable_assigned_first():
+    fixed, fixes = repair_p5js("function setup() { speed = 2; }", "ReferenceError: speed is not defined")
+    assert fixed.startswith("let speed;\n")
+    assert fixes == ["declared speed"]
+
+
+def test_leaves_variable_read_first_to_llm():
+    assert repair_p5js("function draw() { x = x + 1; }", "ReferenceError: x is not defined") is None
+    assert repair_p5js("function draw() { circle(x, 0, 5); }", "ReferenceError: x is not defined") is None
+
+
+def test_leaves_deltatime_alone():
+    code = "function draw() { speed = 2; timer += deltaTime; if (timer > 2000) { timer = 0; } }"
+    fixed, _ = repair_p5js(code, "ReferenceError: speed is not defined")
+    assert "timer += deltaTime;" in fixed
+
+
+def test_tdz_read_goes_to_llm():
+    code = "let y = x * 2;\nlet x = 5;"
+    assert repair_p5js(code, "ReferenceError: Cannot access 'x' before initialization") is None
+
+
+def test_tdz_assignment_is_hoisted():
+    code = "function setup() { x = 5; }\nsetup();\nlet x = 1;"
+    fixed, _ = repair_p5js(code, "ReferenceError: Cannot access 'x' before initialization")
+    assert fixed == "let x;\nfunction setup() { x = 5; }\nsetup();\nx = 1;"
+
+
+def test_tdz_class_moves_to_top():
+    code = "let b = new Ball();\nclass Ball { constructor() {} }"
+    fixed, _ = repair_p5js(code, "ReferenceError: Cannot access 'Ball' before initialization")
+    assert fixed.startswith("class Ball { constructor() {} }\n")
+
+
+def test_const_to_let_only_for_reassigned():
+    code = "const G = 9.8; const v = 1; function draw() { v += G; }"
+    fixed, fixes = repair_p5js(code, "TypeError: Assignment to constant variable.")
+    assert fixed == "const G = 9.8; let v = 1; function draw() { v += G; }"
+    assert fixes == ["const -> let for v"]
+
+
+def test_const_increment_counts_as_assignment():
+    fixed, _ = repair_p5js("const n = 0; function draw() { n++; }", "TypeError: Assignment to constant variable.")
+    assert fixed.startswith("let n = 0;")
+
+
+def test_drops_redeclaration():
+    fixed, _ = repair_p5js("let a = 1;\nlet a = 2;", "SyntaxError: Identifier 'a' has already been declared")
+    assert fixed == "let a = 1;\na = 2;"
+
+
+def test_adds_new():
+    code = "class Ball {}\nlet b = Ball();"
+    fixed, _ = repair_p5js(code, "TypeError: Class constructor Ball cannot be invoked without 'new'")
+    assert fixed.endswith("let b = new Ball();")
+
+
+def test_callbacks_become_functions():
+    code = "const setup = () => { createCanvas(400, 400); };\nfunction draw() { speed = 1; }"
+    fixed, fixes = repair_p5js(code, "ReferenceError: speed is not defined")
+    assert "function setup() {" in fixed
+    assert "setup as function declaration" in fixes
+
+
+def test_unknown_error():
+    assert repair_p5js("function draw() {}", "SyntaxError: Unexpected end of input") is None
@@ -0,0 +1,47 @@
+import pytest
+
+from manim_runner import preflight_manim
+
+HEADER = "from manim import *\nimport numpy as np\n\nclass PhysicsScene(Scene):\n    def construct(self):\n"
+
+
+def scene(*lines: str) -> str:
+    return HEADER + "".join(f"        {line}\n" for line in lines)
+
+
+def test_pads_points_passed_to_mobjects():
+    code, fixes = preflight_manim(scene(
+        "d = Dot(np.array([1, 2]))",
+        "d.move_to(2 * np.array([0, 1]))",
+        "l = Line(start=np.array([0, 0]), end=UP + np.array([1, 1]))",
+    ))
+    assert "Dot(np.array([1, 2, 0]))" in code
+    assert "move_to(2 * np.array([0, 1, 0]))" in code
+    assert "start=np.array([0, 0, 0]), end=UP + np.array([1, 1, 0])" in code
+    assert fixes.count("2D coordinate -> 3D") == 4
+
+
+def test_leaves_math_vectors_alone():
+    lines = (
+        "v = np.array([3, 4])",
+        "n = np.dot(v, np.array([1, 0]))",
+        "m = np.array([1, 2]).reshape(2, 1)",
+        "self.wait()",
+    )
+    code, fixes = preflight_manim(scene(*lines))
+    assert code == scene(*lines)
+    assert fixes == []
+
+
+def test_renames_and_scene_name():
+    code, fixes = preflight_manim("from manim import *\nclass Demo(Scene):\n    def construct(self):\n        self.play(ShowCreation(Circle()))\n")
+    assert "class PhysicsScene(Scene)" in code
+    assert "Create(Circle())" in code
+    assert "renamed Demo -> PhysicsScene" in fixes
+
+
+def test_rejects_unrenderable_code():
+    with pytest.raises(RuntimeError, match="syntax error"):
+        preflight_manim(scene("x = (1,"))
+    with pytest.raises(RuntimeError, match="no Scene"):
+        preflight_manim("from manim import *\nx = 1\n")
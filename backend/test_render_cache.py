@@ -0,0 +1,64 @@
+import time
+
+from cache import LRUCache
+from render_cache import normalize_scene, render_key
+
+SCENE = """from manim import *
+
+class PhysicsScene(Scene):
+    def construct(self):
+        self.play(Create(Circle()))
+"""
+
+
+def test_cosmetic_changes_share_a_key():
+    reformatted = SCENE.replace("    ", "  ").replace("Circle()))", "Circle()))  # draw it") + "\n\n"
+    assert render_key(reformatted) == render_key(SCENE)
+
+
+def test_real_changes_and_renditions_get_new_keys():
+    assert render_key(SCENE.replace("Circle", "Square")) != render_key(SCENE)
+    assert render_key(SCENE, "hd") != render_key(SCENE, "standard")
+
+
+def test_unparseable_scene_normalizes_whitespace():
+    assert normalize_scene("x = (1,\n\n   \ny = 2   \n") == "x = (1,\ny = 2"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("t", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_byte_bound_and_oversized_values():
+    cache = LRUCache("t", max_bytes=20)
+    cache.set("big", "x" * 100)
+    assert cache.get("big") is None
+    cache.set("a", "x" * 12)
+    cache.set("b", "y" * 12)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 12
+
+
+def test_lru_ttl(monkeypatch):
+    cache = LRUCache("t", ttl=10)
+    cache.set("a", 1)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_persists_to_disk(tmp_path):
+    cache = LRUCache("t", path=str(tmp_path))
+    cache.set("a", {"url": "u"})
+    cache.set("b", 2)
+    cache.delete("b")
+    reloaded = LRUCache("t", path=str(tmp_path))
+    assert reloaded.get("a") == {"url": "u"}
+    assert reloaded.get("b") is None
@@ -0,0 +1,29 @@
+from response_cache import PROMPT_VERSION, canonicalize_question, response_key
+
+
+def test_case_whitespace_and_punctuation():
+    assert canonicalize_question("  A Ball is THROWN   upward?  ") == "a ball is thrown upward"
+
+
+def test_numbers():
+    assert canonicalize_question("speed 1.50 m/s") == canonicalize_question("speed 1.5 m/s")
+    assert canonicalize_question("mass 2.0 kg") == canonicalize_question("mass 2 kg")
+    assert canonicalize_question("3.14 rad") == "3.14 rad"
+
+
+def test_unit_spellings():
+    assert canonicalize_question("20 metres per second") == "20 m/s"
+    assert canonicalize_question("72 km per hour") == "72 km/h"
+    assert canonicalize_question("9.8 m/s²") == "9.8 m/s^2"
+    assert canonicalize_question("30°") == canonicalize_question("30 degrees") == "30 deg"
+    assert canonicalize_question("200 N/m") == "200 n/m"
+
+
+def test_units_need_a_number():
+    assert canonicalize_question("the metre stick") == "the metre stick"
+    assert canonicalize_question("5 metre stick") == "5 m stick"
+
+
+def test_response_key_is_versioned():
+    assert response_key("Ball at 20 m/s?") == response_key("ball at 20 metres per second")
+    assert response_key("x").startswith(f"{PROMPT_VERSION}:")
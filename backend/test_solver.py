@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+import solver
+from solver import collision_kind, detect_family, resolve_params, solve, solve_grid, verify_key_results
+
+
+def test_projectile_closed_forms():
+    r = solve("projectile", {"v0": 20, "angle": 45})
+    assert float(r["Range"]) == pytest.approx(400 / 9.81)
+    assert float(r["Maximum height"]) == pytest.approx(100 / 9.81)
+    assert float(r["Time of flight"]) == pytest.approx(2 * 20 * math.sin(math.pi / 4) / 9.81)
+
+
+def test_collision_elastic_and_inelastic():
+    elastic = solve("collision", {"m1": 1, "m2": 1, "v1": 4, "elastic": 1})
+    assert float(elastic["Final velocity 1"]) == pytest.approx(0)
+    assert float(elastic["Final velocity 2"]) == pytest.approx(4)
+    assert math.isnan(float(elastic["Common velocity"]))
+    inelastic = solve("collision", {"m1": 1, "m2": 1, "v1": 4, "elastic": 0})
+    assert float(inelastic["Common velocity"]) == pytest.approx(2)
+
+
+def test_incline_static_friction_holds():
+    r = solve("incline", {"angle": 10, "mu": 0.5, "m": 2})
+    assert float(r["Acceleration"]) == 0
+    assert float(r["Friction force"]) == pytest.approx(2 * 9.81 * math.sin(math.radians(10)))
+
+
+def test_solve_missing_parameter():
+    with pytest.raises(ValueError):
+        solve("atwood", {"m1": 1})
+
+
+def test_solve_grid_outer_product():
+    r = solve_grid("projectile", {"v0": [10, 20, 30], "angle": [30, 45]})
+    assert r["Range"].shape == (3, 2)
+    assert r["Range"][1, 1] == pytest.approx(400 / 9.81)
+
+
+def test_solve_grid_point_limit():
+    with pytest.raises(ValueError):
+        solve_grid("projectile", {"v0": list(range(100)), "angle": list(range(100))}, max_points=1000)
+    assert solve_grid("projectile", {"v0": list(range(100)), "angle": list(range(100))}, max_points=0)
+
+
+def test_resolve_params_aliases_and_units():
+    params = resolve_params("projectile", {
+        "Initial Velocity": {"value": 72, "unit": "km/h", "symbol": "v₀"},
+        "Launch Angle": {"value": 30, "unit": "°"},
+        "Mass": {"value": 2, "unit": "kg"},
+    })
+    assert params == {"v0": pytest.approx(20), "angle": 30}
+
+
+def test_resolve_params_strict_rejects_unknown():
+    params = {"v0": 20, "angle": 0, "Cliff height": 45}
+    assert resolve_params("projectile", params) == {"v0": 20, "angle": 0}
+    assert resolve_params("projectile", params, strict=True) is None
+
+
+def test_detect_family():
+    assert detect_family("Projectile Motion") == "projectile"
+    assert detect_family("Mechanics", "A boat crosses a river") == "river_boat"
+    assert detect_family("Mechanics", "a spring and a pendulum") is None
+
+
+def test_collision_kind():
+    assert collision_kind("perfectly inelastic collision") == 0
+    assert collision_kind("the blocks stick together") == 0
+    assert collision_kind("an elastic collision") == 1
+    assert collision_kind("two carts collide") is None
+
+
+def test_verify_key_results(monkeypatch):
+    monkeypatch.setattr(solver, "SOLVER_MODE", "overwrite")
+    data = {
+        "problem_type": "Projectile Motion",
+        "parameters": {"v0": {"value": 20, "unit": "m/s"}, "angle": {"value": 45, "unit": "deg"}},
+        "key_results": {"Range": {"value": 50, "unit": "m"}, "Maximum height": {"value": 10.19, "unit": "m"}},
+    }
+    corrected, corrections = verify_key_results(data, "A ball is launched at 20 m/s at 45 degrees")
+    assert corrected["Range"]["value"] == pytest.approx(40.7747)
+    assert corrected["Maximum height"]["value"] == 10.19
+    assert len(corrections) == 1
+
+
+def test_verify_leaves_unmodelled_problems(monkeypatch):
+    monkeypatch.setattr(solver, "SOLVER_MODE", "overwrite")
+    data = {
+        "problem_type": "Collision",
+        "parameters": {"m1": 1, "m2": 1, "v1": 4},
+        "key_results": {"Final velocity": {"value": 1.0, "unit": "m/s"}},
+    }
+    # Elastic or not isn't stated: nothing to check against.
+    assert verify_key_results(data, "Two carts collide") == (data["key_results"], [])
+    corrected, _ = verify_key_results(data, "Two carts collide and stick together")
+    assert corrected["Final velocity"]["value"] == 2
+
+
+def test_broadcasts_arrays():
+    r = solve("spring_mass", {"k": np.array([100, 400]), "m": 1})
+    assert r["Period"] == pytest.approx([2 * math.pi / 10, 2 * math.pi / 20])
@@ -0,0 +1,217 @@
+import fcntl
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where render work dirs (scene.py, manim's media and cache checkouts) live.
+# "auto" uses RAM-backed /dev/shm when it has room for the quota plus the
+# shared manim cache, the system temp dir otherwise.
+RENDER_SCRATCH_DIR = os.getenv("RENDER_SCRATCH_DIR", "auto")
+RENDER_SCRATCH_MAX_MB = float(os.getenv("RENDER_SCRATCH_MAX_MB", "2048"))
+# Older work dirs are left over from a crash or a killed worker; renders and
+# uploads time out long before this.
+RENDER_SCRATCH_STALE_SECONDS = float(os.getenv("RENDER_SCRATCH_STALE_SECONDS", "3600"))
+# Quota eviction skips leased dirs (rendering or uploading) and, for the hand-off
+# between a worker finishing a render and the upload leasing it, dirs touched
+# more recently than this.
+RENDER_SCRATCH_GRACE_SECONDS = float(os.getenv("RENDER_SCRATCH_GRACE_SECONDS", "300"))
+
+PREFIX = "manim_"
+LEASE = ".lease"
+
+
+def _free_mb(path: str) -> float:
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return 0.0
+    return st.f_bavail * st.f_frsize / 2**20
+
+
+def scratch_base() -> str:
+    """Filesystem the scratch root (and by default the shared manim cache) lives on."""
+    if RENDER_SCRATCH_DIR != "auto":
+        return os.path.dirname(os.path.abspath(RENDER_SCRATCH_DIR))
+    # Docker's default /dev/shm is only 64 MB; don't pick it unless everything fits.
+    needed = RENDER_SCRATCH_MAX_MB + float(os.getenv("MANIM_CACHE_MAX_MB", "2048"))
+    if os.access("/dev/shm", os.W_OK) and _free_mb("/dev/shm") >= needed:
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def scratch_root() -> str:
+    if RENDER_SCRATCH_DIR != "auto":
+        return os.path.abspath(RENDER_SCRATCH_DIR)
+    return os.path.join(scratch_base(), "physicsai_render")
+
+
+class Scratch:
+    """
+    Render work dirs under one root with a disk quota. Dirs are released as
+    soon as their video is uploaded (or the render fails); the quota evicts
+    the oldest leftovers first and a startup sweep removes stale ones.
+
+    A process using a dir holds a lease on it: a shared flock on its .lease
+    file, so eviction in any worker can see it and a killed process drops it.
+    """
+
+    def __init__(self, root: str, max_bytes: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.leases = {}  # work dir -> open .lease file, in this process
+        os.makedirs(root, exist_ok=True)
+
+    def create(self, job_id: str) -> str:
+        """A new work dir, leased to this process until unlease() or release()."""
+        self.enforce_quota()
+        work_dir = tempfile.mkdtemp(prefix=f"{PREFIX}{job_id}_", dir=self.root)
+        self.lease(work_dir)
+        return work_dir
+
+    def owner(self, path: str) -> str | None:
+        """The work dir a file inside the scratch root belongs to."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        top = rel.split(os.sep, 1)[0]
+        if top.startswith(PREFIX):
+            return os.path.join(self.root, top)
+        return None
+
+    def lease(self, path: str):
+        """Keep the work dir holding path out of quota eviction until release()."""
+        work_dir = self.owner(path)
+        if not work_dir or work_dir in self.leases:
+            return
+        try:
+            lease = open(os.path.join(work_dir, LEASE), "a")
+        except FileNotFoundError:
+            return
+        fcntl.flock(lease, fcntl.LOCK_SH)
+        self.leases[work_dir] = lease
+        os.utime(work_dir)
+
+    def unlease(self, path: str):
+        """
+        Hand the work dir holding path to another process (a finished render
+        to its upload). Touched, so the grace period covers the hand-off.
+        """
+        work_dir = self.owner(path)
+        lease = self.leases.pop(work_dir, None)
+        if lease:
+            lease.close()
+        if work_dir and os.path.isdir(work_dir):
+            os.utime(work_dir)
+
+    def leased(self, work_dir: str) -> bool:
+        """Whether any process holds a lease on work_dir."""
+        if work_dir in self.leases:
+            return True
+        try:
+            with open(os.path.join(work_dir, LEASE), "r") as lease:
+                fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        except FileNotFoundError:
+            pass
+        return False
+
+    def release(self, path: str | None):
+        """Delete the work dir holding path (a file inside it or the dir itself)."""
+        work_dir = self.owner(path) if path else None
+        if work_dir:
+            self.unlease(work_dir)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @contextmanager
+    def discard_on_error(self, work_dir: str):
+        """Release work_dir if the block raises; keep it (for the caller to upload) otherwise."""
+        try:
+            yield work_dir
+        except BaseException:
+            self.release(work_dir)
+            raise
+
+    def dirs(self) -> list[tuple[float, str]]:
+        """(mtime, path) of every work dir, oldest first."""
+        found = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(PREFIX) and entry.is_dir(follow_symlinks=False):
+                try:
+                    found.append((entry.stat(follow_symlinks=False).st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        return sorted(found)
+
+    def sweep(self, max_age: float = RENDER_SCRATCH_STALE_SECONDS) -> int:
+        """Remove work dirs untouched for max_age seconds; run at startup."""
+        cutoff = time.time() - max_age
+        removed = 0
+        for mtime, path in self.dirs():
+            if mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            print(f"[Scratch] Swept {removed} stale work dirs from {self.root}")
+        return removed
+
+    def enforce_quota(self) -> int:
+        """Evict the oldest unleased work dirs while the scratch root is over its quota."""
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another worker is already evicting
+            sizes = [(mtime, path, _du(path)) for mtime, path in self.dirs()]
+            total = sum(size for _, _, size in sizes)
+            removed = 0
+            cutoff = time.time() - RENDER_SCRATCH_GRACE_SECONDS
+            for mtime, path, size in sizes:
+                if total <= self.max_bytes:
+                    break
+                if mtime >= cutoff or self.leased(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            if removed:
+                print(f"[Scratch] Evicted {removed} work dirs, {total / 2**20:.0f} MB left")
+            elif total > self.max_bytes:
+                print(f"[Scratch] {total / 2**20:.0f} MB in use, over the quota but all of it in use")
+            return removed
+
+    def stats(self) -> dict:
+        dirs = self.dirs()
+        return {
+            "root": self.root,
+            "dirs": len(dirs),
+            "bytes": sum(_du(path) for _, path in dirs),
+            "max_bytes": int(self.max_bytes),
+        }
+
+
+def _du(path: str) -> int:
+    """Bytes a work dir holds on its own; files hard linked from the manim cache count there."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            if st.st_nlink == 1:
+                total += st.st_size
+    return total
+
+
+scratch: Scratch | None = None
+
+
+def get_scratch() -> Scratch:
+    global scratch
+    if scratch is None:
+        scratch = Scratch(scratch_root(), RENDER_SCRATCH_MAX_MB * 2**20)
+    return scratch
@@ -57,24 +57,27 @@ function SimulatePage() {
   const router = useRouter();
   const question = searchParams.get("q") || "";
 
-  const [data, setData] = useState<PhysicsData | null>(null);
+  const [data, setData] = useState<Partial<PhysicsData> | null>(null);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState<"explanation" | "equations" | "results">("explanation");
   const [iframeDoc, setIframeDoc] = useState("");
   const [simKey, setSimKey] = useState(0);
   const [videoUrl, setVideoUrl] = useState<string | null>(null);
+  const [previewUrl, setPreviewUrl] = useState<string | null>(null);
+  const [hdUrl, setHdUrl] = useState<string | null>(null);
   const [videoStatus, setVideoStatus] = useState<"pending" | "done" | "error" | null>(null);
   const [videoError, setVideoError] = useState<string>("");
   const [activeView, setActiveView] = useState<"sim" | "video">("sim");
   const [p5Code, setP5Code] = useState("");
   const [fixing, setFixing] = useState(false);
-  const pollRef = useRef<NodeJS.Timeout | null>(null);
+  const [videoStage, setVideoStage] = useState<string>("");
+  const eventsRef = useRef<EventSource | null>(null);
 
   useEffect(() => {
     if (!question) { router.push("/"); return; }
     fetchSimulation(question);
-    return () => { if (pollRef.current) clearInterval(pollRef.current); };
+    return () => { eventsRef.current?.close(); };
   }, [question]);
 
   useEffect(() => {
@@ -108,24 +111,29 @@ function SimulatePage() {
     return () => window.removeEventListener("message", handler);
   }, [p5Code, fixing]);
 
-  const startVideoPolling = (jobId: string) => {
+  // The backend pushes every job state change; the stream closes itself
+  // after "done" or "error" (or once a background HD render has landed), and
+  // EventSource reconnects on network blips.
+  const watchVideoJob = (jobId: string) => {
     setVideoStatus("pending");
-    pollRef.current = setInterval(async () => {
-      try {
-        const res = await fetch(`/api/video/${jobId}`);
-        if (!res.ok) return;
-        const json = await res.json();
-        if (json.status === "done") {
-          setVideoUrl(json.url);
-          setVideoStatus("done");
-          if (pollRef.current) clearInterval(pollRef.current);
-        } else if (json.status === "error") {
-          setVideoStatus("error");
-          setVideoError(json.error || "Render failed");
-          if (pollRef.current) clearInterval(pollRef.current);
-        }
-      } catch {}
-    }, 4000);
+    eventsRef.current?.close();
+    const events = new EventSource(`/api/video/${jobId}/events`);
+    eventsRef.current = events;
+    events.addEventListener("status", (e) => {
+      const json = JSON.parse((e as MessageEvent).data);
+      setVideoStage(json.stage === "fixing" ? `fixing (attempt ${json.attempt})` : json.stage || "");
+      if (json.renditions?.preview) setPreviewUrl(json.renditions.preview);
+      if (json.renditions?.hd) setHdUrl(json.renditions.hd);
+      if (json.status === "done") {
+        setVideoUrl(json.url);
+        setVideoStatus("done");
+        if (!json.upgrading) events.close();
+      } else if (json.status === "error") {
+        setVideoStatus("error");
+        setVideoError(json.error || "Render failed");
+        events.close();
+      }
+    });
   };
 
   const fetchSimulation = async (q: string) => {
@@ -135,24 +143,51 @@ function SimulatePage() {
     setIframeDoc("");
     setP5Code("");
     setVideoUrl(null);
+    setPreviewUrl(null);
+    setHdUrl(null);
     setVideoStatus(null);
     setVideoError("");
-    if (pollRef.current) clearInterval(pollRef.current);
+    setVideoStage("");
+    eventsRef.current?.close();
     try {
-      const res = await fetch(`/api/simulate`, {
+      // Server-sent events: one "field" event per JSON field as soon as the
+      // model has finished writing it, then "done" with the render job id.
+      const res = await fetch(`/api/simulate/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ question: q }),
       });
-      if (!res.ok) {
-        const err = await res.json();
+      if (!res.ok || !res.body) {
+        const err = await res.json().catch(() => ({}));
         throw new Error(err.detail || "Failed to generate simulation");
       }
-      const json: PhysicsData = await res.json();
-      setData(json);
-      setP5Code(json.p5js_code);
-      startVideoPolling(json.job_id);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf("\n\n")) !== -1) {
+          const raw = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const payload = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "null");
+          if (event === "field") {
+            setData(d => ({ ...(d || {}), [payload.name]: payload.value }));
+            if (payload.name === "p5js_code") setP5Code(payload.value);
+            setLoading(false);
+          } else if (event === "done") {
+            setData(d => ({ ...(d || {}), job_id: payload.job_id }));
+            watchVideoJob(payload.job_id);
+          } else if (event === "error") {
+            throw new Error(payload.detail || "Failed to generate simulation");
+          }
+        }
+      }
     } catch (e: unknown) {
+      setData(null);
       setError(e instanceof Error ? e.message : "Unknown error");
     } finally {
       setLoading(false);
@@ -170,7 +205,7 @@ function SimulatePage() {
           New Problem
         </button>
         <span className="font-bold tracking-tight">Physics<span className="text-white/30">AI</span></span>
-        {data ? (
+        {data?.problem_type ? (
           <span className="text-xs text-white/30 uppercase tracking-widest border border-white/10 px-3 py-1 rounded-full">
             {data.problem_type}
           </span>
@@ -231,9 +266,9 @@ function SimulatePage() {
               </button>
               <button
                 onClick={() => setActiveView("video")}
-                disabled={videoStatus !== "done"}
+                disabled={videoStatus !== "done" && !previewUrl}
                 className={`flex items-center gap-2 px-5 py-2.5 text-xs font-semibold uppercase tracking-widest transition-colors border-b-2 ${
-                  activeView === "video" && videoStatus === "done"
+                  activeView === "video" && (videoStatus === "done" || previewUrl)
                     ? "text-white border-white"
                     : "text-white/25 border-transparent"
                 } disabled:cursor-not-allowed`}
@@ -245,6 +280,9 @@ function SimulatePage() {
                     <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8v8z" />
                   </svg>
                 )}
+                {videoStatus === "pending" && videoStage && (
+                  <span className="text-white/20 text-xs normal-case tracking-normal font-mono">{videoStage}</span>
+                )}
                 {videoStatus === "done" && <span className="w-1.5 h-1.5 rounded-full bg-white/60" />}
                 {videoStatus === "error" && <span className="text-red-400/60 text-xs">failed</span>}
               </button>
@@ -279,8 +317,18 @@ function SimulatePage() {
                 {videoError && <p className="text-white/20 text-xs font-mono text-center max-w-md">{videoError}</p>}
               </div>
             )}
+            {activeView === "video" && videoStatus === "pending" && previewUrl && (
+              <div className="flex-1 flex flex-col items-center justify-center gap-3 bg-black p-4">
+                {previewUrl.endsWith(".png") ? (
+                  <img src={previewUrl} alt="Preview" className="max-h-full max-w-full rounded-lg opacity-80" />
+                ) : (
+                  <video src={previewUrl} autoPlay loop muted className="max-h-full max-w-full rounded-lg opacity-80" />
+                )}
+                <p className="text-white/25 text-xs font-mono">preview — rendering full video…</p>
+              </div>
+            )}
             {activeView === "video" && videoStatus === "done" && videoUrl && (
-              <div className="flex-1 flex items-center justify-center bg-black p-4">
+              <div className="flex-1 flex flex-col items-center justify-center gap-2 bg-black p-4">
                 <video
                   src={videoUrl}
                   controls
@@ -289,6 +337,11 @@ function SimulatePage() {
                   className="max-h-full max-w-full rounded-lg"
                   style={{ background: "#000" }}
                 />
+                {hdUrl && (
+                  <a href={hdUrl} target="_blank" rel="noreferrer" className="text-white/30 hover:text-white/60 text-xs font-mono">
+                    download HD
+                  </a>
+                )}
               </div>
             )}
           </div>
@@ -311,7 +364,7 @@ function SimulatePage() {
             </div>
 
             <div className="flex-1 overflow-y-auto p-5 space-y-3">
-              {activeTab === "explanation" && data.explanation.map((step) => (
+              {activeTab === "explanation" && (data.explanation ?? []).map((step) => (
                 <div key={step.step} className="flex gap-3">
                   <span className="w-5 h-5 rounded-full bg-white/10 text-white/50 text-xs flex items-center justify-center flex-shrink-0 font-bold mt-0.5">
                     {step.step}
@@ -320,14 +373,14 @@ function SimulatePage() {
                 </div>
               ))}
 
-              {activeTab === "equations" && data.equations.map((eq, i) => (
+              {activeTab === "equations" && (data.equations ?? []).map((eq, i) => (
                 <div key={i} className="border border-white/5 rounded-xl p-4 bg-white/[0.02]">
                   <p className="text-white/25 text-xs uppercase tracking-wider mb-2">{eq.label}</p>
                   <p className="text-white font-mono text-sm">{eq.formula}</p>
                 </div>
               ))}
 
-              {activeTab === "results" && Object.entries(data.key_results).map(([key, val]) => (
+              {activeTab === "results" && Object.entries(data.key_results ?? {}).map(([key, val]) => (
                 <div key={key} className="flex items-center justify-between border border-white/5 rounded-xl p-4 bg-white/[0.02]">
                   <span className="text-white/35 text-xs uppercase tracking-wider">{key.replace(/_/g, " ")}</span>
                   <span className="text-white font-mono text-sm font-bold">
@@ -342,7 +395,7 @@ function SimulatePage() {
             <div className="border-t border-white/5 p-4 flex-shrink-0">
               <p className="text-white/20 text-xs uppercase tracking-widest mb-3 font-semibold">Parameters</p>
               <div className="grid grid-cols-3 gap-2">
-                {Object.entries(data.parameters).map(([key, p]) => (
+                {Object.entries(data.parameters ?? {}).map(([key, p]) => (
                   <div key={key} className="bg-white/[0.03] rounded-lg p-2.5">
                     <p className="text-white/25 text-xs mb-1">{p.symbol}</p>
                     <p className="text-white text-xs font-bold font-mono">